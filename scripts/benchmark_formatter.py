@@ -0,0 +1,82 @@
+"""
+Benchmark da limpeza de markdown do LLMSFormatter.
+
+Gera documentos sintéticos com imagens embutidas (data URI base64) e mede a
+vazão (MB/s) dos padrões antigos (re.sub com `.*?`, uma passada por regra)
+contra a limpeza em passada única com padrões pré-compilados.
+
+Uso:
+    python scripts/benchmark_formatter.py --images 50 --image-kb 200
+"""
+import argparse
+import base64
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.tools.llms_formatter import LLMSFormatter, remover_imagens_embutidas  # noqa: E402
+
+
+def gerar_documento(imagens, image_kb, paragrafos=20):
+    """Monta um markdown com parágrafos, links longos e imagens embutidas."""
+    blob = base64.b64encode(os.urandom(image_kb * 768)).decode("ascii")
+    texto = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 4
+    link = f"[referência](https://example.com/{'a' * 80})"
+    partes = ["# Documento de teste"]
+    for i in range(imagens):
+        partes.extend(f"{texto} {link}" for _ in range(paragrafos))
+        # Duas imagens na mesma linha: o padrão antigo precisa retroceder sobre o blob
+        partes.append(f"![fig {i}](figura.png) ![img {i}](data:image/png;base64,{blob})")
+        partes.append("\n\n")
+    return "\n\n".join(partes)
+
+
+def limpeza_antiga(content):
+    """Regras originais: uma passada de re.sub por regra, padrões não compilados."""
+    content = re.sub(r'!\[.*?\]\(.*?\)', '[IMAGEM]', content)
+    content = re.sub(r'\[([^\]]+)\]\(https?:\/\/[^\s]{60,}\)', r'\1', content)
+    content = re.sub(r'\n{3,}', '\n\n', content)
+    return content
+
+
+def data_uri_antigo(content):
+    return re.sub(r'!\[.*?\]\(data:image/.*?\)', '[IMAGEM]', content)
+
+
+def medir(funcao, content, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao(content)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    """CLI do benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark da limpeza de markdown do LLMSFormatter")
+    parser.add_argument("--images", type=int, default=50, help="Número de imagens embutidas")
+    parser.add_argument("--image-kb", type=int, default=200, help="Tamanho de cada imagem (KB em base64)")
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições por medição")
+    args = parser.parse_args()
+
+    content = gerar_documento(args.images, args.image_kb)
+    megabytes = len(content.encode("utf-8")) / 1e6
+    formatter = LLMSFormatter()
+
+    casos = [
+        ("data URI (antigo)", data_uri_antigo),
+        ("data URI (novo)", remover_imagens_embutidas),
+        ("limpeza completa (antigo)", limpeza_antiga),
+        ("limpeza completa (novo)", formatter._limpar_markdown),
+    ]
+
+    print(f"\nDocumento: {megabytes:.1f} MB, {args.images} imagens de {args.image_kb} KB\n")
+    for nome, funcao in casos:
+        segundos = medir(funcao, content, args.repeat)
+        print(f"{nome:<28} {segundos * 1000:10.1f} ms  {megabytes / segundos:10.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 Ponto de entrada da API REST do Anything to LLMs.txt.
 """
 
+import asyncio
 import os
 import shutil
 import uvicorn
@@ -10,8 +11,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from src.api.routers import converter, analyzer
 from src.utils.logging_config import setup_logger
-from src.api.services.conversion_service import redis_client
-from src.config import UPLOAD_DIR
+from src.api.services.conversion_service import redis_client, cleanup_old_jobs
+from src.config import UPLOAD_DIR, MAX_FILE_SIZE, CLEANUP_INTERVAL_SECONDS
 from src.api.metrics import metrics_middleware, metrics_endpoint, update_health_metrics
 
 # Configurar logger
@@ -40,6 +41,28 @@ app.add_middleware(
 # Adicionar middleware de métricas
 app.middleware("http")(metrics_middleware)
 
+# Folga para boundaries e campos de formulário do multipart além do arquivo
+UPLOAD_MULTIPART_OVERHEAD = 1024 * 1024
+
+
+@app.middleware("http")
+async def upload_size_middleware(request: Request, call_next):
+    """
+    Rejeita com 413 uploads cujo Content-Length já excede o limite,
+    antes que o corpo seja lido. Uploads sem Content-Length (chunked) são
+    limitados durante a gravação em disco.
+    """
+    if request.method == "POST" and request.url.path.startswith("/v1/convert"):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and \
+                int(content_length) > MAX_FILE_SIZE + UPLOAD_MULTIPART_OVERHEAD:
+            max_mb = MAX_FILE_SIZE / (1024 * 1024)
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Tamanho máximo de arquivo excedido ({max_mb:.0f}MB)"}
+            )
+    return await call_next(request)
+
 # Incluir routers
 app.include_router(converter.router, prefix="/v1")
 app.include_router(analyzer.router, prefix="/v1")
@@ -152,8 +175,27 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+async def periodic_cleanup():
+    """Remove periodicamente os resultados de jobs expirados."""
+    while True:
+        await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+        try:
+            await cleanup_old_jobs()
+        except Exception as e:
+            logger.warning(f"Falha na limpeza de resultados expirados: {str(e)}")
+
+
+@app.on_event("startup")
+async def start_cleanup_task():
+    if CLEANUP_INTERVAL_SECONDS > 0:
+        app.state.cleanup_task = asyncio.create_task(periodic_cleanup())
+
+
 @app.on_event("shutdown")
 async def shutdown_redis():
+    cleanup_task = getattr(app.state, "cleanup_task", None)
+    if cleanup_task:
+        cleanup_task.cancel()
     await redis_client.close()
 
 if __name__ == "__main__":
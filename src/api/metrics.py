@@ -45,6 +45,13 @@ conversion_job_duration_seconds = Histogram(
     'Duração de jobs de conversão em segundos'
 )
 
+# Cache de resultados de conversão
+conversion_cache_total = Counter(
+    'conversion_cache_total',
+    'Consultas ao cache de resultados de conversão',
+    ['result']  # hit, miss
+)
+
 # Erros
 errors_total = Counter(
     'errors_total',
@@ -157,6 +164,16 @@ def record_job_failed():
     conversion_jobs_total.labels(status="failed").inc()
 
 
+def record_cache_hit():
+    """Registra job atendido pelo cache de resultados."""
+    conversion_cache_total.labels(result="hit").inc()
+
+
+def record_cache_miss():
+    """Registra job sem resultado em cache."""
+    conversion_cache_total.labels(result="miss").inc()
+
+
 def update_health_metrics(healthy: bool, redis_ok: bool, disk_percent: float):
     """Atualiza métricas de health check."""
     health_check_status.set(1 if healthy else 0)
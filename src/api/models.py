@@ -30,6 +30,12 @@ class OutputFormat(str, Enum):
     MARKDOWN = "md"
     JSON = "json"
     HTML = "html"
+    SEARCH = "search"
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    FAST = "fast"
 
 
 class ConversionRequest(BaseModel):
@@ -41,7 +47,9 @@ class ConversionRequest(BaseModel):
     chunk_size: Optional[int] = Field(default=None, description="Tamanho do chunk para processamento", ge=100, le=100000)
     chunk_overlap: Optional[int] = Field(default=None, description="Sobreposição entre chunks", ge=0, le=1000)
     model_name: str = Field(default="gpt-3.5-turbo", description="Modelo LLM para análise de tokens", min_length=1, max_length=100)
+    max_tokens: Optional[int] = Field(default=None, description="Orçamento de tokens do LLMs.txt (seções são removidas ou truncadas por prioridade até caber)", ge=1)
     to_langchain: bool = Field(default=False, description="Exportar para formato LangChain (não implementado ainda)")
+    stream: bool = Field(default=False, description="Publicar páginas em /convert/{job_id}/stream à medida que são convertidas")
 
     @field_validator('ocr_language')
     @classmethod
@@ -85,6 +93,13 @@ class ConversionResult(BaseModel):
     processing_time: float = Field(..., description="Tempo de processamento em segundos")
 
 
+class JobProgressResponse(BaseModel):
+    job_id: str
+    status: str
+    progress: Optional[float] = None
+    error: Optional[str] = None
+
+
 class StatusResponse(BaseModel):
     job_id: str
     status: str
@@ -96,6 +111,7 @@ class StatusResponse(BaseModel):
 class TokenAnalysisRequest(BaseModel):
     content: str = Field(..., description="Conteúdo a ser analisado", min_length=1, max_length=10_000_000)
     model_name: str = Field(default="gpt-3.5-turbo", description="Modelo LLM para análise de tokens", min_length=1, max_length=100)
+    count_mode: CountMode = Field(default=CountMode.EXACT, description="Contagem exata ou estimativa rápida por amostragem")
 
     @field_validator('content')
     @classmethod
@@ -112,3 +128,6 @@ class TokenAnalysisResponse(BaseModel):
     recommendations: Optional[List[str]] = Field(default=None, description="Recomendações")
     content_type: Optional[str] = Field(default=None, description="Tipo de conteúdo detectado")
     chunking_recommendation: Optional[Dict[str, Any]] = Field(default=None, description="Recomendação de chunking")
+    model_fit: Optional[Dict[str, Dict[str, Any]]] = Field(default=None, description="Contagem de tokens (exata ou aproximada, ver 'exact') e limite por modelo")
+    estimated: bool = Field(default=False, description="Indica se as contagens são estimativas (modo fast)")
+    error_bound: Optional[int] = Field(default=None, description="Erro máximo estimado (~95%) de total_tokens no modo fast")
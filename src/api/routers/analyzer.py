@@ -3,7 +3,7 @@ Rotas para análise de tokens.
 """
 
 from fastapi import APIRouter, HTTPException, Depends
-from src.api.models import TokenAnalysisRequest, TokenAnalysisResponse
+from src.api.models import TokenAnalysisRequest, TokenAnalysisResponse, CountMode
 from src.api.services.analyzer_service import analyze_token_usage
 from src.utils.logging_config import setup_logger
 from src.api.dependencies import verify_api_key, rate_limiter
@@ -11,6 +11,24 @@ from src.api.dependencies import verify_api_key, rate_limiter
 # Configurar logger
 logger = setup_logger(__name__)
 
+# Limite de conteúdo para contagem exata; o modo fast aceita até o limite do modelo (10MB)
+MAX_EXACT_CONTENT_SIZE = 1 * 1024 * 1024
+
+
+def validate_content_size(request: TokenAnalysisRequest) -> None:
+    """
+    Valida o tamanho do conteúdo para o modo de contagem solicitado.
+
+    Raises:
+        HTTPException: Se o conteúdo exceder o limite da contagem exata
+    """
+    if request.count_mode == CountMode.EXACT and len(request.content) > MAX_EXACT_CONTENT_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail="Tamanho máximo de conteúdo excedido (1MB). Use count_mode 'fast' para conteúdos maiores"
+        )
+
+
 router = APIRouter(
     prefix="/analyzer",
     tags=["analyzer"],
@@ -25,19 +43,16 @@ async def analyze_tokens(request: TokenAnalysisRequest):
     
     - **content**: Texto a ser analisado
     - **model_name**: Nome do modelo para contagem de tokens
+    - **count_mode**: "exact" (padrão) ou "fast" (estimativa com error_bound)
     """
     if not request.content:
         raise HTTPException(status_code=400, detail="Conteúdo não fornecido")
     
-    # Limitar tamanho do conteúdo (max 1MB)
-    if len(request.content) > 1 * 1024 * 1024:
-        raise HTTPException(
-            status_code=400,
-            detail="Tamanho máximo de conteúdo excedido (1MB)"
-        )
+    # Limitar tamanho do conteúdo (max 1MB no modo exato)
+    validate_content_size(request)
     
     # Processar análise
-    result = await analyze_token_usage(request.content, request.model_name)
+    result = await analyze_token_usage(request.content, request.model_name, request.count_mode.value)
     
     return TokenAnalysisResponse(**result)
 
@@ -49,26 +64,25 @@ async def detect_content_type(request: TokenAnalysisRequest):
     
     - **content**: Texto a ser analisado
     - **model_name**: Nome do modelo para contagem de tokens (opcional)
+    - **count_mode**: "exact" (padrão) ou "fast" (estimativa com error_bound)
     """
     if not request.content:
         raise HTTPException(status_code=400, detail="Conteúdo não fornecido")
     
-    # Limitar tamanho do conteúdo (max 1MB)
-    if len(request.content) > 1 * 1024 * 1024:
-        raise HTTPException(
-            status_code=400,
-            detail="Tamanho máximo de conteúdo excedido (1MB)"
-        )
+    # Limitar tamanho do conteúdo (max 1MB no modo exato)
+    validate_content_size(request)
     
     # Processar análise
-    result = await analyze_token_usage(request.content, request.model_name)
+    result = await analyze_token_usage(request.content, request.model_name, request.count_mode.value)
     
     # Extrair tipo de conteúdo e recomendações de chunking
     response = {
         "content_type": result.get("content_type"),
         "chunking_recommendation": result.get("chunking_recommendation"),
         "total_tokens": result.get("total_tokens"),
-        "model_name": result.get("model_name")
+        "model_name": result.get("model_name"),
+        "estimated": result.get("estimated", False),
+        "error_bound": result.get("error_bound")
     }
     
     return response
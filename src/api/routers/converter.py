@@ -2,16 +2,22 @@
 Rotas para conversão de documentos.
 """
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request, Depends, Header, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+import asyncio
 import json
 from urllib.parse import urlparse
-from src.api.models import ConversionRequest, ConversionResponse, StatusResponse
-from src.api.services.conversion_service import create_conversion_job, get_job_status, get_job_details
+from src.api.models import ConversionRequest, ConversionResponse, ConversionResult, StatusResponse, JobProgressResponse
+from src.api.services.conversion_service import (
+    create_conversion_job, get_job_status, get_job_progress, get_job_result, get_job_details, get_job_format,
+    is_streaming_job, stream_job_pages, stream_job_events, watch_job_events, iter_job_tables, build_job_structure,
+    search_job,
+    save_upload_stream, receive_multipart_upload, iter_local_file, UploadTooLargeError
+)
 from src.utils.logging_config import setup_logger
 from src.api.dependencies import verify_api_key, rate_limiter
 from src.api.services.url_fetcher import fetch_and_save_url
-from src.config import MAX_FILE_SIZE, SUPPORTED_FORMATS
+from src.config import SUPPORTED_FORMATS, TABLE_BATCH_ROWS
 import os
 
 # Configurar logger
@@ -65,79 +71,131 @@ def validate_url(url: str) -> None:
             detail="URLs para localhost ou IPs privadas não são permitidas"
         )
 
-@router.post("/", response_model=ConversionResponse)
-async def convert_document(
-    file: UploadFile = File(None),
-    url: str = Form(None),
-    params: str = Form(default="{}")
-):
+def validate_file_extension(filename: str) -> None:
+    """
+    Valida se a extensão do arquivo está entre os formatos suportados.
+
+    Raises:
+        HTTPException: Se o formato não for suportado
+    """
+    file_ext = filename.split('.')[-1].lower()
+
+    if file_ext not in SUPPORTED_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Formato de arquivo não suportado. Formatos suportados: {', '.join(SUPPORTED_FORMATS)}"
+        )
+
+
+@router.post(
+    "/",
+    response_model=ConversionResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {
+                            "file": {"type": "string", "format": "binary"},
+                            "url": {"type": "string"},
+                            "params": {"type": "string", "default": "{}"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+)
+async def convert_document(request: Request):
     """
     Converte um documento para o formato LLMs.txt e outros formatos solicitados.
     
     - **file**: Arquivo a ser convertido (PDF, DOCX, HTML, etc.)
     - **url**: URL do documento a ser convertido
     - **params**: Parâmetros de conversão em formato JSON
+
+    O arquivo é gravado em disco direto do stream da requisição; uploads
+    acima de MAX_FILE_SIZE são interrompidos com 413 assim que o limite é
+    ultrapassado, mesmo sem Content-Length.
     """
-    # Deve enviar arquivo ou URL, não ambos
-    if not file and not url:
-        raise HTTPException(status_code=400, detail="Você deve fornecer um arquivo ou uma URL")
-    if file and url:
-        raise HTTPException(status_code=400, detail="Envie apenas um arquivo ou uma URL, não ambos")
+    content_type = request.headers.get("content-type", "")
+    upload = None
+    temp_path = None
+    try:
+        # Ler o formulário; o arquivo é gravado em UPLOAD_DIR bloco a bloco
+        try:
+            if content_type.startswith("multipart/form-data"):
+                fields, upload = await receive_multipart_upload(
+                    content_type, request.stream(), validate_file_extension
+                )
+            else:
+                form = await request.form()
+                fields = {key: value for key, value in form.items() if isinstance(value, str)}
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        url = fields.get("url")
+        params = fields.get("params") or "{}"
+
+        # Deve enviar arquivo ou URL, não ambos
+        if not upload and not url:
+            raise HTTPException(status_code=400, detail="Você deve fornecer um arquivo ou uma URL")
+        if upload and url:
+            raise HTTPException(status_code=400, detail="Envie apenas um arquivo ou uma URL, não ambos")
 
-    # Obter conteúdo e nome do arquivo
-    if url:
         # Validar URL antes de processar
-        validate_url(url)
+        if url:
+            validate_url(url)
 
-        temp_path = None
+        # Processar parâmetros
         try:
-            temp_path = await fetch_and_save_url(url)
-            file_content = open(temp_path, 'rb').read()
-            filename = os.path.basename(temp_path)
+            # Parse dos parâmetros JSON
+            params_dict = json.loads(params)
+            params_obj = ConversionRequest(**params_dict)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="Parâmetros JSON inválidos")
         except Exception as e:
-            raise HTTPException(status_code=400, detail=f"Falha ao obter URL: {str(e)}")
-        finally:
-            # Limpar arquivo temporário
-            if temp_path and os.path.exists(temp_path):
-                try:
-                    os.unlink(temp_path)
-                except Exception as e:
-                    logger.warning(f"Não foi possível deletar arquivo temporário {temp_path}: {str(e)}")
-    else:
-        if not file.filename:
-            raise HTTPException(status_code=400, detail="Arquivo não fornecido")
-        file_content = await file.read()
-        filename = file.filename
-    
-    # Verificar extensão do arquivo
-    file_ext = filename.split('.')[-1].lower()
+            raise HTTPException(status_code=400, detail=f"Erro nos parâmetros: {str(e)}")
 
-    if file_ext not in SUPPORTED_FORMATS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Formato de arquivo não suportado. Formatos suportados: {', '.join(SUPPORTED_FORMATS)}"
-        )
+        if url:
+            try:
+                temp_path = await fetch_and_save_url(url)
+            except Exception as e:
+                raise HTTPException(status_code=400, detail=f"Falha ao obter URL: {str(e)}")
+            filename = os.path.basename(temp_path)
+
+            # Verificar extensão do arquivo antes de gravar
+            validate_file_extension(filename)
+
+            try:
+                file_path, content_hash = await save_upload_stream(iter_local_file(temp_path))
+            except UploadTooLargeError as e:
+                raise HTTPException(status_code=413, detail=str(e))
+        else:
+            filename, file_path, content_hash = upload
+    except BaseException:
+        # Arquivo já gravado não será usado por nenhum job
+        if upload and os.path.exists(upload[1]):
+            os.unlink(upload[1])
+        raise
+    finally:
+        # Limpar arquivo temporário
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.unlink(temp_path)
+            except Exception as e:
+                logger.warning(f"Não foi possível deletar arquivo temporário {temp_path}: {str(e)}")
 
-    # Verificar tamanho do arquivo
-    if len(file_content) > MAX_FILE_SIZE:
-        max_mb = MAX_FILE_SIZE / (1024 * 1024)
-        raise HTTPException(
-            status_code=400,
-            detail=f"Tamanho máximo de arquivo excedido ({max_mb:.0f}MB)"
-        )
-    
-    # Processar parâmetros
-    try:
-        # Parse dos parâmetros JSON
-        params_dict = json.loads(params)
-        params_obj = ConversionRequest(**params_dict)
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Parâmetros JSON inválidos")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro nos parâmetros: {str(e)}")
-    
     # Criar job de conversão
-    job_id = await create_conversion_job(file_content, filename, params_obj)
+    try:
+        job_id = await create_conversion_job(file_path, filename, params_obj, content_hash)
+    except Exception:
+        if os.path.exists(file_path):
+            os.unlink(file_path)
+        raise
     
     return ConversionResponse(job_id=job_id, status="processing")
 
@@ -165,6 +223,208 @@ async def get_conversion_status(job_id: str):
     return response
 
 
+@router.get("/{job_id}/status", response_model=JobProgressResponse)
+async def get_conversion_progress(job_id: str):
+    """
+    Obtém apenas status, progresso e erro de um job, sem carregar o resultado.
+
+    Rota recomendada para polling; o resultado fica em `/convert/{job_id}/result`.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    """
+    status, progress, error = await get_job_progress(job_id)
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    return JobProgressResponse(job_id=job_id, status=status, progress=progress, error=error)
+
+
+@router.get("/{job_id}/result", response_model=ConversionResult)
+async def get_conversion_result(job_id: str):
+    """
+    Obtém o resultado completo de um job concluído.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    """
+    status, result = await get_job_result(job_id)
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Resultado não disponível para este job (status: {status})")
+
+    return result
+
+
+@router.get("/{job_id}/events")
+async def stream_conversion_events(job_id: str):
+    """
+    Envia o progresso do job via Server-Sent Events, sem necessidade de polling.
+
+    O primeiro evento `progress` é o estado atual do job; os seguintes chegam à
+    medida que o job avança. O evento `end` indica o status final.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    """
+    status, _, _ = await get_job_progress(job_id)
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+
+    return StreamingResponse(
+        stream_job_events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/{job_id}/ws")
+async def websocket_conversion_events(websocket: WebSocket, job_id: str):
+    """
+    Envia o progresso do job via WebSocket, com as mesmas mensagens de `/events`.
+
+    A conexão é encerrada pelo servidor após o status final do job.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    """
+    status, _, _ = await get_job_progress(job_id)
+    if status == "not_found":
+        await websocket.close(code=4404, reason="Job não encontrado")
+        return
+
+    await websocket.accept()
+    try:
+        async for event in watch_job_events(job_id):
+            if event is not None:
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.debug(f"Cliente desconectou dos eventos do job {job_id}")
+
+
+@router.get("/{job_id}/stream")
+async def stream_conversion_pages(job_id: str, last_event_id: str = Header(None)):
+    """
+    Envia as páginas do documento via Server-Sent Events à medida que são convertidas.
+
+    Disponível para jobs criados com `"stream": true`. Cada evento `page` traz
+    `{"page": n, "content": "..."}`; o evento `end` indica o status final do job,
+    cujo resultado completo continua disponível em `/convert/{job_id}`.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    """
+    streaming = await is_streaming_job(job_id)
+
+    if streaming is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if not streaming:
+        raise HTTPException(status_code=400, detail="Streaming não habilitado para este job")
+
+    # Retomar após o último evento recebido pelo cliente
+    start = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+
+    return StreamingResponse(
+        stream_job_pages(job_id, start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{job_id}/result/{fmt}")
+async def get_conversion_format(job_id: str, fmt: str):
+    """
+    Obtém um único formato do resultado, lido sob demanda do armazenamento.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    - **fmt**: Formato desejado (llms, md, json, html, search)
+    """
+    status, content = await get_job_format(job_id, fmt)
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Formato '{fmt}' não disponível para este job (status: {status})")
+
+    media_type = "application/json" if fmt in ("json", "search") else "text/plain; charset=utf-8"
+    return Response(content=content, media_type=media_type)
+
+
+@router.get("/{job_id}/tables")
+async def stream_conversion_tables(job_id: str, batch_rows: int = Query(TABLE_BATCH_ROWS, ge=1)):
+    """
+    Envia as tabelas do documento em NDJSON, um lote de linhas por linha.
+
+    Cada linha traz `{"indice", "pagina", "inicio", "cabecalhos", "linhas"}`;
+    tabelas maiores que `batch_rows` chegam em vários lotes consecutivos.
+    Requer o formato `json` no resultado do job.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    - **batch_rows**: Linhas por lote
+    """
+    status, content = await get_job_format(job_id, "json")
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Formato 'json' necessário para extrair tabelas não disponível (status: {status})")
+
+    return StreamingResponse(iter_job_tables(content, batch_rows), media_type="application/x-ndjson")
+
+
+@router.get("/{job_id}/structure")
+async def get_conversion_structure(job_id: str, flat: bool = False):
+    """
+    Obtém a estrutura hierárquica do documento (doc.body e descendentes).
+
+    Com `flat=true`, a árvore vem em listas paralelas
+    (`{"pais", "tipos", "categorias", "textos", "paginas"}`), menores que os
+    dicionários aninhados e sem limite de profundidade na serialização.
+    Requer o formato `json` no resultado do job.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    - **flat**: Retornar a árvore no formato plano
+    """
+    status, content = await get_job_format(job_id, "json")
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Formato 'json' necessário para extrair a estrutura não disponível (status: {status})")
+
+    estrutura = await asyncio.to_thread(build_job_structure, content, flat)
+    return JSONResponse(content=estrutura)
+
+
+@router.get("/{job_id}/search")
+async def search_conversion(job_id: str, q: str = Query(..., min_length=1), match_all: bool = True):
+    """
+    Busca texto no documento convertido, com página, bbox e offsets.
+
+    Aceita vários termos e frases entre aspas; termos são comparados sem
+    maiúsculas e sem acentos.
+
+    Requer `search` ou `json` em `output_formats` na conversão: com `search`
+    o índice gravado é carregado direto; só com `json` ele é montado na
+    primeira busca. Jobs sem nenhum dos dois respondem 404.
+
+    - **job_id**: ID do job retornado pela rota de conversão
+    - **q**: Termos e frases ("entre aspas")
+    - **match_all**: Exigir todos os termos/frases no mesmo elemento
+    """
+    status, results = await search_job(job_id, q, match_all)
+
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if results is None:
+        detail = f"Índice de busca não disponível para este job (status: {status})"
+        if status == "completed":
+            detail += ". Converta com 'search' (ou 'json') em output_formats para habilitar a busca"
+        raise HTTPException(status_code=404, detail=detail)
+
+    return {"query": q, "total": len(results), "results": results}
+
+
 @router.get("/{job_id}/details")
 async def get_job_details_route(job_id: str):
     """
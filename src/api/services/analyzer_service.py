@@ -2,60 +2,68 @@
 Serviço de análise de tokens para a API REST.
 """
 
-import re
 from typing import Dict, List, Any, Optional
 from src.tools.token_analyzer import TokenAnalyzer
-from src.tools.token_counter import count_tokens
+from src.tools.token_counter import count_tokens, estimate_tokens
+from src.tools.section_index import SectionIndex
 from src.utils.logging_config import setup_logger
 
 # Configurar logger
 logger = setup_logger(__name__)
 
 
-async def analyze_token_usage(content: str, model_name: str = "gpt-3.5-turbo") -> Dict[str, Any]:
+async def analyze_token_usage(content: str, model_name: str = "gpt-3.5-turbo", count_mode: str = "exact") -> Dict[str, Any]:
     """
     Analisa o uso de tokens em um texto.
     
     Args:
         content: Texto a ser analisado
         model_name: Nome do modelo para contagem de tokens
+        count_mode: "exact" (BPE completo) ou "fast" (estimativa por amostragem,
+            com erro reportado em error_bound)
         
     Returns:
         dict: Resultado da análise de tokens
     """
+    fast = count_mode == "fast"
     try:
         # Inicializar analisador
         analyzer = TokenAnalyzer(model_name)
         
-        # Contar tokens totais
-        total_tokens = count_tokens(content, model_name)
-        
-        # Inicializar resultado
-        result = {
-            "total_tokens": total_tokens,
-            "model_name": model_name
-        }
+        # Inicializar resultado com o total de tokens
+        if fast:
+            estimate = estimate_tokens(content, model_name)
+            result = {
+                "total_tokens": estimate["tokens"],
+                "model_name": model_name,
+                "estimated": not estimate["exact"],
+                "error_bound": estimate["error_bound"]
+            }
+        else:
+            result = {
+                "total_tokens": count_tokens(content, model_name),
+                "model_name": model_name
+            }
         
         # Para conteúdo no formato LLMs.txt, fazer análise por seção
         if content.startswith("# "):
-            # Extrair seções
-            sections = re.split(r'(^# .+)', content, flags=re.MULTILINE)
-            section_map = {}
-            current = None
-            for part in sections:
-                if part.strip().startswith('# '):
-                    current = part.strip()
-                    section_map[current] = ''
-                elif current:
-                    section_map[current] += part
+            # Indexar seções (intervalos sobre o texto, sem cópias)
+            section_map = SectionIndex(content)
             
             if section_map:
                 # Contar tokens por seção
-                section_tokens = {sec: count_tokens(txt, model_name) for sec, txt in section_map.items()}
+                if fast:
+                    section_tokens = {sec: estimate_tokens(txt, model_name)["tokens"] for sec, txt in section_map.items()}
+                else:
+                    section_tokens = section_map.count_tokens(model_name)
                 result["sections"] = section_tokens
                 
-                # Analisar distribuição e fazer recomendações
-                analysis = analyzer.analyze_sections(section_tokens)
+                # Analisar distribuição e fazer recomendações (contagem exata por modelo
+                # apenas no modo exato)
+                model_fit = None if fast else analyzer.model_fit(
+                    content, known_counts={model_name: result["total_tokens"]}
+                )
+                analysis = analyzer.analyze_sections(section_tokens, model_fit=model_fit)
                 
                 # Detectar tipo de conteúdo
                 content_sample = analyzer._extract_content_sample(content, section_map)
@@ -75,6 +83,15 @@ async def analyze_token_usage(content: str, model_name: str = "gpt-3.5-turbo") -
     except Exception as e:
         logger.error(f"Erro na análise de tokens: {str(e)}")
         # Retornar contagem básica em caso de erro
+        if fast:
+            estimate = estimate_tokens(content, model_name)
+            return {
+                "total_tokens": estimate["tokens"],
+                "model_name": model_name,
+                "estimated": not estimate["exact"],
+                "error_bound": estimate["error_bound"],
+                "error": str(e)
+            }
         return {
             "total_tokens": count_tokens(content, model_name),
             "model_name": model_name,
@@ -6,17 +6,39 @@ import os
 import asyncio
 import uuid
 import time
-import re
 import json
-from typing import Dict, List, Any, Optional, Tuple
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple, AsyncIterator
 import aiofiles
+from python_multipart.multipart import MultipartParser, parse_options_header
+from docling_core.types.doc import DoclingDocument
 from src.tools.document_converter import DocumentConverterTool
 from src.tools.token_analyzer import TokenAnalyzer
 from src.tools.token_counter import count_tokens
+from src.tools.section_index import SectionIndex
+from src.tools.table_engine import iterar_ndjson, iterar_tabelas
+from src.tools.document_tree import estrutura_aninhada, estrutura_plana
+from src.tools.search_index import SearchIndex
 from src.api.models import ConversionRequest, ConversionResult
 from src.utils.logging_config import setup_logger
-from src.config import REDIS_URL, UPLOAD_DIR, JOB_TTL_PROCESSING, JOB_TTL_COMPLETED, JOB_TTL_FAILED
-from src.api.metrics import record_job_created, record_job_completed, record_job_failed
+from src.config import (
+    REDIS_URL, UPLOAD_DIR, JOB_TTL_PROCESSING, JOB_TTL_COMPLETED, JOB_TTL_FAILED,
+    JOB_EXECUTION_MODE, RESULT_CACHE_ENABLED, MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE,
+    STREAM_POLL_INTERVAL, EVENTS_KEEPALIVE_INTERVAL, TABLE_BATCH_ROWS, SEARCH_INDEX_CACHE_SIZE
+)
+from src.worker.queue import enqueue_job
+from src.api.services import result_cache
+from src.api.services.page_stream import PageStreamWriter, pages_key, read_pages
+from src.api.services.result_store import get_result_store, expired_keys
+from src.api.services.job_progress import (
+    JobProgressRecorder, JobProgressWriter, EVENT_FIELDS, TERMINAL_STATUSES, events_channel
+)
+from src.api.metrics import (
+    record_job_created, record_job_completed, record_job_failed,
+    record_cache_hit, record_cache_miss
+)
 from redis.asyncio import Redis
 
 # Configurar logger
@@ -28,153 +50,433 @@ redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
 # Criar diretório de uploads
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Índices de busca já carregados, por job (LRU; resultados de um job não mudam)
+_search_indexes: "OrderedDict[str, SearchIndex]" = OrderedDict()
 
-async def save_upload_file(file_content: bytes, filename: str) -> str:
-    """Salva o arquivo enviado pelo usuário no diretório temporário."""
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    async with aiofiles.open(file_path, 'wb') as f:
-        await f.write(file_content)
-    
-    return file_path
+
+class UploadTooLargeError(ValueError):
+    """Arquivo enviado excede MAX_FILE_SIZE."""
+
+
+# Limite para campos de formulário que não são arquivo (url, params)
+MAX_FORM_FIELD_SIZE = 64 * 1024
+
+
+async def iter_local_file(path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Lê um arquivo local em blocos de tamanho fixo."""
+    async with aiofiles.open(path, 'rb') as f:
+        while True:
+            chunk = await f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _UploadWriter:
+    """
+    Grava um upload em UPLOAD_DIR calculando o SHA-256 e aplicando MAX_FILE_SIZE
+    a cada bloco recebido.
+    """
+
+    def __init__(self):
+        self.file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4()}.part")
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._file = None
+
+    async def open(self):
+        self._file = await aiofiles.open(self.file_path, 'wb')
+
+    async def write(self, chunk: bytes):
+        self._size += len(chunk)
+        if self._size > MAX_FILE_SIZE:
+            max_mb = MAX_FILE_SIZE / (1024 * 1024)
+            raise UploadTooLargeError(f"Tamanho máximo de arquivo excedido ({max_mb:.0f}MB)")
+        self._digest.update(chunk)
+        await self._file.write(chunk)
+
+    async def close(self) -> str:
+        """Fecha o arquivo e retorna o SHA-256 (hex) do conteúdo."""
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        return self._digest.hexdigest()
+
+    async def discard(self):
+        """Fecha e remove o arquivo parcial."""
+        try:
+            await self.close()
+        finally:
+            try:
+                os.remove(self.file_path)
+            except OSError:
+                pass
+
+
+async def save_upload_stream(chunks: AsyncIterator[bytes]) -> Tuple[str, str]:
+    """
+    Grava um upload em UPLOAD_DIR bloco a bloco, calculando o SHA-256 no caminho.
+
+    Nunca mantém o arquivo inteiro em memória e interrompe a gravação assim
+    que MAX_FILE_SIZE é ultrapassado.
+
+    Args:
+        chunks: Blocos do conteúdo do arquivo
+
+    Returns:
+        file_path: Caminho do arquivo temporário gravado
+        content_hash: SHA-256 (hex) do conteúdo
+
+    Raises:
+        UploadTooLargeError: Se o conteúdo exceder MAX_FILE_SIZE
+    """
+    writer = _UploadWriter()
+    try:
+        await writer.open()
+        async for chunk in chunks:
+            await writer.write(chunk)
+        content_hash = await writer.close()
+    except BaseException:
+        # Não deixar arquivos parciais no diretório de uploads
+        await writer.discard()
+        raise
+
+    return writer.file_path, content_hash
+
+
+async def receive_multipart_upload(
+    content_type: str,
+    body: AsyncIterator[bytes],
+    validate_filename: Optional[Callable[[str], None]] = None
+) -> Tuple[Dict[str, str], Optional[Tuple[str, str, str]]]:
+    """
+    Lê um corpo multipart/form-data à medida que chega, gravando o arquivo em disco.
+
+    Diferente do UploadFile do Starlette, que só chega ao handler depois de
+    o corpo inteiro ser copiado para um arquivo temporário, aqui o arquivo é
+    gravado em UPLOAD_DIR direto do stream da requisição e MAX_FILE_SIZE é
+    verificado a cada bloco: uploads grandes são interrompidos sem ler o resto.
+
+    Args:
+        content_type: Cabeçalho Content-Type da requisição (com o boundary)
+        body: Blocos do corpo da requisição (ex: request.stream())
+        validate_filename: Chamado com o nome do arquivo antes de gravá-lo
+
+    Returns:
+        fields: Campos de formulário que não são arquivo
+        upload: (filename, file_path, content_hash) ou None se não houver arquivo
+
+    Raises:
+        UploadTooLargeError: Se o arquivo exceder MAX_FILE_SIZE
+        ValueError: Se o corpo multipart for inválido
+    """
+    _, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if not boundary:
+        raise ValueError("Boundary do multipart não informado")
+
+    # O parser é síncrono: os callbacks acumulam eventos, processados após cada bloco
+    events = []
+    header = {"field": b"", "value": b""}
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        events.append(("header", bytes(header["field"]).lower(), bytes(header["value"])))
+        header["field"], header["value"] = b"", b""
+
+    parser = MultipartParser(boundary, callbacks={
+        "on_part_begin": lambda: events.append(("begin",)),
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": lambda: events.append(("headers",)),
+        "on_part_data": lambda data, start, end: events.append(("data", bytes(data[start:end]))),
+        "on_part_end": lambda: events.append(("end",)),
+    })
+
+    fields: Dict[str, str] = {}
+    upload = None
+    writer = None
+    part = {}
+
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+            for event in events:
+                kind = event[0]
+                if kind == "begin":
+                    part = {"disposition": b"", "data": bytearray()}
+                elif kind == "header":
+                    if event[1] == b"content-disposition":
+                        part["disposition"] = event[2]
+                elif kind == "headers":
+                    _, disposition = parse_options_header(part["disposition"])
+                    part["name"] = disposition.get(b"name", b"").decode("utf-8", "replace")
+                    if b"filename" in disposition:
+                        if writer is not None or upload is not None:
+                            raise ValueError("Envie apenas um arquivo por requisição")
+                        # Descartar diretórios enviados pelo cliente
+                        filename = os.path.basename(disposition[b"filename"].decode("utf-8", "replace"))
+                        if not filename:
+                            raise ValueError("Arquivo não fornecido")
+                        if validate_filename:
+                            validate_filename(filename)
+                        part["filename"] = filename
+                        writer = _UploadWriter()
+                        await writer.open()
+                elif kind == "data":
+                    if "filename" in part:
+                        await writer.write(event[1])
+                    else:
+                        part["data"] += event[1]
+                        if len(part["data"]) > MAX_FORM_FIELD_SIZE:
+                            raise ValueError(f"Campo de formulário muito grande: {part['name']}")
+                elif kind == "end":
+                    if "filename" in part:
+                        content_hash = await writer.close()
+                        upload = (part["filename"], writer.file_path, content_hash)
+                        writer = None
+                    else:
+                        fields[part["name"]] = part["data"].decode("utf-8", "replace")
+            events.clear()
+        parser.finalize()
+    except BaseException:
+        # Não deixar arquivos parciais (ou já concluídos) no diretório de uploads
+        if writer is not None:
+            await writer.discard()
+        if upload is not None:
+            try:
+                os.remove(upload[1])
+            except OSError:
+                pass
+        raise
+
+    if writer is not None:
+        # Corpo terminou no meio do arquivo
+        await writer.discard()
+        raise ValueError("Corpo multipart incompleto")
+
+    return fields, upload
+
+
+def run_conversion_pipeline(file_path: str, params_data: Dict[str, Any], job_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Executa a parte CPU-bound da conversão: Docling, formatação e análise de tokens.
+
+    É uma função síncrona de nível de módulo para poder rodar tanto em uma thread
+    da API (modo inline) quanto em um processo do pool do worker. Recebe e
+    retorna apenas dados serializáveis.
+
+    Args:
+        file_path: Caminho do arquivo a ser convertido
+        params_data: Parâmetros de conversão (ConversionRequest serializado)
+        job_id: ID do job, usado para publicar o progresso e as páginas (modo streaming)
+
+    Returns:
+        dict: Resultado da conversão e campos extras a gravar no job
+    """
+    params = ConversionRequest(**params_data)
+
+    # Publicar páginas à medida que são convertidas (modo streaming)
+    page_writer = PageStreamWriter(job_id) if params.stream and job_id else None
+    # Progresso das etapas, agrupado pelo debounce; o estado final é gravado por process_document
+    progress = JobProgressWriter(job_id) if job_id else None
+    try:
+        return _executar_pipeline(params, file_path, page_writer, progress)
+    finally:
+        if page_writer:
+            page_writer.close()
+        if progress:
+            progress.close()
+
+
+def _executar_pipeline(params: ConversionRequest, file_path: str, page_writer, progress) -> Dict[str, Any]:
+    """Etapas de run_conversion_pipeline, informando o progresso de cada uma."""
+    def atualizar(fields):
+        if progress:
+            progress.update(fields)
+
+    def progresso_conversao(fracao):
+        # Conversão ocupa a faixa de 0.2 a 0.7 do progresso
+        atualizar({
+            "progress": f"{0.2 + 0.5 * fracao:.2f}",
+            "status_message": f"Convertendo documento ({fracao:.0%} das páginas)"
+        })
+
+    # Inicializar conversor
+    converter = DocumentConverterTool(
+        chunk_size=params.chunk_size,
+        chunk_overlap=params.chunk_overlap
+    )
+
+    # Lista de formatos de saída
+    formats = [fmt.value for fmt in params.output_formats]
+
+    # Medir tempo
+    start_time = time.time()
+
+    resultado = converter.run(
+        file_path=file_path,
+        save_output=False,  # Não salvar em arquivo, retornar apenas
+        profile=params.profile.value,
+        ocr_engine=params.ocr_engine.value,
+        ocr_language=params.ocr_language,
+        force_ocr=params.force_ocr,
+        export_formats=formats,
+        callback_paginas=page_writer,
+        modelo_llm=params.model_name,
+        max_tokens=params.max_tokens,
+        callback_progresso=progresso_conversao
+    )
+
+    atualizar({"progress": "0.7", "status_message": "Analisando documento"})
+
+    # Extrair formatos resultantes
+    formats_dict = resultado["formats"]
+
+    # Calcular tempo total
+    elapsed = time.time() - start_time
+
+    # Contagens por seção feitas pelo formatador (evita tokenizar o texto de novo)
+    token_stats = resultado.get("token_stats")
+    if not token_stats or token_stats.get("model") != params.model_name:
+        token_stats = None
+
+    # Contar tokens (apenas para o formato llms)
+    token_count = None
+    if "llms" in formats_dict:
+        if token_stats:
+            token_count = token_stats["total"]
+        else:
+            token_count = count_tokens(formats_dict["llms"], params.model_name)
+        atualizar({"progress": "0.8"})
+
+    # Análise de tokens
+    analysis = None
+    if token_count and params.profile.value == "llms-full":
+        analyzer = TokenAnalyzer(params.model_name)
+        llms_text = formats_dict["llms"]
+        if token_stats:
+            section_tokens = token_stats["sections"]
+        else:
+            # Indexar seções e contar tokens por seção
+            section_tokens = SectionIndex(llms_text).count_tokens(params.model_name)
+
+        # Analisar
+        model_fit = analyzer.model_fit(llms_text, known_counts={params.model_name: token_count})
+        analysis = analyzer.analyze_sections(section_tokens, model_fit=model_fit)
+        atualizar({"progress": "0.9"})
+
+    # Exportação para frameworks (opcional)
+    job_fields = {}
+    if params.to_langchain:
+        atualizar({"status_message": "Exportando para framework LangChain"})
+        try:
+            langchain_docs = converter.exportar_para_langchain(resultado["doc"])
+            if langchain_docs:
+                job_fields["langchain_docs_count"] = len(langchain_docs)
+        except NotImplementedError as e:
+            logger.warning(f"LangChain não implementado: {str(e)}")
+            job_fields["langchain_error"] = "Funcionalidade não implementada"
+            job_fields["langchain_message"] = str(e)
+        except Exception as e:
+            logger.error(f"Erro ao exportar para LangChain: {str(e)}")
+            job_fields["langchain_error"] = str(e)
+        atualizar({"progress": "0.95"})
+
+    return {
+        "formats": formats_dict,
+        "token_count": token_count,
+        "analysis": analysis,
+        "processing_time": elapsed,
+        "job_fields": job_fields
+    }
 
 
 async def process_document(
     job_id: str,
     file_path: str,
-    params: ConversionRequest
+    params: ConversionRequest,
+    executor: Optional[Executor] = None,
+    cache_key: Optional[str] = None
 ) -> None:
     """
-    Processa o documento de forma assíncrona em background.
+    Processa o documento de forma assíncrona, atualizando o job no Redis.
+
+    Args:
+        job_id: ID do job
+        file_path: Caminho do arquivo salvo
+        params: Parâmetros de conversão
+        executor: Executor onde a conversão roda. None usa o pool de threads
+            padrão (modo inline); o worker passa seu pool de processos.
+        cache_key: Chave do cache de resultados a registrar ao concluir
     """
+    progress = JobProgressRecorder(redis_client, job_id)
+    # Chaves auxiliares que acompanham o TTL do job
+    extra_keys = [pages_key(job_id)] if params.stream else []
     try:
-        job_key = f"job:{job_id}"
-        # Atualizar status inicial em Redis
-        await redis_client.hset(job_key, mapping={"status": "processing", "progress": "0.1"})
-        
-        # Inicializar conversor
-        converter = DocumentConverterTool(
-            chunk_size=params.chunk_size,
-            chunk_overlap=params.chunk_overlap
-        )
-        
-        # Lista de formatos de saída
-        formats = [fmt.value for fmt in params.output_formats]
-        
-        # Medir tempo
-        start_time = time.time()
-        
-        # Atualizar progresso
-        await redis_client.hset(job_key, mapping={"progress": "0.2", "status_message": "Inicializando processamento"})
-        
-        # Processar documento (esta parte ainda é síncrona, mas rodará em uma thread separada)
-        # Usamos run_in_executor para não bloquear a thread principal
-        await redis_client.hset(job_key, mapping={"status_message": "Convertendo documento"})
-        resultado = await asyncio.to_thread(
-            converter.run,
-            file_path=file_path,
-            save_output=False,  # Não salvar em arquivo, retornar apenas
-            profile=params.profile.value,
-            ocr_engine=params.ocr_engine.value,
-            ocr_language=params.ocr_language,
-            force_ocr=params.force_ocr,
-            export_formats=formats
+        # Estado inicial gravado em uma única escrita antes da conversão
+        await progress.flush({"status": "processing", "progress": "0.2", "status_message": "Convertendo documento"})
+
+        # Processar documento fora do event loop (thread da API ou processo do worker)
+        loop = asyncio.get_running_loop()
+        result_data = await loop.run_in_executor(
+            executor,
+            run_conversion_pipeline,
+            file_path,
+            params.model_dump(mode="json"),
+            job_id
         )
-        
-        await redis_client.hset(job_key, mapping={"progress": "0.7", "status_message": "Analisando documento"})
-        
-        # Extrair formatos resultantes
-        formats_dict = resultado["formats"]
-        
-        # Calcular tempo total
-        elapsed = time.time() - start_time
-        
-        # Contar tokens (apenas para o formato llms)
-        token_count = None
-        if "llms" in formats_dict:
-            token_count = count_tokens(formats_dict["llms"], params.model_name)
-            await redis_client.hset(job_key, mapping={"progress": "0.8"})
-        
-        # Análise de tokens
-        analysis = None
-        if token_count and params.profile.value == "llms-full":
-            analyzer = TokenAnalyzer(params.model_name)
-            # Extrair seções para análise
-            llms_text = formats_dict["llms"]
-            sections = re.split(r'(^# .+)', llms_text, flags=re.MULTILINE)
-            section_map = {}
-            current = None
-            for part in sections:
-                if part.strip().startswith('# '):
-                    current = part.strip()
-                    section_map[current] = ''
-                elif current:
-                    section_map[current] += part
-            
-            # Contar tokens por seção
-            section_tokens = {sec: count_tokens(txt, params.model_name) for sec, txt in section_map.items()}
-            
-            # Analisar
-            analysis = analyzer.analyze_sections(section_tokens)
-            await redis_client.hset(job_key, mapping={"progress": "0.9"})
-        
-        # Exportação para frameworks (opcional)
-        if params.to_langchain:
-            await redis_client.hset(job_key, mapping={"status_message": "Exportando para framework LangChain"})
-            doc = resultado["doc"]
 
-            try:
-                langchain_docs = converter.exportar_para_langchain(doc)
-                if langchain_docs:
-                    await redis_client.hset(job_key, mapping={"langchain_docs_count": len(langchain_docs)})
-            except NotImplementedError as e:
-                logger.warning(f"LangChain não implementado: {str(e)}")
-                await redis_client.hset(job_key, mapping={
-                    "langchain_error": "Funcionalidade não implementada",
-                    "langchain_message": str(e)
-                })
-            except Exception as e:
-                logger.error(f"Erro ao exportar para LangChain: {str(e)}")
-                await redis_client.hset(job_key, mapping={"langchain_error": str(e)})
+        # Campos extras do job (ex: exportação LangChain)
+        job_fields = result_data.pop("job_fields", None) or {}
 
-            await redis_client.hset(job_key, mapping={"progress": "0.95"})
-        
-        # Criar resultado e persistir em Redis
-        result_data = {
-            "formats": formats_dict,
-            "token_count": token_count,
-            "analysis": analysis,
-            "processing_time": elapsed
-        }
-        await redis_client.hset(job_key, mapping={
+        # Gravar formatos no armazenamento de resultados; o Redis guarda só metadados
+        formats_dict = result_data["formats"]
+        result_key = await asyncio.to_thread(get_result_store().save_formats, job_id, formats_dict)
+
+        # Estado final e novo TTL (para usuário buscar resultado) em uma única transação
+        await progress.flush({
+            **job_fields,
             "status": "completed",
             "progress": "1.0",
             "status_message": "Processamento concluído",
-            "result": json.dumps(result_data)
-        })
-
-        # Estender TTL após conclusão (para usuário buscar resultado)
-        await redis_client.expire(job_key, JOB_TTL_COMPLETED)
+            "result_key": result_key,
+            "result_formats": json.dumps(list(formats_dict)),
+            "token_count": "" if result_data["token_count"] is None else str(result_data["token_count"]),
+            "analysis": json.dumps(result_data["analysis"]),
+            "processing_time": str(result_data["processing_time"])
+        }, ttl=JOB_TTL_COMPLETED, extra_keys=extra_keys)
 
         # Registrar métrica de sucesso
-        record_job_completed(elapsed)
+        record_job_completed(result_data["processing_time"])
+
+        # Disponibilizar resultado para uploads idênticos
+        if cache_key:
+            try:
+                await result_cache.store(redis_client, cache_key, job_id)
+            except Exception as e:
+                logger.warning(f"Falha ao registrar job {job_id} no cache: {str(e)}")
 
         # Limpar arquivo temporário após o processamento
         try:
             os.remove(file_path)
         except Exception as e:
             logger.warning(f"Falha ao remover arquivo temporário {file_path}: {str(e)}")
-        
+
     except Exception as e:
         logger.error(f"Erro no processamento do job {job_id}: {str(e)}")
-        await redis_client.hset(job_key, mapping={"status": "failed", "error": str(e)})
+        # TTL para jobs com erro (para debug)
+        await progress.flush({"status": "failed", "error": str(e)}, ttl=JOB_TTL_FAILED, extra_keys=extra_keys)
 
         # Registrar métrica de falha
         record_job_failed()
 
-        # TTL para jobs com erro (para debug)
-        await redis_client.expire(job_key, JOB_TTL_FAILED)
-        
         # Garantir limpeza mesmo em caso de erro
         try:
             if os.path.exists(file_path):
@@ -184,17 +486,20 @@ async def process_document(
 
 
 async def create_conversion_job(
-    file_content: bytes,
+    file_path: str,
     filename: str,
-    params: ConversionRequest
+    params: ConversionRequest,
+    content_hash: str
 ) -> str:
     """
-    Cria um novo job de conversão e inicia o processamento em background.
+    Cria um novo job de conversão e o enfileira para os workers
+    (ou o processa em background no modo inline).
     
     Args:
-        file_content: Conteúdo do arquivo
+        file_path: Arquivo já gravado em UPLOAD_DIR (ver save_upload_stream)
         filename: Nome do arquivo
         params: Parâmetros de conversão
+        content_hash: SHA-256 do conteúdo do arquivo
         
     Returns:
         job_id: ID do job criado
@@ -203,7 +508,6 @@ async def create_conversion_job(
     job_id = str(uuid.uuid4())
     
     # Persistir metadados iniciais no Redis
-    job_key = f"job:{job_id}"
     job_meta = {
         "status": "created",
         "progress": "0",
@@ -212,24 +516,212 @@ async def create_conversion_job(
         "filename": filename,
         "params": json.dumps(params.model_dump())
     }
-    await redis_client.hset(job_key, mapping=job_meta)
+    # TTL Strategy: Diferente para cada estado do job
+    # TTL inicial (jobs em processamento que travaram), gravado junto com os metadados
+    progress = JobProgressRecorder(redis_client, job_id)
+    await progress.flush(job_meta, ttl=JOB_TTL_PROCESSING)
 
     # Registrar métrica de job criado
     record_job_created()
 
-    # TTL Strategy: Diferente para cada estado do job
-    # TTL inicial (jobs em processamento que travaram)
-    await redis_client.expire(job_key, JOB_TTL_PROCESSING)
+    # Reaproveitar resultado de um upload idêntico já convertido
+    cache_key = None
+    if RESULT_CACHE_ENABLED:
+        cache_key = result_cache.build_cache_key(content_hash, params)
+        try:
+            source_job_id = await result_cache.lookup(redis_client, cache_key)
+        except Exception as e:
+            logger.warning(f"Falha ao consultar cache de resultados: {str(e)}")
+            source_job_id = None
 
-    # Salvar arquivo
-    file_path = await save_upload_file(file_content, f"{job_id}_{filename}")
-    
-    # Iniciar processamento em background
-    asyncio.create_task(process_document(job_id, file_path, params))
+        # Jobs com streaming só reaproveitam origens cujas páginas ainda estão publicadas
+        if source_job_id and params.stream and not await redis_client.exists(pages_key(source_job_id)):
+            source_job_id = None
+
+        if source_job_id:
+            record_cache_hit()
+            await result_cache.touch(redis_client, cache_key, source_job_id)
+            await progress.flush({
+                "status": "completed",
+                "progress": "1.0",
+                "status_message": "Resultado reaproveitado do cache",
+                "result_ref": source_job_id
+            }, ttl=JOB_TTL_COMPLETED)
+            logger.info(f"Job {job_id} atendido pelo cache (origem: {source_job_id})")
+            try:
+                os.remove(file_path)
+            except Exception as e:
+                logger.warning(f"Falha ao remover arquivo temporário {file_path}: {str(e)}")
+            return job_id
+
+        record_cache_miss()
+
+    # Associar o arquivo ao job (rename no mesmo diretório, sem cópia)
+    job_file_path = os.path.join(UPLOAD_DIR, f"{job_id}_{filename}")
+    os.replace(file_path, job_file_path)
+    file_path = job_file_path
+
+    if JOB_EXECUTION_MODE == "inline":
+        # Processar no próprio processo da API (desenvolvimento)
+        asyncio.create_task(process_document(job_id, file_path, params, cache_key=cache_key))
+    else:
+        # Enfileirar para os workers de conversão
+        await enqueue_job(redis_client, job_id, file_path, params, cache_key=cache_key)
     
     return job_id
 
 
+async def _result_source(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Retorna o hash que contém o resultado do job, seguindo result_ref (cache) se houver."""
+    if not job.get("result") and not job.get("result_key") and job.get("result_ref"):
+        return await redis_client.hgetall(f"job:{job['result_ref']}")
+    return job
+
+
+async def _load_result(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Monta o resultado completo do job, lendo todos os formatos do armazenamento.
+
+    Returns:
+        dict no formato de ConversionResult, ou None se não houver resultado
+    """
+    source = await _result_source(job)
+
+    # Jobs gravados antes do armazenamento de resultados
+    if source.get("result"):
+        return json.loads(source["result"])
+
+    if not source.get("result_key"):
+        return None
+
+    store = get_result_store()
+    formats = {}
+    for fmt in json.loads(source.get("result_formats") or "[]"):
+        content = await asyncio.to_thread(store.load_format, source["result_key"], fmt)
+        if content is not None:
+            formats[fmt] = content
+
+    return {
+        "formats": formats,
+        "token_count": int(source["token_count"]) if source.get("token_count") else None,
+        "analysis": json.loads(source["analysis"]) if source.get("analysis") else None,
+        "processing_time": float(source.get("processing_time") or 0.0)
+    }
+
+
+async def get_job_format(job_id: str, fmt: str) -> Tuple[str, Optional[str]]:
+    """
+    Lê um único formato do resultado de um job, sob demanda.
+
+    Args:
+        job_id: ID do job
+        fmt: Formato desejado (llms, md, json, html)
+
+    Returns:
+        status: Status do job ("not_found" se não existir)
+        content: Conteúdo do formato, ou None se indisponível
+    """
+    job = await redis_client.hgetall(f"job:{job_id}")
+    if not job:
+        return "not_found", None
+
+    source = await _result_source(job)
+    if source.get("result"):
+        content = json.loads(source["result"]).get("formats", {}).get(fmt)
+    elif source.get("result_key") and fmt in json.loads(source.get("result_formats") or "[]"):
+        content = await asyncio.to_thread(get_result_store().load_format, source["result_key"], fmt)
+    else:
+        content = None
+
+    if content is not None and not isinstance(content, str):
+        content = json.dumps(content, ensure_ascii=False)
+    return job.get("status"), content
+
+
+def iter_job_tables(content: str, batch_rows: int = TABLE_BATCH_ROWS) -> Iterator[str]:
+    """
+    Gera as tabelas do documento de um job em NDJSON, uma linha por lote.
+
+    O documento é reconstruído a partir do formato json (export_to_dict do
+    Docling) e as tabelas são montadas uma de cada vez. É um gerador
+    síncrono: o StreamingResponse o consome em uma thread, fora do loop de
+    eventos.
+
+    Args:
+        content: Formato json do resultado (ver get_job_format)
+        batch_rows: Linhas por lote
+
+    Yields:
+        str: Linha NDJSON {"indice", "pagina", "inicio", "cabecalhos", "linhas"}
+    """
+    doc = DoclingDocument.model_validate_json(content)
+    yield from iterar_ndjson(iterar_tabelas(doc, batch_rows))
+
+
+def build_job_structure(content: str, flat: bool = False) -> Dict[str, Any]:
+    """
+    Monta a estrutura hierárquica do documento de um job.
+
+    Args:
+        content: Formato json do resultado (ver get_job_format)
+        flat: Se True, listas paralelas com o índice do pai de cada nó
+
+    Returns:
+        dict: Estrutura aninhada ou plana (ver src/tools/document_tree.py)
+    """
+    doc = DoclingDocument.model_validate_json(content)
+    return estrutura_plana(doc) if flat else estrutura_aninhada(doc)
+
+
+def _build_search_index(content: str, from_document: bool) -> SearchIndex:
+    if from_document:
+        return SearchIndex(DoclingDocument.model_validate_json(content))
+    return SearchIndex.from_dict(json.loads(content))
+
+
+async def search_job(job_id: str, query: str, match_all: bool = True) -> Tuple[str, Optional[List[Dict[str, Any]]]]:
+    """
+    Busca texto com posição no documento de um job.
+
+    Usa o formato search do resultado (índice gravado na conversão) ou, na
+    falta dele, monta o índice a partir do formato json. O índice carregado
+    fica em memória para as próximas buscas no mesmo job.
+
+    Args:
+        job_id: ID do job
+        query: Termos e frases ("entre aspas")
+        match_all: Se True, só elementos com todos os termos/frases
+
+    Returns:
+        status: Status do job ("not_found" se não existir)
+        results: Ocorrências (ver SearchIndex.buscar), ou None sem índice nem json
+    """
+    index = _search_indexes.get(job_id)
+    if index is not None:
+        _search_indexes.move_to_end(job_id)
+        job = await redis_client.hgetall(f"job:{job_id}")
+        if not job:
+            _search_indexes.pop(job_id, None)
+            return "not_found", None
+        status = job.get("status")
+    else:
+        status, content = await get_job_format(job_id, "search")
+        from_document = False
+        if content is None and status != "not_found":
+            status, content = await get_job_format(job_id, "json")
+            from_document = True
+        if content is None:
+            return status, None
+
+        index = await asyncio.to_thread(_build_search_index, content, from_document)
+        if SEARCH_INDEX_CACHE_SIZE > 0:
+            _search_indexes[job_id] = index
+            while len(_search_indexes) > SEARCH_INDEX_CACHE_SIZE:
+                _search_indexes.popitem(last=False)
+
+    return status, index.buscar(query, match_all)
+
+
 async def get_job_status(job_id: str) -> Tuple[str, Optional[float], Optional[ConversionResult], Optional[str]]:
     """
     Obtém o status atual de um job.
@@ -252,16 +744,188 @@ async def get_job_status(job_id: str) -> Tuple[str, Optional[float], Optional[Co
     status = job.get("status")
     progress = float(job.get("progress")) if job.get("progress") else None
     error = job.get("error")
-    result = None
-    if job.get("result"):
-        try:
-            result_data = json.loads(job.get("result"))
-            result = ConversionResult(**result_data)
-        except:
-            result = None
+    result = await _build_result(job_id, job) if status == "completed" else None
     return status, progress, result, error
 
 
+async def _build_result(job_id: str, job: Dict[str, Any]) -> Optional[ConversionResult]:
+    try:
+        result_data = await _load_result(job)
+        if result_data:
+            return ConversionResult(**result_data)
+    except Exception as e:
+        logger.warning(f"Falha ao carregar resultado do job {job_id}: {str(e)}")
+    return None
+
+
+async def get_job_progress(job_id: str) -> Tuple[str, Optional[float], Optional[str]]:
+    """
+    Obtém apenas status, progresso e erro de um job, em uma única consulta.
+
+    Destinado ao polling: não lê nem desserializa o resultado.
+
+    Args:
+        job_id: ID do job
+
+    Returns:
+        status: Status do job ("not_found" se não existir)
+        progress: Progresso do processamento (0-1)
+        error: Mensagem de erro se falhou
+    """
+    status, progress, error = await redis_client.hmget(f"job:{job_id}", "status", "progress", "error")
+    if status is None:
+        return "not_found", None, "Job não encontrado"
+    return status, float(progress) if progress else None, error
+
+
+async def get_job_result(job_id: str) -> Tuple[str, Optional[ConversionResult]]:
+    """
+    Obtém o resultado completo de um job concluído.
+
+    Args:
+        job_id: ID do job
+
+    Returns:
+        status: Status do job ("not_found" se não existir)
+        result: Resultado, ou None se o job não estiver concluído
+    """
+    job = await redis_client.hgetall(f"job:{job_id}")
+    if not job:
+        return "not_found", None
+    status = job.get("status")
+    if status != "completed":
+        return status, None
+    return status, await _build_result(job_id, job)
+
+
+async def is_streaming_job(job_id: str) -> Optional[bool]:
+    """
+    Indica se o job foi criado com streaming de páginas.
+
+    Returns:
+        None se o job não existir, senão True/False
+    """
+    params = await redis_client.hget(f"job:{job_id}", "params")
+    if params is None:
+        return None
+    try:
+        return bool(json.loads(params).get("stream"))
+    except (TypeError, ValueError):
+        return False
+
+
+async def stream_job_pages(job_id: str, start: int = 0) -> AsyncIterator[str]:
+    """
+    Gera eventos SSE com as páginas do job à medida que são publicadas.
+
+    Cada página é enviada como evento `page` com `id` igual à sua posição,
+    permitindo retomar a partir de Last-Event-ID. Ao final, envia o evento
+    `end` com o status do job.
+
+    Args:
+        job_id: ID do job
+        start: Posição da primeira página a enviar
+    """
+    job_key = f"job:{job_id}"
+    index = start
+    # Jobs atendidos pelo cache leem as páginas publicadas pelo job de origem
+    pages_job_id = await redis_client.hget(job_key, "result_ref") or job_id
+
+    while True:
+        status = await redis_client.hget(job_key, "status")
+        terminal = status not in ("created", "processing")
+
+        # Páginas são publicadas antes do status final: após vê-lo, uma última
+        # leitura garante que nenhuma página seja perdida
+        for page in await read_pages(redis_client, pages_job_id, index):
+            yield f"id: {index}\nevent: page\ndata: {json.dumps(page)}\n\n"
+            index += 1
+
+        if terminal:
+            yield f"event: end\ndata: {json.dumps({'status': status or 'expired'})}\n\n"
+            return
+
+        await asyncio.sleep(STREAM_POLL_INTERVAL)
+
+
+def _progress_event(fields: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    """Normaliza campos de progresso do job para envio ao cliente."""
+    event: Dict[str, Any] = {field: value for field, value in fields.items() if value is not None}
+    if event.get("progress"):
+        event["progress"] = float(event["progress"])
+    return event
+
+
+async def watch_job_events(job_id: str) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Acompanha o progresso de um job via pub/sub do Redis.
+
+    O primeiro item é um snapshot do hash do job; os seguintes são as
+    atualizações publicadas pelo processo que executa a conversão. Termina
+    após um status final (ou se o job expirar). Gera None a cada
+    EVENTS_KEEPALIVE_INTERVAL segundos sem eventos, para keepalive.
+
+    Args:
+        job_id: ID do job
+    """
+    job_key = f"job:{job_id}"
+    pubsub = redis_client.pubsub()
+    # Inscrever antes do snapshot para não perder eventos publicados entre os dois
+    await pubsub.subscribe(events_channel(job_id))
+    try:
+        snapshot = dict(zip(EVENT_FIELDS, await redis_client.hmget(job_key, *EVENT_FIELDS)))
+        if snapshot["status"] is None:
+            yield {"status": "expired"}
+            return
+        yield _progress_event(snapshot)
+        if snapshot["status"] in TERMINAL_STATUSES:
+            return
+
+        idle_since = time.monotonic()
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=STREAM_POLL_INTERVAL)
+            if message is None:
+                if time.monotonic() - idle_since < EVENTS_KEEPALIVE_INTERVAL:
+                    continue
+                # Sem eventos há algum tempo: confirmar que o job ainda existe
+                idle_since = time.monotonic()
+                if not await redis_client.exists(job_key):
+                    yield {"status": "expired"}
+                    return
+                yield None
+                continue
+
+            idle_since = time.monotonic()
+            event = _progress_event(json.loads(message["data"]))
+            yield event
+            if event.get("status") in TERMINAL_STATUSES:
+                return
+    finally:
+        try:
+            await pubsub.unsubscribe(events_channel(job_id))
+            await pubsub.reset()
+        except Exception as e:
+            logger.debug(f"Erro ao encerrar inscrição de eventos do job {job_id}: {str(e)}")
+
+
+async def stream_job_events(job_id: str) -> AsyncIterator[str]:
+    """
+    Gera eventos SSE de progresso do job (ver watch_job_events).
+
+    Envia `progress` para cada atualização, comentários de keepalive e, ao
+    final, o evento `end` com o status do job.
+    """
+    async for event in watch_job_events(job_id):
+        if event is None:
+            yield ": keepalive\n\n"
+            continue
+        status = event.get("status")
+        if status != "expired":
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        if status in TERMINAL_STATUSES or status == "expired":
+            yield f"event: end\ndata: {json.dumps({'status': status})}\n\n"
+
+
 async def get_job_details(job_id: str) -> Optional[Dict[str, Any]]:
     """
     Obtém detalhes completos de um job do Redis.
@@ -276,15 +940,34 @@ async def get_job_details(job_id: str) -> Optional[Dict[str, Any]]:
         job["progress"] = float(job["progress"])
     if job.get("created_at"):
         job["created_at"] = float(job["created_at"])
-    if job.get("result"):
-        try:
-            job["result"] = json.loads(job["result"])
-        except:
-            pass
+    try:
+        result_data = await _load_result(job)
+        if result_data:
+            job["result"] = result_data
+    except Exception as e:
+        logger.warning(f"Falha ao carregar resultado do job {job_id}: {str(e)}")
     return job
 
 
-def cleanup_old_jobs() -> None:
-    """Remove jobs antigos para evitar consumo excessivo de memória."""
-    # Com Redis e TTL, limpeza automática não é necessária
-    return
+async def cleanup_old_jobs() -> int:
+    """
+    Remove do armazenamento os resultados de jobs que já expiraram no Redis.
+
+    Os hashes dos jobs expiram por TTL, mas os blobs não: aqui são apagados
+    os resultados cujo job não existe mais. Blobs mais novos que
+    JOB_TTL_PROCESSING são preservados, pois o job pode estar sendo concluído.
+
+    Returns:
+        int: Número de resultados removidos
+    """
+    store = get_result_store()
+    removed = 0
+    keys = await asyncio.to_thread(lambda: list(expired_keys(store, JOB_TTL_PROCESSING)))
+    for key in keys:
+        if await redis_client.exists(f"job:{key}"):
+            continue
+        await asyncio.to_thread(store.delete, key)
+        removed += 1
+    if removed:
+        logger.info(f"{removed} resultado(s) de jobs expirados removido(s)")
+    return removed
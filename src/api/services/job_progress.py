@@ -0,0 +1,147 @@
+"""
+Gravação agrupada do estado de um job no Redis.
+
+Durante a conversão (thread da API ou processo do worker), JobProgressWriter
+acumula as atualizações de progresso em memória e as envia em uma única
+transação (pipeline MULTI/EXEC), no máximo uma vez a cada
+PROGRESS_FLUSH_INTERVAL segundos. No event loop, JobProgressRecorder grava as
+mudanças de estado do job (início, conclusão, falha) junto com o novo TTL.
+
+Cada gravação também publica os campos de progresso no canal pub/sub
+`job:{id}:events`, consumido pelas rotas SSE/WebSocket da API.
+"""
+
+import json
+import time
+from typing import Dict, Iterable, Optional
+from redis import Redis as SyncRedis
+from src.config import PROGRESS_FLUSH_INTERVAL, REDIS_URL
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Campos do job enviados aos clientes como eventos de progresso
+EVENT_FIELDS = ("status", "progress", "status_message", "error")
+
+# Status a partir dos quais o job não muda mais
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def events_channel(job_id: str) -> str:
+    """Retorna o canal pub/sub com os eventos de progresso de um job."""
+    return f"job:{job_id}:events"
+
+
+def _preparar_gravacao(pipe, job_id: str, fields: Dict[str, str], ttl: Optional[int],
+                       extra_keys: Iterable[str]) -> None:
+    """Enfileira no pipeline os campos do job, o evento de progresso e o TTL."""
+    key = f"job:{job_id}"
+    if fields:
+        pipe.hset(key, mapping=fields)
+        event = {field: fields[field] for field in EVENT_FIELDS if field in fields}
+        if event:
+            pipe.publish(events_channel(job_id), json.dumps(event))
+    if ttl is not None:
+        pipe.expire(key, ttl)
+        for extra_key in extra_keys:
+            pipe.expire(extra_key, ttl)
+
+
+class JobProgressRecorder:
+    """
+    Grava mudanças de estado do hash `job:{id}` a partir do event loop.
+
+    Exemplo:
+        progress = JobProgressRecorder(redis_client, job_id)
+        await progress.flush({"status": "completed"}, ttl=JOB_TTL_COMPLETED)  # campos + TTL
+    """
+
+    def __init__(self, redis, job_id: str):
+        """
+        Args:
+            redis: Cliente Redis assíncrono
+            job_id (str): ID do job
+        """
+        self.redis = redis
+        self.job_id = job_id
+
+    async def flush(
+        self,
+        fields: Optional[Dict[str, str]] = None,
+        ttl: Optional[int] = None,
+        extra_keys: Iterable[str] = ()
+    ) -> None:
+        """
+        Grava os campos e, opcionalmente, o TTL em uma única transação.
+
+        Args:
+            fields: Campos a gravar no hash do job (ex: estado terminal)
+            ttl: Novo TTL (segundos) do job
+            extra_keys: Chaves auxiliares do job que recebem o mesmo TTL
+        """
+        if not fields and ttl is None:
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        _preparar_gravacao(pipe, self.job_id, fields or {}, ttl, extra_keys)
+        await pipe.execute()
+
+
+class JobProgressWriter:
+    """
+    Publica o progresso de um job durante a conversão, com debounce.
+
+    Usa um cliente Redis síncrono porque roda dentro da conversão, fora do
+    event loop da API (como PageStreamWriter). Falhas de gravação são
+    registradas no log e não interrompem a conversão.
+
+    Exemplo:
+        progress = JobProgressWriter(job_id)
+        progress.update({"progress": "0.5"})  # pode ser adiado e agrupado
+        progress.flush()                      # grava o que estiver pendente
+    """
+
+    def __init__(self, job_id: str, redis=None, flush_interval: float = PROGRESS_FLUSH_INTERVAL):
+        """
+        Args:
+            job_id (str): ID do job
+            redis: Cliente Redis síncrono (opcional, criado a partir de REDIS_URL)
+            flush_interval (float): Intervalo mínimo (segundos) entre gravações automáticas
+        """
+        self.job_id = job_id
+        self.redis = redis or SyncRedis.from_url(REDIS_URL, decode_responses=True)
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, str] = {}
+        self._last_flush = time.monotonic()
+
+    def update(self, fields: Dict[str, str]) -> None:
+        """
+        Registra campos do job, gravando-os se o intervalo de debounce já passou.
+
+        Args:
+            fields: Campos a gravar no hash do job
+        """
+        self._pending.update(fields)
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Grava os campos pendentes em uma única transação."""
+        if not self._pending:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=True)
+            _preparar_gravacao(pipe, self.job_id, self._pending, None, ())
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Falha ao gravar progresso do job {self.job_id}: {str(e)}")
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        """Grava o que estiver pendente e libera a conexão Redis."""
+        self.flush()
+        try:
+            self.redis.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar conexão de progresso: {str(e)}")
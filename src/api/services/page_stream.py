@@ -0,0 +1,62 @@
+"""
+Streaming por página do conteúdo de um job de conversão.
+
+As páginas convertidas são anexadas à lista Redis `job:{id}:pages` pelo
+processo que executa a conversão (thread da API ou processo do worker) e
+lidas pela rota SSE `/v1/convert/{job_id}/stream`.
+"""
+
+import json
+from typing import Any, Dict, List
+from redis import Redis as SyncRedis
+from src.config import REDIS_URL, JOB_TTL_PROCESSING
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+def pages_key(job_id: str) -> str:
+    """Retorna a lista Redis com as páginas já convertidas de um job."""
+    return f"job:{job_id}:pages"
+
+
+class PageStreamWriter:
+    """
+    Publica páginas convertidas na lista Redis do job.
+
+    Usa um cliente Redis síncrono porque roda dentro da conversão, fora do
+    event loop da API.
+    """
+
+    def __init__(self, job_id: str, redis=None):
+        """
+        Args:
+            job_id (str): ID do job
+            redis: Cliente Redis síncrono (opcional, criado a partir de REDIS_URL)
+        """
+        self.key = pages_key(job_id)
+        self.redis = redis or SyncRedis.from_url(REDIS_URL, decode_responses=True)
+
+    def __call__(self, page_no: int, content: str) -> None:
+        """Anexa uma página ao stream do job."""
+        self.redis.rpush(self.key, json.dumps({"page": page_no, "content": content}))
+        self.redis.expire(self.key, JOB_TTL_PROCESSING)
+
+    def close(self) -> None:
+        """Libera a conexão Redis."""
+        try:
+            self.redis.close()
+        except Exception as e:
+            logger.debug(f"Erro ao fechar conexão do stream de páginas: {str(e)}")
+
+
+async def read_pages(redis, job_id: str, start: int = 0) -> List[Dict[str, Any]]:
+    """
+    Lê as páginas publicadas a partir da posição `start`.
+
+    Returns:
+        list: Páginas no formato {"page": n, "content": "..."}
+    """
+    entries = await redis.lrange(pages_key(job_id), start, -1)
+    return [json.loads(entry) for entry in entries]
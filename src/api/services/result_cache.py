@@ -0,0 +1,112 @@
+"""
+Cache de resultados de conversão endereçado por conteúdo.
+
+A chave é o SHA-256 do arquivo combinado com os parâmetros de conversão que
+afetam o resultado. O valor é o ID de um job já concluído: um novo job com a
+mesma chave é marcado como concluído apontando para ele, sem reconverter.
+"""
+
+import hashlib
+import json
+import time
+from typing import Optional
+from src.api.models import ConversionRequest
+from src.config import RESULT_CACHE_TTL, RESULT_CACHE_MAX_ENTRIES, JOB_TTL_COMPLETED
+from src.api.services.page_stream import pages_key
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+CACHE_KEY_PREFIX = "cache:conversion:"
+CACHE_INDEX_KEY = "cache:conversion:index"
+
+# Parâmetros que não alteram o resultado persistido do job
+_IGNORED_PARAMS = {"to_langchain", "stream"}
+
+
+def _ttl() -> int:
+    # A entrada nunca deve viver mais que o job para o qual aponta
+    return max(1, min(RESULT_CACHE_TTL, JOB_TTL_COMPLETED))
+
+
+def hash_content(file_content: bytes) -> str:
+    """Retorna o SHA-256 (hex) do conteúdo do arquivo."""
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def build_cache_key(content_hash: str, params: ConversionRequest) -> str:
+    """
+    Monta a chave de cache para um arquivo e seus parâmetros de conversão.
+
+    Args:
+        content_hash: SHA-256 do conteúdo do arquivo
+        params: Parâmetros de conversão
+
+    Returns:
+        str: Chave determinística para o par (arquivo, parâmetros)
+    """
+    data = params.model_dump(mode="json", exclude=_IGNORED_PARAMS)
+    # Ordem e repetição dos formatos não alteram o resultado
+    data["output_formats"] = sorted(set(data["output_formats"]))
+    normalized = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256(f"{content_hash}:{normalized}".encode("utf-8")).hexdigest()
+    return f"{CACHE_KEY_PREFIX}{digest}"
+
+
+async def lookup(redis, cache_key: str) -> Optional[str]:
+    """
+    Busca um job concluído para a chave.
+
+    Returns:
+        Optional[str]: ID do job de origem, ou None em caso de miss
+    """
+    source_job_id = await redis.get(cache_key)
+    if not source_job_id:
+        return None
+
+    status = await redis.hget(f"job:{source_job_id}", "status")
+    if status != "completed":
+        # Job de origem expirou ou foi removido: descartar entrada
+        await redis.delete(cache_key)
+        await redis.zrem(CACHE_INDEX_KEY, cache_key)
+        return None
+
+    return source_job_id
+
+
+async def touch(redis, cache_key: str, source_job_id: str) -> None:
+    """Renova o TTL da entrada e do job de origem após um hit."""
+    ttl = _ttl()
+    await redis.expire(cache_key, ttl)
+    await redis.expire(f"job:{source_job_id}", JOB_TTL_COMPLETED)
+    # Páginas publicadas, lidas pelo streaming de jobs atendidos pelo cache
+    await redis.expire(pages_key(source_job_id), JOB_TTL_COMPLETED)
+    await redis.zadd(CACHE_INDEX_KEY, {cache_key: time.time()})
+
+
+async def store(redis, cache_key: str, job_id: str) -> None:
+    """
+    Registra um job concluído no cache, respeitando o limite de entradas.
+
+    Args:
+        redis: Cliente Redis assíncrono
+        cache_key: Chave gerada por build_cache_key
+        job_id: ID do job concluído
+    """
+    now = time.time()
+    ttl = _ttl()
+    await redis.set(cache_key, job_id, ex=ttl)
+    await redis.zadd(CACHE_INDEX_KEY, {cache_key: now})
+
+    # Entradas já expiradas pelo TTL não contam para o limite
+    await redis.zremrangebyscore(CACHE_INDEX_KEY, 0, now - ttl)
+
+    # Remover entradas menos recentes acima do limite
+    excess = await redis.zcard(CACHE_INDEX_KEY) - RESULT_CACHE_MAX_ENTRIES
+    if excess > 0:
+        evicted = await redis.zpopmin(CACHE_INDEX_KEY, excess)
+        keys = [key for key, _ in evicted]
+        if keys:
+            await redis.delete(*keys)
+            logger.debug(f"{len(keys)} entrada(s) removida(s) do cache de conversão")
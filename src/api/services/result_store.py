@@ -0,0 +1,197 @@
+"""
+Armazenamento dos resultados de conversão fora do Redis.
+
+O Redis guarda apenas os metadados do job e a chave do resultado
+(`result_key`); o conteúdo de cada formato fica em um blob separado,
+lido sob demanda. Backends disponíveis:
+
+- local: diretório no sistema de arquivos (compartilhado entre API e workers)
+- s3: bucket S3 ou compatível (MinIO, R2, etc.), requer boto3
+"""
+
+import json
+import os
+import re
+import shutil
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional, Tuple
+from src.config import (
+    RESULT_STORE_BACKEND, RESULT_STORE_DIR, RESULT_STORE_S3_BUCKET,
+    RESULT_STORE_S3_PREFIX, RESULT_STORE_S3_ENDPOINT_URL
+)
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Nomes aceitos para chaves e formatos (evita path traversal)
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _validar_nome(nome: str) -> str:
+    if not _NAME_PATTERN.match(nome or ""):
+        raise ValueError(f"Nome inválido no armazenamento de resultados: {nome!r}")
+    return nome
+
+
+def _serializar(conteudo: Any) -> bytes:
+    # Formatos estruturados (ex: json do Docling) são gravados como JSON
+    if not isinstance(conteudo, str):
+        conteudo = json.dumps(conteudo, ensure_ascii=False)
+    return conteudo.encode("utf-8")
+
+
+class ResultStore(ABC):
+    """
+    Interface dos backends de armazenamento de resultados.
+
+    Os resultados de um job ficam agrupados sob uma chave (o ID do job),
+    com um blob por formato.
+    """
+
+    def save_formats(self, key: str, formats: Dict[str, Any]) -> str:
+        """
+        Grava todos os formatos de um resultado.
+
+        Args:
+            key: Chave do resultado (ID do job)
+            formats: Conteúdo por formato
+
+        Returns:
+            str: Chave a ser guardada no job (`result_key`)
+        """
+        _validar_nome(key)
+        for fmt, conteudo in formats.items():
+            self._put(key, _validar_nome(fmt), _serializar(conteudo))
+        return key
+
+    def load_format(self, key: str, fmt: str) -> Optional[str]:
+        """Lê o conteúdo de um formato, ou None se não existir."""
+        data = self._get(_validar_nome(key), _validar_nome(fmt))
+        return data.decode("utf-8") if data is not None else None
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove todos os formatos de um resultado."""
+
+    @abstractmethod
+    def list_keys(self) -> Iterator[Tuple[str, float]]:
+        """Lista as chaves armazenadas com o horário (epoch) da última gravação."""
+
+    @abstractmethod
+    def _put(self, key: str, fmt: str, data: bytes) -> None:
+        """Grava o blob de um formato."""
+
+    @abstractmethod
+    def _get(self, key: str, fmt: str) -> Optional[bytes]:
+        """Lê o blob de um formato, ou None se não existir."""
+
+
+class LocalResultStore(ResultStore):
+    """Backend em sistema de arquivos: `<base_dir>/<key>/<formato>`."""
+
+    def __init__(self, base_dir: str = RESULT_STORE_DIR):
+        self.base_dir = base_dir
+        os.makedirs(base_dir, exist_ok=True)
+
+    def _put(self, key, fmt, data):
+        job_dir = os.path.join(self.base_dir, key)
+        os.makedirs(job_dir, exist_ok=True)
+        path = os.path.join(job_dir, fmt)
+        # Gravação atômica: leitores nunca veem arquivos parciais
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _get(self, key, fmt):
+        try:
+            with open(os.path.join(self.base_dir, key, fmt), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        shutil.rmtree(os.path.join(self.base_dir, _validar_nome(key)), ignore_errors=True)
+
+    def list_keys(self):
+        try:
+            entries = list(os.scandir(self.base_dir))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.is_dir():
+                yield entry.name, entry.stat().st_mtime
+
+
+class S3ResultStore(ResultStore):
+    """Backend S3 ou compatível: `s3://<bucket>/<prefix><key>/<formato>`."""
+
+    def __init__(self, bucket: str = RESULT_STORE_S3_BUCKET, prefix: str = RESULT_STORE_S3_PREFIX,
+                 endpoint_url: Optional[str] = RESULT_STORE_S3_ENDPOINT_URL, client=None):
+        if not bucket:
+            raise ValueError("RESULT_STORE_S3_BUCKET deve ser configurado para o backend s3")
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise ImportError("boto3 não encontrado. Instale com 'pip install boto3' para usar o backend s3")
+            # Credenciais e região seguem a cadeia padrão da AWS (variáveis AWS_*)
+            client = boto3.client("s3", endpoint_url=endpoint_url or None)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _object_key(self, key, fmt=""):
+        return f"{self.prefix}{key}/{fmt}"
+
+    def _put(self, key, fmt, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._object_key(key, fmt), Body=data)
+
+    def _get(self, key, fmt):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._object_key(key, fmt))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def delete(self, key):
+        response = self.client.list_objects_v2(Bucket=self.bucket, Prefix=self._object_key(_validar_nome(key)))
+        objects = [{"Key": obj["Key"]} for obj in response.get("Contents", [])]
+        if objects:
+            self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": objects})
+
+    def list_keys(self):
+        latest: Dict[str, float] = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                key = obj["Key"][len(self.prefix):].split("/", 1)[0]
+                latest[key] = max(latest.get(key, 0.0), obj["LastModified"].timestamp())
+        yield from latest.items()
+
+
+_store: Optional[ResultStore] = None
+
+
+def get_result_store() -> ResultStore:
+    """Retorna o backend configurado em RESULT_STORE_BACKEND (instância única por processo)."""
+    global _store
+    if _store is None:
+        if RESULT_STORE_BACKEND == "s3":
+            _store = S3ResultStore()
+        elif RESULT_STORE_BACKEND == "local":
+            _store = LocalResultStore()
+        else:
+            raise ValueError(f"Backend de resultados não suportado: {RESULT_STORE_BACKEND} (use 'local' ou 's3')")
+        logger.info(f"Armazenamento de resultados: {RESULT_STORE_BACKEND}")
+    return _store
+
+
+def expired_keys(store: ResultStore, min_age: float) -> Iterator[str]:
+    """Chaves gravadas há mais de `min_age` segundos."""
+    limite = time.time() - min_age
+    for key, mtime in store.list_keys():
+        if mtime < limite:
+            yield key
@@ -6,6 +6,7 @@ Valores podem ser sobrescritos via variáveis de ambiente.
 """
 
 import os
+import socket
 
 # ========================================
 # Configurações da API
@@ -34,6 +35,63 @@ JOB_TTL_PROCESSING = int(os.getenv("JOB_TTL_PROCESSING", "3600"))  # 1 hora
 JOB_TTL_COMPLETED = int(os.getenv("JOB_TTL_COMPLETED", "86400"))   # 24 horas
 JOB_TTL_FAILED = int(os.getenv("JOB_TTL_FAILED", "86400"))         # 24 horas
 
+# Intervalo mínimo (segundos) entre gravações de progresso de um job
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "0.5"))
+
+# Cache de resultados por conteúdo (arquivo + parâmetros)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_TTL = int(os.getenv("RESULT_CACHE_TTL", str(JOB_TTL_COMPLETED)))  # Limitado a JOB_TTL_COMPLETED
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1000"))
+
+# ========================================
+# Configurações do Armazenamento de Resultados
+# ========================================
+
+# Backend dos resultados de conversão: "local" ou "s3" (requer boto3)
+RESULT_STORE_BACKEND = os.getenv("RESULT_STORE_BACKEND", "local").lower()
+
+# Diretório do backend local (deve ser compartilhado entre API e workers)
+RESULT_STORE_DIR = os.getenv("RESULT_STORE_DIR", "temp/results")
+
+# Backend S3 (ou compatível, informando o endpoint)
+RESULT_STORE_S3_BUCKET = os.getenv("RESULT_STORE_S3_BUCKET", "")
+RESULT_STORE_S3_PREFIX = os.getenv("RESULT_STORE_S3_PREFIX", "results/")
+RESULT_STORE_S3_ENDPOINT_URL = os.getenv("RESULT_STORE_S3_ENDPOINT_URL", "")
+
+# Intervalo (segundos) da limpeza de resultados de jobs expirados
+CLEANUP_INTERVAL_SECONDS = int(os.getenv("CLEANUP_INTERVAL_SECONDS", "300"))
+
+# ========================================
+# Configurações do Worker de Conversão
+# ========================================
+
+# Modo de execução dos jobs:
+# - "inline": a API converte no próprio processo (padrão, sem worker)
+# - "queue": a API apenas enfileira e o worker (run_worker.py) converte
+JOB_EXECUTION_MODE = os.getenv("JOB_EXECUTION_MODE", "inline").lower()
+
+# Lista Redis usada como fila de jobs
+JOB_QUEUE_KEY = os.getenv("JOB_QUEUE_KEY", "jobs:queue")
+
+# Número de processos de conversão por worker
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+
+# Tempo máximo (segundos) de espera bloqueante por novos jobs
+WORKER_POLL_TIMEOUT = int(os.getenv("WORKER_POLL_TIMEOUT", "5"))
+
+# Identificador do worker (usado na lista de jobs em andamento)
+WORKER_ID = os.getenv("WORKER_ID", socket.gethostname())
+
+# Validade (segundos) do heartbeat do worker; jobs em andamento de workers sem
+# heartbeat (ex: pod substituído, com outro hostname) são devolvidos à fila
+WORKER_HEARTBEAT_TTL = int(os.getenv("WORKER_HEARTBEAT_TTL", "30"))
+
+# Intervalo (segundos) entre leituras de novas páginas no endpoint de streaming
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "0.5"))
+
+# Intervalo (segundos) entre keepalives nos endpoints de eventos de progresso
+EVENTS_KEEPALIVE_INTERVAL = float(os.getenv("EVENTS_KEEPALIVE_INTERVAL", "15"))
+
 # ========================================
 # Configurações de Upload
 # ========================================
@@ -50,6 +108,9 @@ SUPPORTED_FORMATS = [
 # Diretório temporário para uploads
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "temp/uploads")
 
+# Tamanho dos blocos ao gravar uploads em disco (em bytes)
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))  # 1MB
+
 # ========================================
 # Configurações do Formatador
 # ========================================
@@ -63,6 +124,23 @@ MAX_SUMMARY_PARAGRAPHS = int(os.getenv("MAX_SUMMARY_PARAGRAPHS", "2"))
 # Comprimento máximo do resumo (em caracteres)
 MAX_SUMMARY_LENGTH = int(os.getenv("MAX_SUMMARY_LENGTH", "1000"))
 
+# Perfis adicionais do formatador, em JSON: {"nome": ["metadata", "content", ...]}
+# Seções: metadata, summary, summary_auto, content, tables, images, raw, token_analysis
+LLMS_CUSTOM_PROFILES = os.getenv("LLMS_CUSTOM_PROFILES", "")
+
+# Linhas por lote na extração de tabelas em streaming (NDJSON)
+TABLE_BATCH_ROWS = int(os.getenv("TABLE_BATCH_ROWS", "1000"))
+
+# Índices de busca de jobs mantidos em memória pela API (/convert/{job_id}/search)
+SEARCH_INDEX_CACHE_SIZE = int(os.getenv("SEARCH_INDEX_CACHE_SIZE", "32"))
+
+# Contagens de tokens memorizadas por (hash do texto, encoding), por processo
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "1024"))
+
+# Estimativa rápida de tokens (modo "fast"): amostras estratificadas e tamanho de cada uma
+TOKEN_ESTIMATE_SAMPLES = int(os.getenv("TOKEN_ESTIMATE_SAMPLES", "16"))
+TOKEN_ESTIMATE_SAMPLE_CHARS = int(os.getenv("TOKEN_ESTIMATE_SAMPLE_CHARS", "2000"))
+
 # ========================================
 # Configurações de OCR
 # ========================================
@@ -76,6 +154,19 @@ FALLBACK_OCR_ENGINE = os.getenv("FALLBACK_OCR_ENGINE", "easyocr")
 # Idioma padrão para OCR
 DEFAULT_OCR_LANGUAGE = os.getenv("DEFAULT_OCR_LANGUAGE", "por")
 
+# ========================================
+# Configurações do Pipeline Docling
+# ========================================
+
+# Número máximo de conversores Docling mantidos aquecidos por processo
+CONVERTER_POOL_SIZE = int(os.getenv("CONVERTER_POOL_SIZE", "4"))
+
+# Conversão paralela de PDFs longos por intervalos de páginas
+# Total de processos por conversão; em workers, considere WORKER_CONCURRENCY x PDF_PARALLEL_WORKERS
+PDF_PARALLEL_WORKERS = int(os.getenv("PDF_PARALLEL_WORKERS", str(min(4, os.cpu_count() or 1))))  # < 2 desativa
+PDF_PAGE_RANGE_SIZE = int(os.getenv("PDF_PAGE_RANGE_SIZE", "25"))      # Páginas por intervalo
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))  # Mínimo de páginas para paralelizar
+
 # ========================================
 # Configurações de Classificação de Imagens
 # ========================================
@@ -123,6 +214,15 @@ def validate_config():
     if CORS_ORIGINS == "*":
         issues.append("⚠️  CORS configurado para aceitar todas origens!")
 
+    if JOB_EXECUTION_MODE not in ("queue", "inline"):
+        issues.append(f"⚠️  JOB_EXECUTION_MODE inválido: {JOB_EXECUTION_MODE} (use 'queue' ou 'inline')")
+
+    if RESULT_STORE_BACKEND not in ("local", "s3"):
+        issues.append(f"⚠️  RESULT_STORE_BACKEND inválido: {RESULT_STORE_BACKEND} (use 'local' ou 's3')")
+
+    if RESULT_STORE_BACKEND == "s3" and not RESULT_STORE_S3_BUCKET:
+        issues.append("⚠️  RESULT_STORE_S3_BUCKET não configurado para o backend s3!")
+
     if MAX_FILE_SIZE > 100 * 1024 * 1024:  # 100MB
         issues.append(f"⚠️  Tamanho máximo de arquivo muito alto: {MAX_FILE_SIZE / 1024 / 1024}MB")
 
@@ -135,6 +235,8 @@ if __name__ == "__main__":
     print(f"Ambiente: {ENVIRONMENT}")
     print(f"CORS Origins: {CORS_ORIGINS}")
     print(f"Redis URL: {REDIS_URL}")
+    print(f"Job Execution Mode: {JOB_EXECUTION_MODE}")
+    print(f"Result Store: {RESULT_STORE_BACKEND}")
     print(f"Max File Size: {MAX_FILE_SIZE / 1024 / 1024}MB")
     print(f"Supported Formats: {', '.join(SUPPORTED_FORMATS)}")
     print(f"Min Paragraph Length: {MIN_PARAGRAPH_LENGTH}")
@@ -14,6 +14,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.tools.document_converter import DocumentConverterTool
+from src.tools.llms_formatter import PROFILES
 from src.config import DEFAULT_OCR_ENGINE, DEFAULT_OCR_LANGUAGE
 
 
@@ -49,7 +50,7 @@ Exemplos de uso:
     parser.add_argument(
         '--profile', '-p',
         type=str,
-        choices=['llms-min', 'llms-ctx', 'llms-tables', 'llms-images', 'llms-raw', 'llms-full'],
+        choices=list(PROFILES),
         default='llms-full',
         help='Perfil de formatao (padro: llms-full)'
     )
@@ -117,7 +118,8 @@ Exemplos de uso:
         # Inicializar conversor
         converter = DocumentConverterTool()
 
-        # Executar converso
+        # Executar converso (o LLMs.txt  escrito direto no arquivo de sada,
+        # sem montar o texto completo em memria)
         resultado = converter.run(
             file_path=args.file,
             save_output=not args.no_save,
@@ -125,27 +127,30 @@ Exemplos de uso:
             ocr_engine=args.ocr_engine,
             ocr_language=args.ocr_language,
             force_ocr=args.force_ocr,
-            export_formats=['llms']
+            export_formats=['llms'],
+            output_path=output_path,
+            return_text=args.no_save
         )
 
         # Obter contedo formatado
-        if 'formats' in resultado and 'llms' in resultado['formats']:
-            content = resultado['formats']['llms']
+        arquivo = resultado.get('output_files', {}).get('llms')
+        if arquivo or 'llms' in resultado.get('formats', {}):
 
             # Salvar ou exibir
             if not args.no_save:
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
                 print(f" Converso concluda!")
-                print(f"= Arquivo salvo em: {output_path}")
+                print(f"= Arquivo salvo em: {arquivo}")
+                tamanho = f"{os.path.getsize(arquivo)} bytes"
             else:
+                content = resultado['formats']['llms']
                 print(content)
+                tamanho = f"{len(content)} caracteres"
 
             # Mostrar estatsticas se verbose
             if args.verbose:
                 print()
                 print("= Estatsticas:")
-                print(f"   Tamanho: {len(content)} caracteres")
+                print(f"   Tamanho: {tamanho}")
                 if 'doc' in resultado:
                     doc = resultado['doc']
                     if hasattr(doc, 'pages'):
@@ -0,0 +1,108 @@
+"""
+Pool de conversores Docling reutilizáveis.
+
+Mantém, por processo, conversores já inicializados indexados pelas opções
+de pipeline, para que jobs com a mesma configuração não paguem novamente
+a carga de modelos e a montagem do pipeline.
+"""
+
+import threading
+from collections import OrderedDict
+from src.config import CONVERTER_POOL_SIZE
+from src.utils.logging_config import setup_logger
+
+# Configurar logger para este módulo
+logger = setup_logger(__name__)
+
+
+class ConverterPool:
+    """
+    Registro LRU de conversores Docling indexado pelas opções de pipeline.
+    """
+
+    def __init__(self, max_size=CONVERTER_POOL_SIZE):
+        """
+        Inicializa o pool.
+
+        Args:
+            max_size (int): Número máximo de conversores mantidos em memória
+        """
+        self.max_size = max(1, int(max_size))
+        self.hits = 0
+        self.misses = 0
+        self._conversores = OrderedDict()
+        # Locks das chaves com conversor em criação
+        self._criando = {}
+        self._lock = threading.Lock()
+
+    def obter_ou_criar(self, chave, fabrica):
+        """
+        Retorna o conversor associado à chave, criando-o se necessário.
+
+        A fábrica roda fora do lock do pool: a criação de um conversor (carga
+        de modelos, segundos) não bloqueia outras chaves nem os acertos de
+        cache. Um lock por chave garante que cada chave seja criada uma vez.
+
+        Args:
+            chave (tuple): Opções de pipeline que identificam o conversor
+            fabrica (callable): Função sem argumentos que cria um novo conversor
+
+        Returns:
+            Conversor Docling pronto para uso
+        """
+        with self._lock:
+            conversor = self._obter(chave)
+            if conversor is not None:
+                return conversor
+            trava = self._criando.setdefault(chave, threading.Lock())
+
+        with trava:
+            # Outra thread pode ter criado o conversor enquanto esperávamos
+            with self._lock:
+                conversor = self._obter(chave)
+                if conversor is not None:
+                    return conversor
+                self.misses += 1
+
+            try:
+                conversor = fabrica()
+            finally:
+                with self._lock:
+                    self._criando.pop(chave, None)
+
+            with self._lock:
+                self._conversores[chave] = conversor
+
+                # Remover o conversor usado há mais tempo se o limite for excedido
+                while len(self._conversores) > self.max_size:
+                    chave_removida, _ = self._conversores.popitem(last=False)
+                    logger.info(f"Conversor Docling removido do pool (LRU): {chave_removida}")
+
+                logger.info(f"Novo conversor Docling adicionado ao pool ({len(self._conversores)}/{self.max_size})")
+            return conversor
+
+    def _obter(self, chave):
+        # Chamado com self._lock adquirido
+        conversor = self._conversores.get(chave)
+        if conversor is not None:
+            self._conversores.move_to_end(chave)
+            self.hits += 1
+            logger.debug(f"Reutilizando conversor Docling para opções {chave}")
+        return conversor
+
+    def limpar(self):
+        """Remove todos os conversores do pool."""
+        with self._lock:
+            self._conversores.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._conversores)
+
+    def __contains__(self, chave):
+        return chave in self._conversores
+
+
+# Pool compartilhado pelo processo
+converter_pool = ConverterPool()
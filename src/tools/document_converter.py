@@ -2,12 +2,21 @@
 Conversor de documentos usando Docling.
 """
 
+import json
 import os
 import sys
 import tempfile
 from datetime import datetime
+from src.config import TABLE_BATCH_ROWS, PDF_PAGE_RANGE_SIZE
 from src.utils.logging_config import setup_logger
 from src.tools.llms_formatter import LLMSFormatter
+from src.tools.render_cache import DocumentRenderCache
+from src.tools.layout_index import GRADE_PADRAO, LayoutIndex
+from src.tools.document_tree import estrutura_aninhada, estrutura_plana
+from src.tools.search_index import SearchIndex
+from src.tools.table_engine import ColumnarTable, extrair_tabelas_colunares, iterar_ndjson, iterar_tabelas, salvar_tabelas
+from src.tools.converter_pool import converter_pool
+from src.tools.pdf_parallel import deve_paralelizar, converter_em_paralelo, converter_por_intervalos, contar_paginas
 
 # Configurar logger para este módulo
 logger = setup_logger(__name__)
@@ -104,8 +113,55 @@ class DocumentConverterTool:
 
         return pipeline_options
 
+    def _criar_conversor(self, ocr_engine, ocr_language, force_ocr):
+        """
+        Cria um novo conversor Docling com as opções de OCR e chunking informadas.
+
+        Args:
+            ocr_engine (str): Motor OCR a ser utilizado
+            ocr_language (str): Idioma para OCR
+            force_ocr (bool): Força OCR mesmo em documentos com texto
+
+        Returns:
+            DocumentConverter: Conversor Docling configurado
+        """
+        from docling.datamodel.base_models import InputFormat
+        from docling.document_converter import DocumentConverter, PdfFormatOption
+
+        # Configurar pipeline com opções de OCR adequadas
+        pipeline_options = self.configurar_ocr(
+            tipo=ocr_engine,
+            idioma=ocr_language,
+            forca_pagina_completa=force_ocr
+        )
+
+        # Adicionar opções de chunking diretamente ao objeto pipeline_options
+        if self.chunk_size:
+            setattr(pipeline_options, 'chunk_size', self.chunk_size)
+        if self.chunk_overlap:
+            setattr(pipeline_options, 'chunk_overlap', self.chunk_overlap)
+
+        return DocumentConverter(
+            format_options={
+                InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+            }
+        )
+
+    def _obter_conversor(self, ocr_engine, ocr_language, force_ocr):
+        """
+        Obtém do pool um conversor para as opções informadas, criando-o se necessário.
+        """
+        # Reutilizar conversor já inicializado para as mesmas opções de pipeline
+        chave = (ocr_engine, ocr_language, force_ocr, self.chunk_size, self.chunk_overlap)
+        return converter_pool.obter_ou_criar(
+            chave,
+            lambda: self._criar_conversor(ocr_engine, ocr_language, force_ocr)
+        )
+
     def run(self, file_path, save_output=True, profile='llms-full', ocr_engine="auto",
-            ocr_language=None, force_ocr=False, export_formats=None, export_to_langchain=False):
+            ocr_language=None, force_ocr=False, export_formats=None, export_to_langchain=False,
+            callback_paginas=None, modelo_llm="gpt-3.5-turbo", output_path=None, return_text=True,
+            max_tokens=None, callback_progresso=None):
         """
         Executa conversão do documento usando Docling.
 
@@ -118,9 +174,23 @@ class DocumentConverterTool:
             force_ocr (bool): Força OCR mesmo em documentos com texto
             export_formats (list): Formatos adicionais para exportação
             export_to_langchain (bool): Se True, exporta o documento para LangChain
+            callback_paginas (callable): Se informado, recebe (número da página, conteúdo)
+                de cada página assim que ela é convertida (modo streaming)
+            modelo_llm (str): Modelo usado na contagem de tokens feita durante a formatação
+            output_path (str): Arquivo do LLMs.txt quando save_output=True
+                (padrão: output/<nome>.<perfil>.llms.txt); os demais formatos
+                são gravados no mesmo diretório
+            return_text (bool): Se False (com save_output=True), os formatos são
+                escritos diretamente nos arquivos, sem manter os textos em memória,
+                e não são incluídos em "formats"
+            max_tokens (int): Orçamento de tokens do LLMs.txt (contados com modelo_llm)
+            callback_progresso (callable): Se informado, recebe a fração (0-1) das páginas
+                já convertidas a cada intervalo concluído, em PDFs convertidos por intervalos
 
         Returns:
-            dict: Dicionário com o documento em cada formato solicitado
+            dict: Dicionário com o documento em cada formato solicitado, as
+                contagens de tokens do LLMs.txt por seção ("token_stats") e os
+                arquivos gravados ("output_files")
 
         Raises:
             FileNotFoundError: Se o arquivo não for encontrado
@@ -138,30 +208,14 @@ class DocumentConverterTool:
         if ext.lower() not in supported_formats:
             logger.warning(f"Formato {ext} pode não ser totalmente suportado. Formatos recomendados: {', '.join(supported_formats)}")
 
+        # PDFs longos são convertidos por intervalos de páginas em processos separados
+        total_paginas = deve_paralelizar(file_path)
+
         # Configurar pipeline com OCR
         try:
-            from docling.datamodel.base_models import InputFormat
-            from docling.document_converter import DocumentConverter, PdfFormatOption
-
-            # Configurar pipeline com opções de OCR adequadas
-            pipeline_options = self.configurar_ocr(
-                tipo=ocr_engine,
-                idioma=ocr_language,
-                forca_pagina_completa=force_ocr
-            )
-
-            # Adicionar opções de chunking diretamente ao objeto pipeline_options
-            if self.chunk_size:
-                setattr(pipeline_options, 'chunk_size', self.chunk_size)
-            if self.chunk_overlap:
-                setattr(pipeline_options, 'chunk_overlap', self.chunk_overlap)
-
-            # Criar conversor Docling
-            doc_converter = DocumentConverter(
-                format_options={
-                    InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-                }
-            )
+            doc_converter = None
+            if not total_paginas:
+                doc_converter = self._obter_conversor(ocr_engine, ocr_language, force_ocr)
 
             logger.info(f"Pipeline do Docling configurado com sucesso")
 
@@ -169,14 +223,63 @@ class DocumentConverterTool:
             logger.error(f"Erro na configuração do Docling: {str(e)}")
             raise RuntimeError(f"Erro na configuração do Docling: {str(e)}")
 
+        def publicar_paginas(documento):
+            # Falhas no streaming não devem interromper a conversão
+            try:
+                for page_no, conteudo in LLMSFormatter().formatar_paginas(documento):
+                    callback_paginas(page_no, conteudo)
+            except Exception as e:
+                logger.warning(f"Erro ao publicar páginas convertidas: {str(e)}")
+
+        def concluir_intervalo(documento, total):
+            # Intervalos chegam na ordem das páginas
+            if callback_paginas:
+                publicar_paginas(documento)
+            if callback_progresso:
+                try:
+                    paginas = getattr(documento, 'pages', None) or {}
+                    if paginas:
+                        callback_progresso(min(1.0, max(paginas) / total))
+                except Exception as e:
+                    logger.warning(f"Erro ao informar progresso da conversão: {str(e)}")
+
         # Processar documento
         try:
             logger.info(f"Iniciando processamento do arquivo: {file_path}")
 
             # Converter o documento
-            # FIX: Do not pass pipeline_options to convert, only set in PdfFormatOption
-            result = doc_converter.convert(file_path)
-            doc = result.document
+            if total_paginas:
+                doc = converter_em_paralelo(
+                    file_path,
+                    total_paginas,
+                    ocr_engine=ocr_engine,
+                    ocr_language=ocr_language,
+                    force_ocr=force_ocr,
+                    chunk_size=self.chunk_size,
+                    chunk_overlap=self.chunk_overlap,
+                    ao_concluir_intervalo=(
+                        (lambda documento: concluir_intervalo(documento, total_paginas))
+                        if callback_paginas or callback_progresso else None
+                    )
+                )
+            else:
+                # Streaming de PDFs: converter por intervalos para publicar as primeiras
+                # páginas antes do fim; demais formatos são publicados ao final
+                paginas = 0
+                if callback_paginas and file_path.lower().endswith(".pdf"):
+                    paginas = contar_paginas(file_path)
+
+                if paginas > PDF_PAGE_RANGE_SIZE:
+                    doc = converter_por_intervalos(
+                        doc_converter, file_path, paginas,
+                        lambda documento: concluir_intervalo(documento, paginas)
+                    )
+                else:
+                    # FIX: Do not pass pipeline_options to convert, only set in PdfFormatOption
+                    result = doc_converter.convert(file_path)
+                    doc = result.document
+                    if callback_paginas:
+                        publicar_paginas(doc)
             logger.info(f"Documento processado com sucesso")
 
         except Exception as e:
@@ -184,71 +287,73 @@ class DocumentConverterTool:
             raise RuntimeError(f"Falha no processamento do documento: {str(e)}")
 
         # Formatar em LLMs.txt e outros formatos
-        try:
-            logger.info(f"Formatando documento usando perfil: {profile}")
-            formatter = LLMSFormatter()
-
-            # Extrair metadados do arquivo
-            title = os.path.basename(file_path).split('.')[0]
-            date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            source = file_path
-
-            # Formatar para LLMs.txt
-            llms_text = formatter.format(
-                doc,
-                title=title,
-                date=date,
-                source=source,
-                profile=profile
-            )
+        formatter = LLMSFormatter()
+        # Exportações compartilhadas entre o LLMs.txt e os demais formatos
+        render = DocumentRenderCache(doc)
+
+        # Extrair metadados do arquivo
+        formato_kwargs = {
+            "title": os.path.basename(file_path).split('.')[0],
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "source": file_path,
+            "profile": profile,
+            "modelo_llm": modelo_llm,
+            "render_cache": render,
+            "max_tokens": max_tokens
+        }
 
-            # Preparar resultados em vários formatos
-            resultados = {"llms": llms_text}
+        resultados = {}
+        token_stats = None
+        if return_text or not save_output:
+            try:
+                logger.info(f"Formatando documento usando perfil: {profile}")
 
-            # Adicionar outros formatos se solicitado
-            if export_formats:
-                if "md" in export_formats:
-                    resultados["md"] = doc.export_to_markdown()
-                if "json" in export_formats:
-                    resultados["json"] = doc.export_to_dict()
-                if "html" in export_formats:
-                    resultados["html"] = doc.export_to_html() if hasattr(doc, 'export_to_html') else "<html><body>HTML export not supported in this version</body></html>"
+                # Formatar para LLMs.txt
+                resultados["llms"], token_stats = formatter.formatar_com_tokens(doc, **formato_kwargs)
 
-            logger.debug(f"Documento formatado com sucesso em {len(resultados)} formatos")
+                # Adicionar outros formatos se solicitado
+                for fmt in export_formats or []:
+                    if fmt in ("md", "json", "html", "search"):
+                        resultados[fmt] = self._exportar_formato(render, fmt)
 
-        except Exception as e:
-            logger.error(f"Erro ao formatar documento: {str(e)}")
-            raise RuntimeError(f"Falha na formatação do documento: {str(e)}")
+                logger.debug(f"Documento formatado com sucesso em {len(resultados)} formatos")
+
+            except Exception as e:
+                logger.error(f"Erro ao formatar documento: {str(e)}")
+                raise RuntimeError(f"Falha na formatação do documento: {str(e)}")
 
         # Salvar resultado
+        arquivos = {}
         if save_output:
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            llms_path = output_path or f"output/{base_name}.{profile}.llms.txt"
             try:
-                filename = os.path.basename(file_path)
-                base_name = os.path.splitext(filename)[0]
-
-                # Criar diretório output se não existir
-                os.makedirs("output", exist_ok=True)
-
-                # Salvar formato LLMs.txt
-                output_path = f"output/{base_name}.{profile}.llms.txt"
-                with open(output_path, "w", encoding="utf-8") as f:
-                    f.write(llms_text)
-                logger.info(f"Resultado salvo em: {output_path}")
-
-                # Salvar outros formatos
-                if export_formats:
-                    for fmt, content in resultados.items():
-                        if fmt != "llms":  # Já salvamos o formato llms
-                            if fmt == "json":
-                                # Converter para string se for dict
-                                if isinstance(content, dict):
-                                    import json
-                                    content = json.dumps(content, indent=2)
-
-                            fmt_path = f"output/{base_name}.{profile}.{fmt}"
-                            with open(fmt_path, "w", encoding="utf-8") as f:
-                                f.write(content)
-                            logger.info(f"Formato {fmt} salvo em: {fmt_path}")
+                # Salvar formato LLMs.txt (escrito parte a parte se o texto não foi montado)
+                os.makedirs(os.path.dirname(llms_path) or ".", exist_ok=True)
+                with open(llms_path, "w", encoding="utf-8") as f:
+                    if "llms" in resultados:
+                        f.write(resultados["llms"])
+                    else:
+                        logger.info(f"Formatando documento usando perfil: {profile}")
+                        token_stats = formatter.format_to(f, doc, contar_tokens=True, **formato_kwargs)
+                arquivos["llms"] = llms_path
+                logger.info(f"Resultado salvo em: {llms_path}")
+
+                # Salvar outros formatos ao lado do LLMs.txt
+                output_dir = os.path.dirname(llms_path) or "."
+                for fmt in export_formats or []:
+                    if fmt not in ("md", "json", "html", "search"):
+                        continue
+                    fmt_path = os.path.join(output_dir, f"{base_name}.{profile}.{fmt}")
+                    with open(fmt_path, "w", encoding="utf-8") as f:
+                        content = resultados[fmt] if fmt in resultados else self._exportar_formato(render, fmt)
+                        if not isinstance(content, str):
+                            # Serializado direto no arquivo, sem gerar a string completa
+                            json.dump(content, f, indent=2)
+                        else:
+                            f.write(content)
+                    arquivos[fmt] = fmt_path
+                    logger.info(f"Formato {fmt} salvo em: {fmt_path}")
 
             except Exception as e:
                 logger.error(f"Erro ao salvar resultado: {str(e)}")
@@ -264,7 +369,11 @@ class DocumentConverterTool:
                         encoding="utf-8"
                     )
                     with temp_file:
-                        temp_file.write(llms_text)
+                        if "llms" in resultados:
+                            temp_file.write(resultados["llms"])
+                        else:
+                            token_stats = formatter.format_to(temp_file, doc, contar_tokens=True, **formato_kwargs)
+                    arquivos["llms"] = temp_file.name
                     logger.info(f"Resultado salvo em arquivo temporário: {temp_file.name}")
                 except Exception as temp_e:
                     logger.error(f"Falha ao salvar em arquivo temporário: {str(temp_e)}")
@@ -283,7 +392,9 @@ class DocumentConverterTool:
         # Retornar o documento e os resultados formatados
         resultado = {
             "doc": doc,
-            "formats": resultados
+            "formats": resultados,
+            "token_stats": token_stats,
+            "output_files": arquivos
         }
 
         # Adicionar documentos do LangChain ao resultado se disponíveis
@@ -314,6 +425,16 @@ class DocumentConverterTool:
             "Esta funcionalidade está planejada para uma versão futura."
         )
 
+    def _exportar_formato(self, render, fmt):
+        """Exporta o documento em um formato adicional (md, json, html ou search)."""
+        if fmt == "md":
+            return render.markdown()
+        if fmt == "json":
+            return render.dict()
+        if fmt == "search":
+            return SearchIndex(render.doc).to_dict()
+        return render.html() if render.supports("html") else "<html><body>HTML export not supported in this version</body></html>"
+
     def criar_chunks(self, doc, modelo_llm="gpt-3.5-turbo", max_tokens=1000):
         """
         Divide um documento em chunks otimizados para o modelo LLM específico.
@@ -376,10 +497,57 @@ class DocumentConverterTool:
             logger.error(f"Erro ao criar chunks: {str(e)}")
             return None
 
+    def indexar_texto(self, doc):
+        """
+        Monta o índice invertido do texto do documento.
+
+        Args:
+            doc: Documento processado pelo Docling
+
+        Returns:
+            SearchIndex: Índice com termos, offsets, páginas e bboxes
+        """
+        return SearchIndex(doc)
+
+    def buscar_texto_com_posicao(self, doc, texto, exigir_todos=True, indice=None):
+        """
+        Busca termos e frases ("entre aspas") no documento, com posição.
+
+        Args:
+            doc: Documento processado pelo Docling
+            texto: Texto da busca
+            exigir_todos: Se True, só elementos com todos os termos/frases
+            indice: Índice já montado (ver indexar_texto), para buscas repetidas
+
+        Returns:
+            list: Ocorrências com "pagina", "texto", "contexto", "bbox"
+                ({"l", "t", "r", "b"}), "inicio"/"fim" no texto do elemento e "ref"
+        """
+        if indice is None:
+            indice = SearchIndex(doc)
+        return indice.buscar(texto, exigir_todos)
+
+    def indexar_layout(self, doc, tamanho_grade=GRADE_PADRAO):
+        """
+        Monta o índice espacial do layout do documento.
+
+        Args:
+            doc: Documento processado pelo Docling
+            tamanho_grade: Células por eixo na grade de cada página
+
+        Returns:
+            LayoutIndex: Layout em vetores, com consultas por região
+                (na_regiao) e por ordem de leitura (ordem_leitura)
+        """
+        return LayoutIndex(doc, tamanho_grade)
+
     def extrair_layout(self, doc):
         """
         Extrai informações detalhadas sobre o layout do documento.
 
+        Monta a lista completa de dicionários; para consultas por página ou
+        região, prefira indexar_layout.
+
         Args:
             doc: Documento processado pelo Docling
 
@@ -387,81 +555,30 @@ class DocumentConverterTool:
             dict: Estrutura de layout com elementos e suas posições
         """
         try:
-            layout = {
-                "paginas": doc.num_pages(),
-                "elementos": []
-            }
-
-            # Iterar por todos os elementos com sua posição
-            for node, level in doc.iterate_items(with_groups=True):
-                if hasattr(node, "prov") and node.prov:
-                    for prov in node.prov:
-                        # Obter tipo do elemento
-                        tipo = str(node.label) if hasattr(node, "label") else "desconhecido"
-
-                        # Obter bounding box se disponível
-                        bbox = None
-                        if hasattr(prov, "bbox"):
-                            bbox = {
-                                "left": float(prov.bbox.l) if hasattr(prov.bbox, "l") else None,
-                                "top": float(prov.bbox.t) if hasattr(prov.bbox, "t") else None,
-                                "right": float(prov.bbox.r) if hasattr(prov.bbox, "r") else None,
-                                "bottom": float(prov.bbox.b) if hasattr(prov.bbox, "b") else None,
-                                "coordenadas_origem": str(prov.bbox.coord_origin) if hasattr(prov.bbox, "coord_origin") else None
-                            }
-
-                        # Criar entrada do elemento
-                        elemento = {
-                            "tipo": tipo,
-                            "nivel": level,
-                            "pagina": prov.page_no if hasattr(prov, "page_no") else None,
-                            "posicao": bbox,
-                            "texto": getattr(node, "text", "") if hasattr(node, "text") else ""
-                        }
-                        layout["elementos"].append(elemento)
-
+            layout = self.indexar_layout(doc).to_dict()
             logger.info(f"Layout extraído com {len(layout['elementos'])} elementos")
             return layout
         except Exception as e:
             logger.error(f"Erro ao extrair layout: {str(e)}")
             return None
 
-    def extrair_estrutura_hierarquica(self, doc):
+    def extrair_estrutura_hierarquica(self, doc, plana=False):
         """
         Extrai a estrutura hierárquica completa do documento.
 
+        O percurso é iterativo (sem limite de profundidade) e cada referência é
+        resolvida uma única vez (ver src/tools/document_tree.py).
+
         Args:
             doc: Documento processado pelo Docling
+            plana: Se True, retorna listas paralelas com o índice do pai de cada
+                nó em vez de dicionários aninhados
 
         Returns:
-            dict: Estrutura do documento em formato aninhado
+            dict: Estrutura do documento em formato aninhado (ou plano)
         """
         try:
-            def processar_node(node, doc):
-                resultado = {
-                    "tipo": str(node.label) if hasattr(node, "label") else "node",
-                    "texto": getattr(node, "text", ""),
-                    "filhos": []
-                }
-
-                # Adicionar metadados relevantes
-                if hasattr(node, "prov") and node.prov:
-                    resultado["pagina"] = node.prov[0].page_no if hasattr(node.prov[0], "page_no") else None
-
-                # Processar filhos recursivamente
-                if hasattr(node, "children") and node.children:
-                    for ref in node.children:
-                        try:
-                            child = ref.resolve(doc)
-                            if child:
-                                resultado["filhos"].append(processar_node(child, doc))
-                        except Exception as e:
-                            logger.warning(f"Erro ao resolver referência de filho: {str(e)}")
-
-                return resultado
-
-            # Começar pelo corpo principal do documento
-            estrutura = processar_node(doc.body, doc)
+            estrutura = estrutura_plana(doc) if plana else estrutura_aninhada(doc)
 
             logger.info("Estrutura hierárquica extraída com sucesso")
             return estrutura
@@ -469,7 +586,7 @@ class DocumentConverterTool:
             logger.error(f"Erro ao extrair estrutura hierárquica: {str(e)}")
             return None
 
-    def exportar_com_opcoes(self, doc, formato, opcoes=None):
+    def exportar_com_opcoes(self, doc, formato, opcoes=None, render_cache=None):
         """
         Exporta o documento com opções avançadas de formatação.
 
@@ -477,30 +594,33 @@ class DocumentConverterTool:
             doc: Documento processado pelo Docling
             formato: Formato de saída ("json", "markdown", "html", "yaml", "text")
             opcoes: Dicionário de opções específicas para o formato
+            render_cache: DocumentRenderCache do documento, para reutilizar
+                exportações já feitas (opcional)
 
         Returns:
             str ou dict: Documento exportado no formato solicitado
         """
         try:
             opcoes = opcoes or {}
+            render = render_cache or DocumentRenderCache(doc)
 
             if formato == "json":
                 # Exportar para JSON com opções
                 indent = opcoes.get("indent", 2)
-                return doc.export_to_dict(mode="json", by_alias=opcoes.get("by_alias", True))
+                return render.dict(mode="json", by_alias=opcoes.get("by_alias", True))
 
             elif formato == "markdown":
                 # Exportar para Markdown
-                return doc.export_to_markdown()
+                return render.markdown()
 
             elif formato == "html":
                 # Exportar para HTML
-                return doc.export_to_html()
+                return render.html()
 
             elif formato == "text":
                 # Exportar para texto simples
                 delim = opcoes.get("delim", "\n\n")
-                return doc.export_to_text(delim=delim)
+                return render.text(delim=delim)
 
             else:
                 raise ValueError(f"Formato não suportado: {formato}")
@@ -508,146 +628,73 @@ class DocumentConverterTool:
             logger.error(f"Erro ao exportar documento: {str(e)}")
             raise RuntimeError(f"Falha na exportação do documento: {str(e)}")
 
+    def iterar_tabelas(self, doc, formato="dict", linhas_por_lote=None):
+        """
+        Gera as tabelas do documento uma de cada vez, no formato solicitado.
+
+        Cada tabela é montada uma única vez no formato colunar (ver
+        src/tools/table_engine.py) e exportada a partir das mesmas colunas. Com
+        `linhas_por_lote`, tabelas grandes são divididas em lotes de linhas e só
+        o lote atual fica em memória, em cada formato.
+
+        Args:
+            doc: Documento processado pelo Docling
+            formato: Formato de saída ("pandas", "arrow", "dict", "markdown", "html")
+            linhas_por_lote: Linhas por item gerado (None: tabela inteira)
+
+        Yields:
+            dict: {"indice", "pagina", "inicio", "tabela"}; `inicio` é a primeira
+                linha de dados do lote
+
+        Raises:
+            ValueError: Se o formato não for suportado
+        """
+        exportadores = {
+            "pandas": ColumnarTable.to_pandas,
+            "arrow": ColumnarTable.to_arrow,
+            "dict": ColumnarTable.to_matrix,
+            "markdown": ColumnarTable.to_markdown,
+            "html": ColumnarTable.to_html,
+        }
+        if formato not in exportadores:
+            raise ValueError(f"Formato '{formato}' não suportado. Use 'pandas', 'arrow', 'dict', 'markdown' ou 'html'.")
+
+        exportar = exportadores[formato]
+        for tabela in iterar_tabelas(doc, linhas_por_lote):
+            try:
+                conteudo = exportar(tabela)
+            except ImportError:
+                if formato != "pandas":
+                    raise
+                logger.warning("Pandas não está instalado. Retornando como dicionário.")
+                conteudo = tabela.to_matrix()
+            yield {"indice": tabela.indice, "pagina": tabela.pagina, "inicio": tabela.inicio, "tabela": conteudo}
+
     def extrair_tabelas(self, doc, formato="pandas"):
         """
         Extrai todas as tabelas do documento em formato utilizável.
 
+        Materializa todas as tabelas de uma vez; para tabelas grandes, prefira
+        iterar_tabelas.
+
         Args:
             doc: Documento processado pelo Docling
-            formato: Formato de saída ("pandas", "dict", "markdown", "html")
+            formato: Formato de saída ("pandas", "arrow", "dict", "markdown", "html")
 
         Returns:
             list: Lista de tabelas no formato solicitado
         """
         try:
-            tabelas = []
-
             # Verificar se o documento tem tabelas
             if not hasattr(doc, "tables") or not doc.tables:
                 logger.info("Documento não contém tabelas")
-                return tabelas
+                return []
 
             logger.info(f"Documento contém {len(doc.tables)} tabelas")
-
-            for i, tabela in enumerate(doc.tables):
-                logger.debug(f"Processando tabela {i+1}")
-
-                # Verificar se a tabela tem dados
-                if not hasattr(tabela, "data") or not hasattr(tabela.data, "cells") or not tabela.data.cells:
-                    logger.warning(f"Tabela {i+1} não contém células")
-                    continue
-
-                # Determinar dimensões da tabela
-                max_row = max([cell.row for cell in tabela.data.cells]) if tabela.data.cells else -1
-                max_col = max([cell.col for cell in tabela.data.cells]) if tabela.data.cells else -1
-
-                if max_row < 0 or max_col < 0:
-                    logger.warning(f"Tabela {i+1} não tem dimensões válidas")
-                    continue
-
-                # Criar matriz vazia com as dimensões corretas
-                # Adicionar +1 porque os índices começam em 0
-                matriz = [[None for _ in range(max_col + 1)] for _ in range(max_row + 1)]
-
-                # Preencher com os dados das células
-                for cell in tabela.data.cells:
-                    if hasattr(cell, "text"):
-                        row_idx = cell.row if hasattr(cell, "row") else 0
-                        col_idx = cell.col if hasattr(cell, "col") else 0
-
-                        # Verificar índices
-                        if row_idx < len(matriz) and col_idx < len(matriz[0]):
-                            matriz[row_idx][col_idx] = cell.text
-
-                # Converter para o formato solicitado
-                if formato == "pandas":
-                    try:
-                        import pandas as pd
-                        df = pd.DataFrame(matriz)
-
-                        # Tentar usar a primeira linha como cabeçalho se parecer apropriado
-                        primeira_linha_vazia = all(v is None or v == "" for v in matriz[0])
-                        if not primeira_linha_vazia and len(matriz) > 1:
-                            # Pegar primeira linha como cabeçalho
-                            cabecalhos = matriz[0]
-                            df = pd.DataFrame(matriz[1:], columns=cabecalhos)
-
-                        tabelas.append({
-                            "indice": i,
-                            "tabela": df,
-                            "pagina": tabela.prov[0].page_no if hasattr(tabela, "prov") and tabela.prov else None
-                        })
-                    except ImportError:
-                        logger.warning("Pandas não está instalado. Retornando como dicionário.")
-                        tabelas.append({
-                            "indice": i,
-                            "tabela": matriz,
-                            "pagina": tabela.prov[0].page_no if hasattr(tabela, "prov") and tabela.prov else None
-                        })
-
-                elif formato == "dict":
-                    tabelas.append({
-                        "indice": i,
-                        "tabela": matriz,
-                        "pagina": tabela.prov[0].page_no if hasattr(tabela, "prov") and tabela.prov else None
-                    })
-
-                elif formato == "markdown":
-                    # Criar string markdown
-                    md_rows = []
-
-                    # Cabeçalho
-                    if matriz:
-                        cabecalho = " | ".join([str(c) if c is not None else "" for c in matriz[0]])
-                        md_rows.append(cabecalho)
-
-                        # Separador
-                        separador = " | ".join(["---" for _ in range(len(matriz[0]))])
-                        md_rows.append(separador)
-
-                        # Linhas de dados
-                        for row in matriz[1:]:
-                            linha = " | ".join([str(c) if c is not None else "" for c in row])
-                            md_rows.append(linha)
-
-                    tabelas.append({
-                        "indice": i,
-                        "tabela": "\n".join(md_rows),
-                        "pagina": tabela.prov[0].page_no if hasattr(tabela, "prov") and tabela.prov else None
-                    })
-
-                elif formato == "html":
-                    # Criar HTML
-                    html_rows = ["<table>"]
-
-                    # Cabeçalho
-                    if matriz:
-                        html_rows.append("  <thead>")
-                        html_rows.append("    <tr>")
-                        for cell in matriz[0]:
-                            html_rows.append(f"      <th>{str(cell) if cell is not None else ''}</th>")
-                        html_rows.append("    </tr>")
-                        html_rows.append("  </thead>")
-
-                        # Corpo da tabela
-                        html_rows.append("  <tbody>")
-                        for row in matriz[1:]:
-                            html_rows.append("    <tr>")
-                            for cell in row:
-                                html_rows.append(f"      <td>{str(cell) if cell is not None else ''}</td>")
-                            html_rows.append("    </tr>")
-                        html_rows.append("  </tbody>")
-
-                    html_rows.append("</table>")
-
-                    tabelas.append({
-                        "indice": i,
-                        "tabela": "\n".join(html_rows),
-                        "pagina": tabela.prov[0].page_no if hasattr(tabela, "prov") and tabela.prov else None
-                    })
-
-                else:
-                    raise ValueError(f"Formato '{formato}' não suportado. Use 'pandas', 'dict', 'markdown' ou 'html'.")
+            tabelas = [
+                {"indice": item["indice"], "tabela": item["tabela"], "pagina": item["pagina"]}
+                for item in self.iterar_tabelas(doc, formato)
+            ]
 
             logger.info(f"Extraídas {len(tabelas)} tabelas no formato {formato}")
             return tabelas
@@ -656,6 +703,24 @@ class DocumentConverterTool:
             logger.error(f"Erro ao extrair tabelas: {str(e)}")
             return []
 
+    def salvar_tabelas(self, doc, caminho, formato="parquet"):
+        """
+        Grava todas as tabelas do documento em um único arquivo Parquet ou Feather.
+
+        Args:
+            doc: Documento processado pelo Docling
+            caminho: Arquivo de destino
+            formato: "parquet" ou "feather"
+
+        Returns:
+            str: Caminho do arquivo gravado
+
+        Raises:
+            ValueError: Se o formato não for suportado
+            ImportError: Se o pyarrow não estiver instalado
+        """
+        return salvar_tabelas(extrair_tabelas_colunares(doc), caminho, formato)
+
     def processar_em_lote(self, diretorio, padrao="*.pdf", opcoes=None):
         """
         Processa vários documentos em um diretório seguindo um padrão.
@@ -666,8 +731,12 @@ class DocumentConverterTool:
             opcoes: Dicionário com opções de processamento:
                    - visualizar: Gerar visualização HTML
                    - buscar: Texto para buscar no documento
+                   - indexar: Salvar o índice de busca (<nome>.search.json), para
+                     buscas posteriores com search_index.buscar_em_diretorio
                    - classificar: Classificar imagens
                    - limite_confianca: Limite para classificação de imagens
+                   - tabelas: Salvar as tabelas em NDJSON, em lotes de linhas
+                   - linhas_por_lote: Linhas por lote das tabelas (padrão: TABLE_BATCH_ROWS)
                    - diretorio_saida: Diretório para salvar resultados
 
         Returns:
@@ -714,11 +783,22 @@ class DocumentConverterTool:
                     "caminho": arquivo
                 }
 
-                # Buscar texto, se solicitado
+                # Índice de busca, montado uma vez por documento
                 buscar_texto = opcoes.get("buscar")
+                indice = None
+                if buscar_texto or opcoes.get("indexar", False):
+                    try:
+                        indice = self.indexar_texto(doc['doc'])
+                        if opcoes.get("indexar", False):
+                            caminho_indice = indice.salvar(os.path.join(diretorio_saida, f"{Path(arquivo).stem}.search.json"))
+                            resultados[arquivo]["indice_busca"] = caminho_indice
+                    except Exception as e:
+                        logger.error(f"Erro ao indexar texto de {nome_arquivo}: {str(e)}")
+
+                # Buscar texto, se solicitado
                 if buscar_texto:
                     try:
-                        resultados_busca = self.buscar_texto_com_posicao(doc['doc'], buscar_texto)
+                        resultados_busca = self.buscar_texto_com_posicao(doc['doc'], buscar_texto, indice=indice)
                         resultados[arquivo]["busca"] = {
                             "texto": buscar_texto,
                             "resultados": len(resultados_busca)
@@ -806,6 +886,26 @@ class DocumentConverterTool:
                         logger.error(erro_msg)
                         resultados[arquivo]["classificacao"] = {"erro": erro_msg}
 
+                # Salvar tabelas em NDJSON, se solicitado
+                if opcoes.get("tabelas", False):
+                    try:
+                        linhas_por_lote = opcoes.get("linhas_por_lote", TABLE_BATCH_ROWS)
+                        caminho_tabelas = os.path.join(diretorio_saida, f"tabelas_{Path(arquivo).stem}.ndjson")
+                        lotes = 0
+                        with open(caminho_tabelas, "w", encoding="utf-8") as f:
+                            # Um lote por vez: tabelas grandes não ficam inteiras em memória
+                            for linha in iterar_ndjson(iterar_tabelas(doc['doc'], linhas_por_lote)):
+                                f.write(linha)
+                                lotes += 1
+
+                        resultados[arquivo]["tabelas"] = {"lotes": lotes, "arquivo_resultados": caminho_tabelas}
+                        logger.info(f"Tabelas de {nome_arquivo} salvas em: {caminho_tabelas}")
+
+                    except Exception as e:
+                        erro_msg = f"Erro ao salvar tabelas: {str(e)}"
+                        logger.error(erro_msg)
+                        resultados[arquivo]["tabelas"] = {"erro": erro_msg}
+
                 # Gerar visualização HTML, se solicitado
                 visualizar = opcoes.get("visualizar", False)
                 if visualizar:
@@ -0,0 +1,124 @@
+"""
+Percurso da árvore de um documento Docling (doc.body e descendentes).
+
+O percurso usa uma pilha explícita, sem recursão, e resolve cada referência
+(cref, ex: "#/texts/3") uma única vez. A árvore pode ser montada aninhada
+(dicionários com "filhos") ou plana, com o índice do pai de cada nó, que é
+bem menor para serializar.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Marcador de saída de um nó na pilha (fim do caminho atual)
+_SAIR = object()
+
+
+def _pagina(node) -> Optional[int]:
+    prov = getattr(node, "prov", None)
+    return getattr(prov[0], "page_no", None) if prov else None
+
+
+def percorrer_arvore(doc, raiz=None) -> Iterator[Tuple[int, int, Any]]:
+    """
+    Percorre a árvore em pré-ordem, com pilha explícita.
+
+    Referências repetidas são resolvidas uma única vez. Um filho que aponta
+    para um ancestral (ciclo) é ignorado com aviso.
+
+    Args:
+        doc: Documento processado pelo Docling
+        raiz: Nó inicial (padrão: doc.body)
+
+    Yields:
+        (índice, índice do pai, nó): a raiz tem pai -1
+    """
+    raiz = doc.body if raiz is None else raiz
+    resolvidos: Dict[str, Any] = {}
+    caminho = set()
+    pilha: List[Any] = [(raiz, getattr(raiz, "self_ref", None), -1)]
+    indice = 0
+
+    while pilha:
+        entrada = pilha.pop()
+        if entrada[0] is _SAIR:
+            caminho.discard(entrada[1])
+            continue
+
+        node, cref, pai = entrada
+        atual = indice
+        indice += 1
+        yield atual, pai, node
+
+        filhos = getattr(node, "children", None)
+        if not filhos:
+            continue
+        caminho.add(cref)
+        pilha.append((_SAIR, cref))
+
+        # Empilhados em ordem inversa para sair na ordem original
+        for ref in reversed(filhos):
+            filho_cref = getattr(ref, "cref", None)
+            if filho_cref in caminho:
+                logger.warning(f"Referência cíclica ignorada: {filho_cref}")
+                continue
+            try:
+                if filho_cref in resolvidos:
+                    child = resolvidos[filho_cref]
+                else:
+                    child = resolvidos[filho_cref] = ref.resolve(doc)
+            except Exception as e:
+                logger.warning(f"Erro ao resolver referência de filho: {str(e)}")
+                continue
+            if child:
+                pilha.append((child, filho_cref, atual))
+
+
+def estrutura_aninhada(doc) -> Dict[str, Any]:
+    """
+    Árvore do documento em dicionários aninhados.
+
+    Cada nó: {"tipo", "texto", "filhos"}, mais "pagina" quando tem proveniência.
+    """
+    nos: List[Dict[str, Any]] = []
+    for _, pai, node in percorrer_arvore(doc):
+        resultado = {
+            "tipo": str(node.label) if hasattr(node, "label") else "node",
+            "texto": getattr(node, "text", ""),
+            "filhos": []
+        }
+        if getattr(node, "prov", None):
+            resultado["pagina"] = _pagina(node)
+        if pai >= 0:
+            nos[pai]["filhos"].append(resultado)
+        nos.append(resultado)
+    return nos[0]
+
+
+def estrutura_plana(doc) -> Dict[str, Any]:
+    """
+    Árvore do documento em listas paralelas, em pré-ordem.
+
+    Returns:
+        dict: {"pais", "tipos", "categorias", "textos", "paginas"}; `pais[i]`
+            é o índice do pai do nó i (-1 na raiz) e `tipos[i]` indexa
+            `categorias`
+    """
+    codigos: Dict[str, int] = {}
+    pais, tipos, textos, paginas = [], [], [], []
+    for _, pai, node in percorrer_arvore(doc):
+        tipo = str(node.label) if hasattr(node, "label") else "node"
+        pais.append(pai)
+        tipos.append(codigos.setdefault(tipo, len(codigos)))
+        textos.append(getattr(node, "text", ""))
+        paginas.append(_pagina(node))
+    return {
+        "pais": pais,
+        "tipos": tipos,
+        "categorias": list(codigos),
+        "textos": textos,
+        "paginas": paginas
+    }
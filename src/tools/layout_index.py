@@ -0,0 +1,217 @@
+"""
+Índice espacial do layout de um documento Docling.
+
+O layout é guardado em vetores NumPy por documento (um elemento por
+proveniência): caixas delimitadoras, páginas, níveis e rótulos como códigos
+categóricos. Cada página tem uma grade uniforme que aponta para os elementos
+de cada célula, o que permite consultas por região sem percorrer a página
+inteira. O formato em dicionários (extrair_layout) só é montado sob demanda.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Células por eixo na grade de cada página
+GRADE_PADRAO = 16
+
+_VAZIO = np.empty(0, dtype=np.int32)
+
+
+class _GradePagina:
+    """Grade uniforme de uma página: célula (coluna, linha) -> índices dos elementos."""
+
+    def __init__(self, indices, x0, y0, x1, y1, largura, altura, tamanho):
+        self.tamanho = tamanho
+        self.passo_x = (largura or 1.0) / tamanho
+        self.passo_y = (altura or 1.0) / tamanho
+
+        celulas: Dict[Tuple[int, int], List[int]] = {}
+        cx0, cx1 = self._faixa(x0, x1, self.passo_x)
+        cy0, cy1 = self._faixa(y0, y1, self.passo_y)
+        for i, a0, a1, b0, b1 in zip(indices.tolist(), cx0.tolist(), cx1.tolist(), cy0.tolist(), cy1.tolist()):
+            for cx in range(a0, a1 + 1):
+                for cy in range(b0, b1 + 1):
+                    celulas.setdefault((cx, cy), []).append(i)
+        self.celulas = {celula: np.array(lista, dtype=np.int32) for celula, lista in celulas.items()}
+
+    def _faixa(self, inicio, fim, passo):
+        # Elementos fora da página ficam nas células da borda
+        limite = self.tamanho - 1
+        return (
+            np.clip(np.floor(inicio / passo), 0, limite).astype(int),
+            np.clip(np.floor(fim / passo), 0, limite).astype(int),
+        )
+
+    def candidatos(self, x0, y0, x1, y1) -> np.ndarray:
+        """Índices (ordenados, sem repetição) dos elementos nas células que tocam a região."""
+        (cx0,), (cx1,) = self._faixa(np.array([x0]), np.array([x1]), self.passo_x)
+        (cy0,), (cy1,) = self._faixa(np.array([y0]), np.array([y1]), self.passo_y)
+        blocos = [
+            self.celulas[(cx, cy)]
+            for cx in range(cx0, cx1 + 1)
+            for cy in range(cy0, cy1 + 1)
+            if (cx, cy) in self.celulas
+        ]
+        if not blocos:
+            return _VAZIO
+        return np.unique(np.concatenate(blocos))
+
+
+class LayoutIndex:
+    """
+    Layout de um documento em vetores, com índice espacial por página.
+
+    Os índices retornados pelas consultas seguem a ordem de leitura do
+    documento (a ordem de doc.iterate_items).
+
+    Attributes:
+        bboxes (np.ndarray): (n, 4) com l, t, r, b na origem original (NaN sem bbox)
+        paginas (np.ndarray): Página de cada elemento (-1 se desconhecida)
+        niveis (np.ndarray): Nível hierárquico de cada elemento
+        rotulos (np.ndarray): Código do rótulo de cada elemento (ver categorias)
+        categorias (list): Rótulos distintos, na ordem dos códigos
+
+    Exemplo:
+        index = LayoutIndex(doc)
+        index.na_regiao(1, 0, 0, 300, 200)       # elementos dentro do retângulo
+        index.ordem_leitura(2)                    # elementos da página 2, em ordem
+        index.elemento(i)                         # dict no formato de extrair_layout
+    """
+
+    def __init__(self, doc, tamanho_grade: int = GRADE_PADRAO):
+        """
+        Args:
+            doc: Documento processado pelo Docling
+            tamanho_grade: Células por eixo na grade de cada página
+        """
+        self.num_paginas = doc.num_pages()
+        self._nos: List[Any] = []
+        codigos: Dict[str, int] = {}
+        caixas, paginas, niveis, rotulos, origens = [], [], [], [], []
+        origem_codigos: Dict[Optional[str], int] = {}
+
+        # Uma passada pelos itens; só os valores numéricos são copiados
+        for node, level in doc.iterate_items(with_groups=True):
+            for prov in getattr(node, "prov", None) or ():
+                bbox = getattr(prov, "bbox", None)
+                if bbox is not None:
+                    caixas.append((bbox.l, bbox.t, bbox.r, bbox.b))
+                    origem = str(bbox.coord_origin)
+                else:
+                    caixas.append((np.nan,) * 4)
+                    origem = None
+                tipo = str(getattr(node, "label", "desconhecido"))
+                rotulos.append(codigos.setdefault(tipo, len(codigos)))
+                origens.append(origem_codigos.setdefault(origem, len(origem_codigos)))
+                paginas.append(getattr(prov, "page_no", -1))
+                niveis.append(level)
+                self._nos.append(node)
+
+        self.categorias: List[str] = list(codigos)
+        self._origens: List[Optional[str]] = list(origem_codigos)
+        self.bboxes = np.array(caixas, dtype=np.float64).reshape(-1, 4)
+        self.paginas = np.array(paginas, dtype=np.int32)
+        self.niveis = np.array(niveis, dtype=np.int16)
+        self.rotulos = np.array(rotulos, dtype=np.int16)
+        self.origens = np.array(origens, dtype=np.int8)
+
+        # Caixas normalizadas (x0 <= x1, y0 <= y1), independentes da origem
+        l, t, r, b = self.bboxes.T
+        self._x0, self._x1 = np.fmin(l, r), np.fmax(l, r)
+        self._y0, self._y1 = np.fmin(t, b), np.fmax(t, b)
+
+        # Elementos agrupados por página, preservando a ordem de leitura
+        ordem = np.argsort(self.paginas, kind="stable").astype(np.int32)
+        valores, inicios = np.unique(self.paginas[ordem], return_index=True)
+        self._por_pagina = dict(zip(valores.tolist(), np.split(ordem, inicios[1:])))
+
+        self._grades: Dict[int, _GradePagina] = {}
+        for pagina, indices in self._por_pagina.items():
+            indices = indices[~np.isnan(self._x0[indices])]
+            if not len(indices):
+                continue
+            largura, altura = self._tamanho_pagina(doc, pagina, indices)
+            self._grades[pagina] = _GradePagina(
+                indices, self._x0[indices], self._y0[indices], self._x1[indices], self._y1[indices],
+                largura, altura, tamanho_grade
+            )
+
+        logger.debug(f"Layout indexado: {len(self)} elementos em {len(self._grades)} páginas")
+
+    def _tamanho_pagina(self, doc, pagina, indices) -> Tuple[float, float]:
+        page = getattr(doc, "pages", {}).get(pagina)
+        size = getattr(page, "size", None)
+        if size is not None and size.width and size.height:
+            return float(size.width), float(size.height)
+        # Sem tamanho da página: usar a extensão dos elementos
+        return float(self._x1[indices].max()), float(self._y1[indices].max())
+
+    def __len__(self) -> int:
+        return len(self._nos)
+
+    def rotulo(self, i: int) -> str:
+        """Rótulo (tipo) do elemento i."""
+        return self.categorias[self.rotulos[i]]
+
+    def ordem_leitura(self, pagina: int) -> np.ndarray:
+        """Índices dos elementos da página, na ordem de leitura."""
+        return self._por_pagina.get(pagina, _VAZIO)
+
+    def na_regiao(self, pagina: int, l: float, t: float, r: float, b: float, contido: bool = True) -> np.ndarray:
+        """
+        Elementos da página dentro de um retângulo, na ordem de leitura.
+
+        O retângulo usa o mesmo sistema de coordenadas das caixas do documento;
+        a ordem dos lados não importa (t/b podem estar invertidos).
+
+        Args:
+            pagina: Número da página
+            l, t, r, b: Lados do retângulo
+            contido: True para elementos inteiramente dentro; False para
+                qualquer interseção
+
+        Returns:
+            np.ndarray: Índices dos elementos
+        """
+        grade = self._grades.get(pagina)
+        if grade is None:
+            return _VAZIO
+        x0, x1 = min(l, r), max(l, r)
+        y0, y1 = min(t, b), max(t, b)
+
+        candidatos = grade.candidatos(x0, y0, x1, y1)
+        cx0, cx1 = self._x0[candidatos], self._x1[candidatos]
+        cy0, cy1 = self._y0[candidatos], self._y1[candidatos]
+        if contido:
+            mascara = (cx0 >= x0) & (cx1 <= x1) & (cy0 >= y0) & (cy1 <= y1)
+        else:
+            mascara = (cx0 <= x1) & (cx1 >= x0) & (cy0 <= y1) & (cy1 >= y0)
+        return candidatos[mascara]
+
+    def elemento(self, i: int) -> Dict[str, Any]:
+        """Elemento i no formato de dicionário de extrair_layout."""
+        node = self._nos[i]
+        origem = self._origens[self.origens[i]]
+        posicao = None
+        if origem is not None:
+            l, t, r, b = self.bboxes[i].tolist()
+            posicao = {"left": l, "top": t, "right": r, "bottom": b, "coordenadas_origem": origem}
+        pagina = int(self.paginas[i])
+        return {
+            "tipo": self.rotulo(i),
+            "nivel": int(self.niveis[i]),
+            "pagina": pagina if pagina >= 0 else None,
+            "posicao": posicao,
+            "texto": getattr(node, "text", "")
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Layout completo no formato de extrair_layout ({"paginas", "elementos"})."""
+        return {
+            "paginas": self.num_paginas,
+            "elementos": [self.elemento(i) for i in range(len(self))]
+        }
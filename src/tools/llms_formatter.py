@@ -5,15 +5,365 @@ Este módulo formata documentos processados pelo Docling no formato LLMs.txt,
 que é otimizado para modelos de linguagem.
 """
 
+import json
 import re
 from datetime import datetime
+from itertools import islice
 from src.utils.logging_config import setup_logger
-from src.tools.token_counter import count_tokens
-from src.config import MIN_PARAGRAPH_LENGTH, MAX_SUMMARY_PARAGRAPHS, MAX_SUMMARY_LENGTH
+from src.tools.token_counter import count_tokens, count_tokens_batch
+from src.tools.render_cache import DocumentRenderCache
+from src.config import MIN_PARAGRAPH_LENGTH, MAX_SUMMARY_PARAGRAPHS, MAX_SUMMARY_LENGTH, LLMS_CUSTOM_PROFILES
 
 # Configurar logger para este módulo
 logger = setup_logger(__name__)
 
+# Padrões pré-compilados. As classes de caracteres negadas (sem `.*?`) não
+# atravessam "[" nem quebras de linha: cada tentativa de match termina no
+# próximo "[", o que mantém o tempo linear mesmo com blobs base64 de vários MB
+# ou longas sequências de "[" / "![" sem fechamento.
+_IMAGEM_DATA_URI = r'!\[[^\[\]\n]*\]\(data:image/[^)\s\[]*\)'
+_IMAGEM = r'!\[[^\[\]\n]*\]\([^)\[\n]*\)'
+# Links com URL; os longos (LINK_URL_MINIMA+ caracteres após o esquema) são
+# trocados pelo texto em _substituir_limpeza. Nem o texto nem a URL passam de
+# um "[" ou de uma quebra de linha, então um "[" ou "](http" sem fechamento não
+# percorre o resto do documento. A URL aceita um nível de parênteses
+# balanceados (ex: Wikipedia).
+_LINK_LONGO = r'\[(?P<texto>[^\[\]\n]+)\]\((?P<url>https?://(?:[^\s()\[\]]|\([^\s()\[\]]*\))+)\)'
+_LINK_URL_MINIMA = 60
+
+_IMAGEM_DATA_URI_PATTERN = re.compile(_IMAGEM_DATA_URI)
+# Limpeza completa em uma única passada: imagens, links longos e quebras extras
+_LIMPEZA_PATTERN = re.compile(
+    rf'(?P<imagem>{_IMAGEM})|(?P<link>{_LINK_LONGO})|(?P<quebras>\n{{3,}})'
+)
+_PARAGRAFO_SEPARADOR = re.compile(r'\n\s*\n')
+_TITULO_PATTERN = re.compile(r'^#+\s+(.+)$', re.MULTILINE)
+
+
+def _substituir_limpeza(match):
+    if match.lastgroup == "imagem":
+        return '[IMAGEM]'
+    if match.lastgroup == "link":
+        if len(match.group("url").partition("://")[2]) < _LINK_URL_MINIMA:
+            return match.group(0)
+        return match.group("texto")
+    return '\n\n'
+
+
+def remover_imagens_embutidas(content):
+    """Substitui imagens embutidas como data URI por [IMAGEM]."""
+    if "data:image/" not in content:
+        return content
+    return _IMAGEM_DATA_URI_PATTERN.sub('[IMAGEM]', content)
+
+
+def _iterar_paragrafos(content):
+    """Itera sob demanda pelos parágrafos (separados por linhas em branco) do texto."""
+    inicio = 0
+    for match in _PARAGRAFO_SEPARADOR.finditer(content):
+        yield content[inicio:match.start()]
+        inicio = match.end()
+    yield content[inicio:]
+
+
+class _EmissorLLMS:
+    """
+    Emite as partes de um documento LLMs.txt (separadas por linha em branco)
+    e conta os tokens de cada seção quando ela é fechada.
+
+    Uma seção vai do "#" do seu título até o "#" do título seguinte; o
+    separador e as quebras de linha iniciais do próximo título pertencem à
+    seção anterior. Assim a soma das seções é igual à contagem do texto
+    completo, e só a seção atual precisa ficar em memória.
+    """
+
+    def __init__(self, write, modelo_llm, contar_tokens):
+        self._write = write
+        self.modelo_llm = modelo_llm
+        self.contar_tokens = contar_tokens
+        self.secoes = {}
+        self.caracteres = 0
+        self._iniciado = False
+        self._titulo = None
+        self._partes = []
+
+    @property
+    def total(self):
+        """Tokens das seções já fechadas."""
+        return sum(self.secoes.values())
+
+    def _escrever(self, texto):
+        self._write(texto)
+        self.caracteres += len(texto)
+
+    def parte(self, texto):
+        """Emite uma parte do documento."""
+        if self._iniciado:
+            self._escrever("\n\n")
+        self._iniciado = True
+        self._escrever(texto)
+        if self.contar_tokens and self._titulo is not None:
+            self._partes.append(texto)
+
+    def secao(self, titulo):
+        """Fecha a seção atual e emite o título de uma nova."""
+        self._fechar_secao("\n\n" + titulo[:len(titulo) - len(titulo.lstrip("\n"))])
+        self._titulo = titulo.strip()
+        self.parte(titulo)
+
+    def fechar(self):
+        """Fecha a última seção."""
+        self._fechar_secao("")
+
+    def _fechar_secao(self, sufixo):
+        if self._titulo is None:
+            return
+        if self.contar_tokens:
+            texto = "\n\n".join(self._partes).lstrip("\n") + sufixo
+            self.secoes[self._titulo] = count_tokens(texto, self.modelo_llm)
+        self._titulo = None
+        self._partes = []
+
+
+class Secao:
+    """
+    Produtor registrado de uma seção do LLMs.txt.
+
+    Attributes:
+        nome (str): Nome usado nos perfis (ex: "tables")
+        produtor (callable): Função (contexto, saida) que emite a seção
+        requer (tuple): Dados de que a seção depende (ver DADOS_SECAO), obtidos
+            com contexto.obter(nome)
+    """
+
+    def __init__(self, nome, produtor, requer=()):
+        self.nome = nome
+        self.produtor = produtor
+        self.requer = tuple(requer)
+
+
+# Seções disponíveis para os perfis: nome -> Secao
+SECOES = {}
+
+# Dados que uma seção pode declarar em `requer`. "tokens" ativa a contagem de
+# tokens das seções emitidas; os demais são calculados por _ContextoFormatacao.
+DADOS_SECAO = ("markdown", "tables", "images", "raw_text", "tokens")
+
+
+def registrar_secao(nome, requer=()):
+    """
+    Decorador que registra uma função como produtora da seção `nome`.
+
+    Exemplo:
+        @registrar_secao("tables")
+        def _secao_tabelas(contexto, saida):
+            ...
+    """
+    desconhecidos = set(requer) - set(DADOS_SECAO)
+    if desconhecidos:
+        raise ValueError(f"Dados desconhecidos em requer da seção '{nome}': {', '.join(sorted(desconhecidos))}")
+
+    def decorador(produtor):
+        SECOES[nome] = Secao(nome, produtor, requer)
+        return produtor
+    return decorador
+
+
+class _ContextoFormatacao:
+    """
+    Dados do documento compartilhados pelas seções, obtidos sob demanda.
+
+    Cada seção acessa apenas os dados que declarou em `requer`; um dado só é
+    calculado quando alguma seção do perfil o pede, e uma única vez.
+    """
+
+    def __init__(self, formatter, doc, title, date, source, modelo_llm, render_cache=None):
+        self.formatter = formatter
+        self.doc = doc
+        self.title = title
+        self.date = date
+        self.source = source
+        self.modelo_llm = modelo_llm
+        self._render_cache = render_cache
+        self._dados = {}
+        self._secao = None
+
+    def executar(self, secao, saida):
+        """Executa o produtor da seção com acesso aos dados que ela declarou."""
+        self._secao = secao
+        try:
+            secao.produtor(self, saida)
+        finally:
+            self._secao = None
+
+    def obter(self, nome):
+        """
+        Retorna um dado declarado em `requer` pela seção em execução.
+
+        Raises:
+            RuntimeError: Se a seção não declarou o dado
+        """
+        if self._secao is None or nome not in self._secao.requer:
+            secao = self._secao.nome if self._secao else None
+            raise RuntimeError(f"Seção '{secao}' não declarou '{nome}' em requer")
+        if nome not in self._dados:
+            self._dados[nome] = getattr(self, f"_obter_{nome}")()
+        return self._dados[nome]
+
+    def _obter_markdown(self):
+        # Documentos legados (sem export_to_markdown) não têm markdown
+        if not hasattr(self.doc, 'export_to_markdown'):
+            return None
+        return self.render.markdown()
+
+    def _obter_tables(self):
+        if hasattr(self.doc, 'tables'):
+            return self.doc.tables
+        # Método legado: extrair das chunks
+        return [table for chunk in self.doc.chunks if getattr(chunk, 'tables', None) for table in chunk.tables]
+
+    def _obter_images(self):
+        if hasattr(self.doc, 'images'):
+            return self.doc.images
+        # Método legado: extrair das chunks
+        return [img for chunk in self.doc.chunks if getattr(chunk, 'images', None) for img in chunk.images]
+
+    def _obter_raw_text(self):
+        return getattr(self.doc, 'raw_text', None)
+
+    @property
+    def render(self):
+        """Cache de exportações, criado só quando alguma seção exporta o documento."""
+        if self._render_cache is None:
+            self._render_cache = DocumentRenderCache(self.doc)
+        return self._render_cache
+
+
+class _ColetorSecoes:
+    """
+    Coleta em memória as seções emitidas, agrupadas pelo produtor que as
+    gerou. Usado no modo com orçamento de tokens, que precisa ver todas as
+    seções antes de decidir o que emitir.
+    """
+
+    def __init__(self):
+        self.grupos = []
+
+    @property
+    def total(self):
+        return 0
+
+    def iniciar(self, nome):
+        """Inicia o grupo de seções de um produtor."""
+        self.grupos.append((nome, []))
+
+    def secao(self, titulo):
+        self.grupos[-1][1].append([titulo])
+
+    def parte(self, texto):
+        secoes = self.grupos[-1][1]
+        if secoes:
+            secoes[-1].append(texto)
+
+    def fechar(self):
+        pass
+
+
+# Ordem em que as seções são removidas ou truncadas para caber no orçamento de
+# tokens (a primeira sai antes). Seções não listadas saem primeiro; os
+# metadados nunca são removidos.
+PRIORIDADE_ORCAMENTO = ("raw", "images", "tables", "content", "summary_auto", "summary")
+
+# Seções truncadas em limites de parágrafo em vez de removidas
+SECOES_TRUNCAVEIS = ("content", "summary_auto", "summary")
+
+# Parágrafos contados por lote ao truncar uma seção
+_PARAGRAFOS_POR_LOTE = 256
+
+
+def _texto_grupo(secoes_grupo):
+    # Texto do grupo como emitido, incluindo o separador que o segue
+    return "\n\n".join(parte for secao in secoes_grupo for parte in secao) + "\n\n"
+
+
+def _linhas_orcamento(modelo_llm, usados, max_tokens, removidas, truncadas):
+    linhas = [f"Total tokens ({modelo_llm}): {usados} / {max_tokens} ({usados / max_tokens * 100:.1f}%)"]
+    if removidas:
+        linhas.append(f"Seções removidas: {', '.join(removidas)}")
+    if truncadas:
+        linhas.append(f"Seções truncadas: {', '.join(truncadas)}")
+    return linhas
+
+
+def _em_lotes(itens, tamanho):
+    itens = iter(itens)
+    while lote := list(islice(itens, tamanho)):
+        yield lote
+
+
+def _truncar_grupo(secoes_grupo, disponivel, modelo_llm):
+    """
+    Mantém o maior prefixo de parágrafos da primeira seção do grupo que cabe
+    em `disponivel` tokens. Os parágrafos são contados em lotes, parando no
+    primeiro que não cabe.
+
+    Returns:
+        tuple: (seções truncadas, tokens estimados), ou (None, 0) se nem um
+            parágrafo couber
+    """
+    titulo, *corpo = secoes_grupo[0]
+    usados = count_tokens(titulo + "\n\n", modelo_llm)
+    mantidos = []
+    paragrafos = (p for p in _iterar_paragrafos("\n\n".join(corpo)) if p.strip())
+    for lote in _em_lotes(paragrafos, _PARAGRAFOS_POR_LOTE):
+        for paragrafo, tokens in zip(lote, count_tokens_batch(lote, modelo_llm)):
+            # Cada parágrafo é seguido de um separador (~1 token)
+            if usados + tokens + 1 > disponivel:
+                break
+            usados += tokens + 1
+            mantidos.append(paragrafo)
+        else:
+            continue
+        break
+
+    if not mantidos:
+        return None, 0
+    return [[titulo, "\n\n".join(mantidos)]], usados
+
+
+def _prioridade(nome):
+    return PRIORIDADE_ORCAMENTO.index(nome) if nome in PRIORIDADE_ORCAMENTO else -1
+
+
+def _ajustar_ao_orcamento(grupos, tokens, limite, modelo_llm):
+    """
+    Escolhe os grupos de seções que cabem em `limite` tokens.
+
+    Returns:
+        tuple: (grupos mantidos em ordem, nomes removidos, nomes truncados)
+    """
+    mantidos = dict(enumerate(grupos))
+    total = sum(tokens)
+    removidas, truncadas = [], []
+    ordem = sorted((i for i, (nome, _) in enumerate(grupos) if nome != "metadata"),
+                   key=lambda i: _prioridade(grupos[i][0]))
+    for i in ordem:
+        if total <= limite:
+            break
+        nome, secoes_grupo = grupos[i]
+        if nome in SECOES_TRUNCAVEIS:
+            truncado, usados = _truncar_grupo(secoes_grupo, limite - (total - tokens[i]), modelo_llm)
+            if truncado:
+                mantidos[i] = (nome, truncado)
+                total += usados - tokens[i]
+                truncadas.append(nome)
+                continue
+        del mantidos[i]
+        total -= tokens[i]
+        removidas.append(nome)
+    return [mantidos[i] for i in sorted(mantidos)], removidas, truncadas
+
+
 class LLMSFormatter:
     """
     Classe para formatar documentos no padrão LLMs.txt.
@@ -25,7 +375,8 @@ class LLMSFormatter:
         """
         logger.debug("Inicializando LLMSFormatter")
         
-    def format(self, doc, title="", date="", source="", profile="llms-full", modelo_llm="gpt-3.5-turbo"):
+    def format(self, doc, title="", date="", source="", profile="llms-full", modelo_llm="gpt-3.5-turbo",
+               render_cache=None, max_tokens=None):
         """
         Formata um documento Docling no padrão LLMs.txt.
         
@@ -36,6 +387,11 @@ class LLMSFormatter:
             source (str): Fonte do documento
             profile (str): Perfil de formatação ('llms-full', 'llms-min', etc)
             modelo_llm (str): Nome do modelo para contagem de tokens
+            render_cache (DocumentRenderCache): Cache de exportações do documento,
+                compartilhado com outros exportadores do mesmo job (opcional)
+            max_tokens (int): Orçamento de tokens do documento (opcional). Seções são
+                removidas ou truncadas por prioridade até caber, e a seção
+                "# Token Budget" substitui a análise de tokens
             
         Returns:
             str: Texto formatado no padrão LLMs.txt
@@ -43,194 +399,207 @@ class LLMSFormatter:
         Raises:
             ValueError: Se o perfil não for reconhecido
         """
+        texto, _ = self._formatar_texto(doc, title, date, source, profile, modelo_llm, False, render_cache,
+                                        max_tokens)
+        return texto
+
+    def formatar_com_tokens(self, doc, title="", date="", source="", profile="llms-full", modelo_llm="gpt-3.5-turbo",
+                            render_cache=None, max_tokens=None):
+        """
+        Formata o documento e conta os tokens de cada seção à medida que é emitida.
+
+        As seções são delimitadas no início de cada título (`# ...`), onde a
+        tokenização BPE sempre quebra; por isso a soma das seções é igual à
+        contagem do texto completo, sem precisar tokenizá-lo novamente.
+
+        Args:
+            (mesmos de format)
+
+        Returns:
+            tuple: (texto LLMs.txt, estatísticas de tokens ou None em caso de erro)
+                Estatísticas: {"model": modelo, "total": int, "sections": {título: tokens}}
+                e, com max_tokens, "budget": {"max_tokens", "removed", "truncated"}
+        """
+        return self._formatar_texto(doc, title, date, source, profile, modelo_llm, True, render_cache,
+                                    max_tokens)
+
+    def format_to(self, stream, doc, title="", date="", source="", profile="llms-full",
+                  modelo_llm="gpt-3.5-turbo", render_cache=None, contar_tokens=False, max_tokens=None):
+        """
+        Escreve o documento no padrão LLMs.txt diretamente em um stream.
+
+        Cada parte é escrita assim que gerada, sem montar o texto completo em
+        memória (exceto com max_tokens, que precisa de todas as seções antes de
+        escolher o que cabe). Em caso de erro, o conteúdo já escrito é mantido
+        e seguido pelo bloco de erro.
+
+        Args:
+            stream: Objeto com write(str), ex: arquivo aberto em modo texto,
+                sys.stdout ou socket.makefile("w")
+            contar_tokens (bool): Se True, conta os tokens de cada seção
+            (demais argumentos iguais aos de format)
+
+        Returns:
+            dict: Estatísticas de tokens (como em formatar_com_tokens), ou None
+        """
         try:
-            logger.info(f"Formatando documento usando perfil '{profile}'")
-            
-            # Validar perfil
-            valid_profiles = ["llms-min", "llms-ctx", "llms-tables", "llms-images", "llms-raw", "llms-full"]
-            if profile not in valid_profiles:
-                logger.warning(f"Perfil '{profile}' não reconhecido. Usando 'llms-full'.")
-                profile = "llms-full"
-            
-            # Metadados mais detalhados
-            metadados = {}
-            
-            # Metadados básicos
-            if title:
-                metadados["Title"] = title
-            if date:
-                metadados["Date"] = date
-            if source:
-                metadados["Source"] = source
-                
-            # Detectar autor se disponível
-            if hasattr(doc, "metadata") and doc.metadata:
-                if "author" in doc.metadata:
-                    metadados["Author"] = doc.metadata["author"]
-                elif "creator" in doc.metadata:
-                    metadados["Author"] = doc.metadata["creator"]
-                    
-                # Adicionar outros metadados relevantes
-                for key in ["subject", "keywords", "language", "created", "modified"]:
-                    if key in doc.metadata:
-                        metadados[key.title()] = doc.metadata[key]
-            
-            # Iniciar com metadados
-            result = []
-            for key, value in metadados.items():
-                if value:
-                    result.append(f"# {key}: {value}")
-            
-            # Extrair e formatar summary
-            try:
-                # Verificar se tem summary explícito
-                if hasattr(doc, 'summary') and doc.summary:
-                    summary = doc.summary
-                    result.append("# Summary")
-                    result.append(summary)
-                    logger.debug("Adicionado summary ao documento formatado")
-                # Se não tem summary, gerar a partir do conteúdo
-                elif profile in ["llms-ctx", "llms-full"]:
-                    # Extrair primeiro parágrafo significativo
-                    summary = self._gerar_sumario_automatico(doc)
-                    if summary:
-                        result.append("# Summary")
-                        result.append(summary)
-                        logger.debug("Adicionado summary automático ao documento formatado")
-            except Exception as e:
-                logger.warning(f"Erro ao extrair summary: {str(e)}")
-            
-            # Formatar conteúdo principal
-            try:
-                result.append("# Content")
-                # Obter texto principal do documento
-                if hasattr(doc, 'export_to_markdown'):
-                    # Método recomendado para obter conteúdo formatado
-                    content = doc.export_to_markdown()
-                    # Limpar marcação de imagens embutidas
-                    content = re.sub(r'!\[.*?\]\(data:image/.*?\)', '[IMAGEM]', content)
-                    result.append(content)
-                else:
-                    # Método legado
-                    for chunk in doc.chunks:
-                        if hasattr(chunk, 'text') and chunk.text:
-                            result.append(chunk.text)
-                logger.debug("Adicionado conteúdo principal ao documento formatado")
-            except Exception as e:
-                logger.error(f"Erro ao formatar conteúdo principal: {str(e)}")
-                result.append("Erro ao processar conteúdo principal.")
-            
-            # Adicionar tabelas se perfil adequado
-            if profile in ["llms-tables", "llms-full"]:
-                try:
-                    tables = []
-                    # Tentar extrair tabelas do documento
-                    if hasattr(doc, 'tables'):
-                        tables = doc.tables
-                    else:
-                        # Método legado: extrair das chunks
-                        for chunk in doc.chunks:
-                            if hasattr(chunk, 'tables') and chunk.tables:
-                                for table in chunk.tables:
-                                    tables.append(table)
-                    
-                    if tables:
-                        result.append("\n# Tables")
-                        for i, table in enumerate(tables):
-                            result.append(f"\n## Table {i+1}")
-                            # Formatar tabela em markdown
-                            if hasattr(table, 'to_markdown'):
-                                # Método moderno
-                                result.append(table.to_markdown())
-                            else:
-                                # Método legado
-                                result.append(str(table))
-                        logger.debug(f"Adicionadas {len(tables)} tabelas ao documento formatado")
-                except Exception as e:
-                    logger.warning(f"Erro ao processar tabelas: {str(e)}")
-            
-            # Adicionar imagens se perfil adequado
-            if profile in ["llms-images", "llms-full"]:
-                try:
-                    images = []
-                    # Tentar extrair imagens do documento
-                    if hasattr(doc, 'images'):
-                        images = doc.images
-                    else:
-                        # Método legado: extrair das chunks
-                        for chunk in doc.chunks:
-                            if hasattr(chunk, 'images') and chunk.images:
-                                for img in chunk.images:
-                                    images.append(img)
-                    
-                    if images:
-                        result.append("\n# Images")
-                        for i, img in enumerate(images):
-                            result.append(f"\n## Image {i+1}")
-                            # Extrair caption ou descrição
-                            if hasattr(img, 'caption') and img.caption:
-                                result.append(img.caption)
-                            elif hasattr(img, 'description') and img.description:
-                                result.append(img.description)
-                            else:
-                                result.append(f"Imagem {i+1} no documento")
-                        logger.debug(f"Adicionadas {len(images)} imagens ao documento formatado")
-                except Exception as e:
-                    logger.warning(f"Erro ao processar imagens: {str(e)}")
-            
-            # Adicionar conteúdo raw se perfil adequado
-            if profile in ["llms-raw", "llms-full"]:
-                try:
-                    if hasattr(doc, 'raw_text') and doc.raw_text:
-                        result.append("\n# Raw")
-                        result.append(doc.raw_text)
-                        logger.debug("Adicionado conteúdo raw ao documento formatado")
-                except Exception as e:
-                    logger.warning(f"Erro ao adicionar conteúdo raw: {str(e)}")
-            
-            # Adicionar análise de tokens se perfil adequado
-            if profile in ["llms-full"]:
-                formatted_partial = "\n\n".join(result)
-                token_count = count_tokens(formatted_partial, modelo_llm)
-                
-                result.append("\n# Token Analysis")
-                result.append(f"Total tokens ({modelo_llm}): {token_count}")
-                
-                # Adicionar dicas sobre tamanho do documento
-                result.append("## Observações:")
-                from src.tools.token_analyzer import TokenAnalyzer
-                analyzer = TokenAnalyzer(modelo_llm)
-                model_limit = analyzer.model_limits.get(modelo_llm, 8000)
-                
-                if token_count > model_limit:
-                    result.append(f"⚠️ Este documento excede o limite do modelo {modelo_llm} ({model_limit} tokens).")
-                    result.append(f"Considere usar um modelo com maior capacidade ou dividir o documento em partes menores.")
-                else:
-                    result.append(f"✅ Este documento está dentro do limite do modelo {modelo_llm} ({model_limit} tokens).")
-                    
-                    # Calcular percentual de uso
-                    usage_pct = (token_count / model_limit) * 100
-                    if usage_pct > 80:
-                        result.append(f"⚠️ O documento está utilizando {usage_pct:.1f}% da capacidade do modelo.")
-                    else:
-                        result.append(f"✅ O documento está utilizando apenas {usage_pct:.1f}% da capacidade do modelo.")
-            
-            # Juntar tudo em uma string
-            formatted_text = "\n\n".join(result)
-            logger.info(f"Documento formatado com sucesso: {len(formatted_text)} caracteres")
-            return formatted_text
-            
+            return self._formatar(stream.write, doc, title, date, source, profile, modelo_llm,
+                                  contar_tokens, render_cache, max_tokens)
+        except Exception as e:
+            logger.error(f"Erro geral na formatação: {str(e)}")
+            stream.write(self._texto_erro(doc, e))
+            return None
+
+    def _formatar_texto(self, doc, title, date, source, profile, modelo_llm, contar_tokens, render_cache,
+                        max_tokens=None):
+        partes = []
+        try:
+            token_stats = self._formatar(partes.append, doc, title, date, source, profile, modelo_llm,
+                                         contar_tokens, render_cache, max_tokens)
         except Exception as e:
             logger.error(f"Erro geral na formatação: {str(e)}")
             # Retornar um formato mínimo com mensagem de erro
-            return f"# Error\n\nErro ao formatar documento: {str(e)}\n\n# Raw Content\n\n{str(doc)[:1000]}..."
+            return self._texto_erro(doc, e), None
+        return "".join(partes), token_stats
+
+    def _texto_erro(self, doc, e):
+        return f"# Error\n\nErro ao formatar documento: {str(e)}\n\n# Raw Content\n\n{str(doc)[:1000]}..."
+
+    def _formatar(self, write, doc, title, date, source, profile, modelo_llm, contar_tokens, render_cache=None,
+                  max_tokens=None):
+        """
+        Emite o documento em LLMs.txt parte a parte pela função write.
+
+        Somente as seções do perfil são produzidas; o que cada uma exige do
+        documento (ex: exportação markdown) é obtido sob demanda.
+
+        Returns:
+            dict: Estatísticas de tokens (se contar_tokens), ou None
+        """
+        logger.info(f"Formatando documento usando perfil '{profile}'")
+        
+        # Validar perfil
+        if profile not in PROFILES:
+            logger.warning(f"Perfil '{profile}' não reconhecido. Usando 'llms-full'.")
+            profile = "llms-full"
+        secoes = [SECOES[nome] for nome in PROFILES[profile]]
+
+        contexto = _ContextoFormatacao(self, doc, title, date, source, modelo_llm, render_cache)
+        if max_tokens:
+            return self._formatar_com_orcamento(write, secoes, contexto, contar_tokens, max_tokens)
+
+        # Seções que dependem das contagens (ex: análise de tokens) ativam a contagem
+        precisa_tokens = any("tokens" in secao.requer for secao in secoes)
+        saida = _EmissorLLMS(write, modelo_llm, contar_tokens or precisa_tokens)
+
+        for secao in secoes:
+            contexto.executar(secao, saida)
+        
+        saida.fechar()
+        logger.info(f"Documento formatado com sucesso: {saida.caracteres} caracteres")
+
+        if not contar_tokens:
+            return None
+        return {
+            "model": modelo_llm,
+            "total": saida.total,
+            "sections": saida.secoes
+        }
     
-    def _gerar_sumario_automatico(self, doc):
+    def _formatar_com_orcamento(self, write, secoes, contexto, contar_tokens, max_tokens):
+        """
+        Emite o documento limitado a max_tokens.
+
+        As seções são produzidas em memória e contadas; as de menor prioridade
+        (PRIORIDADE_ORCAMENTO) são removidas e o conteúdo/sumário truncados em
+        limites de parágrafo até o total caber. A contagem final é exata: se
+        os separadores entre seções ultrapassarem o limite, o ajuste é refeito
+        com uma margem maior.
+        """
+        modelo_llm = contexto.modelo_llm
+        coletor = _ColetorSecoes()
+        for secao in secoes:
+            # A análise de tokens é substituída pelo relatório do orçamento
+            if "tokens" in secao.requer:
+                continue
+            coletor.iniciar(secao.nome)
+            contexto.executar(secao, coletor)
+        grupos = [grupo for grupo in coletor.grupos if grupo[1]]
+        tokens = count_tokens_batch((_texto_grupo(secoes_grupo) for _, secoes_grupo in grupos), modelo_llm)
+
+        # Reservar o espaço do relatório no pior caso (todas as seções listadas)
+        nomes = [nome for nome, _ in grupos]
+        reserva = count_tokens(
+            "\n\n".join(["\n\n\n# Token Budget"] + _linhas_orcamento(modelo_llm, max_tokens, max_tokens, nomes, nomes)),
+            modelo_llm
+        )
+        limite = max_tokens - reserva
+
+        for _ in range(3):
+            selecionados, removidas, truncadas = _ajustar_ao_orcamento(grupos, tokens, limite, modelo_llm)
+            partes = []
+            saida = _EmissorLLMS(partes.append, modelo_llm, True)
+            for _, secoes_grupo in selecionados:
+                for titulo, *corpo in secoes_grupo:
+                    saida.secao(titulo)
+                    for parte in corpo:
+                        saida.parte(parte)
+            # Abrir o relatório fecha a última seção: o total usado é o das seções emitidas
+            saida.secao("\n# Token Budget")
+            for linha in _linhas_orcamento(modelo_llm, saida.total, max_tokens, removidas, truncadas):
+                saida.parte(linha)
+            saida.fechar()
+
+            excesso = saida.total - max_tokens
+            if excesso <= 0 or all(nome == "metadata" for nome, _ in selecionados):
+                break
+            limite -= excesso
+
+        if saida.total > max_tokens:
+            logger.warning(f"Documento excede o orçamento de {max_tokens} tokens mesmo após os cortes: {saida.total}")
+        for parte in partes:
+            write(parte)
+        logger.info(f"Documento formatado com orçamento de tokens: {saida.total}/{max_tokens} tokens")
+
+        if not contar_tokens:
+            return None
+        return {
+            "model": modelo_llm,
+            "total": saida.total,
+            "sections": saida.secoes,
+            "budget": {"max_tokens": max_tokens, "removed": removidas, "truncated": truncadas}
+        }
+
+    def formatar_paginas(self, doc):
+        """
+        Formata o conteúdo de cada página do documento separadamente.
+
+        Usado no modo streaming para publicar páginas assim que são convertidas,
+        antes de o documento completo ser formatado.
+
+        Args:
+            doc: Documento (ou parte de documento) processado pelo Docling
+
+        Yields:
+            tuple: (número da página, conteúdo da página em markdown)
+        """
+        pages = getattr(doc, 'pages', None) or {}
+        for page_no in sorted(pages):
+            try:
+                content = doc.export_to_markdown(page_no=page_no)
+            except Exception as e:
+                logger.warning(f"Erro ao formatar página {page_no}: {str(e)}")
+                continue
+            # Limpar marcação de imagens embutidas
+            yield page_no, remover_imagens_embutidas(content)
+
+    def _gerar_sumario_automatico(self, doc, render_cache=None):
         """
         Gera um sumário automático a partir do documento.
         
         Args:
             doc: Documento processado pelo Docling
+            render_cache (DocumentRenderCache): Cache de exportações do documento (opcional)
             
         Returns:
             str: Sumário do documento
@@ -241,32 +610,30 @@ class LLMSFormatter:
             
             # Método 1: Usar export_to_markdown e extrair início
             if hasattr(doc, 'export_to_markdown'):
-                content = doc.export_to_markdown()
-                
-                # Remover linhas vazias e quebras
-                content = re.sub(r'\n\s*\n', '\n\n', content)
+                content = (render_cache or DocumentRenderCache(doc)).markdown()
                 
                 # Extrair título se existir (primeira linha com #)
-                title_match = re.search(r'^#+\s+(.+)$', content, re.MULTILINE)
+                title_match = _TITULO_PATTERN.search(content)
                 if title_match:
                     title = title_match.group(1)
                     summary += f"{title}\n\n"
                 
-                # Dividir em parágrafos e pegar os primeiros significativos
-                paragraphs = content.split('\n\n')
+                # Percorrer os parágrafos sob demanda e parar nos primeiros significativos
                 significant_paragraphs = []
                 
-                for p in paragraphs:
+                for p in _iterar_paragrafos(content):
+                    p = p.strip()
+
                     # Pular linhas com # (títulos) já processados
-                    if p.strip().startswith('#'):
+                    if p.startswith('#'):
                         continue
 
                     # Pular linhas muito curtas
-                    if len(p.strip()) < MIN_PARAGRAPH_LENGTH:
+                    if len(p) < MIN_PARAGRAPH_LENGTH:
                         continue
 
                     # Adicionar parágrafo significativo
-                    significant_paragraphs.append(p.strip())
+                    significant_paragraphs.append(p)
 
                     # Limitar número de parágrafos
                     if len(significant_paragraphs) >= MAX_SUMMARY_PARAGRAPHS:
@@ -332,13 +699,218 @@ class LLMSFormatter:
         Returns:
             str: Texto limpo e normalizado
         """
-        # Remover URLs de imagens
-        content = re.sub(r'!\[.*?\]\(.*?\)', '[IMAGEM]', content)
-        
-        # Limpar URLs longas
-        content = re.sub(r'\[([^\]]+)\]\(https?:\/\/[^\s]{60,}\)', r'\1', content)
+        # Remover URLs de imagens, limpar URLs longas e normalizar quebras de
+        # linha em uma única passada
+        return _LIMPEZA_PATTERN.sub(_substituir_limpeza, content)
+
+
+@registrar_secao("metadata")
+def _secao_metadados(contexto, saida):
+    doc = contexto.doc
+
+    # Metadados mais detalhados
+    metadados = {}
+    
+    # Metadados básicos
+    if contexto.title:
+        metadados["Title"] = contexto.title
+    if contexto.date:
+        metadados["Date"] = contexto.date
+    if contexto.source:
+        metadados["Source"] = contexto.source
         
-        # Normalizar quebras de linha
-        content = re.sub(r'\n{3,}', '\n\n', content)
+    # Detectar autor se disponível
+    if hasattr(doc, "metadata") and doc.metadata:
+        if "author" in doc.metadata:
+            metadados["Author"] = doc.metadata["author"]
+        elif "creator" in doc.metadata:
+            metadados["Author"] = doc.metadata["creator"]
+            
+        # Adicionar outros metadados relevantes
+        for key in ["subject", "keywords", "language", "created", "modified"]:
+            if key in doc.metadata:
+                metadados[key.title()] = doc.metadata[key]
+    
+    for key, value in metadados.items():
+        if value:
+            saida.secao(f"# {key}: {value}")
+
+
+def _emitir_sumario(contexto, saida, gerar):
+    doc = contexto.doc
+    try:
+        # Verificar se tem summary explícito
+        if hasattr(doc, 'summary') and doc.summary:
+            saida.secao("# Summary")
+            saida.parte(doc.summary)
+            logger.debug("Adicionado summary ao documento formatado")
+        # Se não tem summary, gerar a partir do conteúdo
+        elif gerar:
+            # Extrair primeiro parágrafo significativo
+            summary = contexto.formatter._gerar_sumario_automatico(doc, contexto.render)
+            if summary:
+                saida.secao("# Summary")
+                saida.parte(summary)
+                logger.debug("Adicionado summary automático ao documento formatado")
+    except Exception as e:
+        logger.warning(f"Erro ao extrair summary: {str(e)}")
+
+
+@registrar_secao("summary")
+def _secao_sumario(contexto, saida):
+    # Apenas o summary explícito do documento
+    _emitir_sumario(contexto, saida, gerar=False)
+
+
+@registrar_secao("summary_auto", requer=("markdown",))
+def _secao_sumario_automatico(contexto, saida):
+    # Summary explícito ou gerado a partir do conteúdo
+    _emitir_sumario(contexto, saida, gerar=True)
+
+
+@registrar_secao("content", requer=("markdown",))
+def _secao_conteudo(contexto, saida):
+    doc = contexto.doc
+    try:
+        saida.secao("# Content")
+        # Obter texto principal do documento
+        content = contexto.obter("markdown")
+        if content is not None:
+            # Limpar marcação de imagens embutidas
+            saida.parte(remover_imagens_embutidas(content))
+        else:
+            # Método legado
+            for chunk in doc.chunks:
+                if hasattr(chunk, 'text') and chunk.text:
+                    saida.parte(chunk.text)
+        logger.debug("Adicionado conteúdo principal ao documento formatado")
+    except Exception as e:
+        logger.error(f"Erro ao formatar conteúdo principal: {str(e)}")
+        saida.parte("Erro ao processar conteúdo principal.")
+
+
+@registrar_secao("tables", requer=("tables",))
+def _secao_tabelas(contexto, saida):
+    try:
+        tables = contexto.obter("tables")
+        if tables:
+            saida.secao("\n# Tables")
+            for i, table in enumerate(tables):
+                saida.parte(f"\n## Table {i+1}")
+                # Formatar tabela em markdown
+                if hasattr(table, 'to_markdown'):
+                    # Método moderno
+                    saida.parte(table.to_markdown())
+                else:
+                    # Método legado
+                    saida.parte(str(table))
+            logger.debug(f"Adicionadas {len(tables)} tabelas ao documento formatado")
+    except Exception as e:
+        logger.warning(f"Erro ao processar tabelas: {str(e)}")
+
+
+@registrar_secao("images", requer=("images",))
+def _secao_imagens(contexto, saida):
+    try:
+        images = contexto.obter("images")
+        if images:
+            saida.secao("\n# Images")
+            for i, img in enumerate(images):
+                saida.parte(f"\n## Image {i+1}")
+                # Extrair caption ou descrição
+                if hasattr(img, 'caption') and img.caption:
+                    saida.parte(img.caption)
+                elif hasattr(img, 'description') and img.description:
+                    saida.parte(img.description)
+                else:
+                    saida.parte(f"Imagem {i+1} no documento")
+            logger.debug(f"Adicionadas {len(images)} imagens ao documento formatado")
+    except Exception as e:
+        logger.warning(f"Erro ao processar imagens: {str(e)}")
+
+
+@registrar_secao("raw", requer=("raw_text",))
+def _secao_raw(contexto, saida):
+    try:
+        raw_text = contexto.obter("raw_text")
+        if raw_text:
+            saida.secao("\n# Raw")
+            saida.parte(raw_text)
+            logger.debug("Adicionado conteúdo raw ao documento formatado")
+    except Exception as e:
+        logger.warning(f"Erro ao adicionar conteúdo raw: {str(e)}")
+
+
+@registrar_secao("token_analysis", requer=("tokens",))
+def _secao_analise_tokens(contexto, saida):
+    modelo_llm = contexto.modelo_llm
+
+    # Abrir a seção fecha (e conta) a anterior: o total é o das seções já emitidas
+    saida.secao("\n# Token Analysis")
+    token_count = saida.total
+    saida.parte(f"Total tokens ({modelo_llm}): {token_count}")
+    
+    # Adicionar dicas sobre tamanho do documento
+    saida.parte("## Observações:")
+    from src.tools.token_analyzer import TokenAnalyzer
+    analyzer = TokenAnalyzer(modelo_llm)
+    model_limit = analyzer.model_limits.get(modelo_llm, 8000)
+    
+    if token_count > model_limit:
+        saida.parte(f"⚠️ Este documento excede o limite do modelo {modelo_llm} ({model_limit} tokens).")
+        saida.parte(f"Considere usar um modelo com maior capacidade ou dividir o documento em partes menores.")
+    else:
+        saida.parte(f"✅ Este documento está dentro do limite do modelo {modelo_llm} ({model_limit} tokens).")
         
-        return content
+        # Calcular percentual de uso
+        usage_pct = (token_count / model_limit) * 100
+        if usage_pct > 80:
+            saida.parte(f"⚠️ O documento está utilizando {usage_pct:.1f}% da capacidade do modelo.")
+        else:
+            saida.parte(f"✅ O documento está utilizando apenas {usage_pct:.1f}% da capacidade do modelo.")
+
+
+# Seções emitidas por cada perfil, na ordem do documento
+PROFILES = {
+    "llms-min": ("metadata", "summary", "content"),
+    "llms-ctx": ("metadata", "summary_auto", "content"),
+    "llms-tables": ("metadata", "summary", "content", "tables"),
+    "llms-images": ("metadata", "summary", "content", "images"),
+    "llms-raw": ("metadata", "summary", "content", "raw"),
+    "llms-full": ("metadata", "summary_auto", "content", "tables", "images", "raw", "token_analysis"),
+}
+
+
+def carregar_perfis_customizados(config=LLMS_CUSTOM_PROFILES):
+    """
+    Lê perfis adicionais no formato JSON {"nome": ["secao", ...]}.
+
+    Args:
+        config (str): JSON com os perfis (padrão: LLMS_CUSTOM_PROFILES)
+
+    Returns:
+        dict: Perfis customizados (nome -> tupla de seções)
+
+    Raises:
+        ValueError: Se o JSON for inválido ou citar seções inexistentes
+    """
+    if not config:
+        return {}
+    try:
+        perfis = json.loads(config)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"LLMS_CUSTOM_PROFILES não é um JSON válido: {str(e)}")
+    if not isinstance(perfis, dict):
+        raise ValueError("LLMS_CUSTOM_PROFILES deve ser um objeto {\"perfil\": [\"secao\", ...]}")
+
+    resultado = {}
+    for nome, secoes in perfis.items():
+        if not isinstance(secoes, list) or not all(secao in SECOES for secao in secoes):
+            raise ValueError(
+                f"Perfil '{nome}' inválido: use uma lista com as seções {', '.join(SECOES)}"
+            )
+        resultado[nome] = tuple(secoes)
+    return resultado
+
+
+PROFILES.update(carregar_perfis_customizados())
@@ -0,0 +1,238 @@
+"""
+Conversão paralela de PDFs longos por intervalos de páginas.
+
+O PDF é dividido em intervalos de PDF_PAGE_RANGE_SIZE páginas, cada intervalo
+é convertido pelo Docling em um processo separado e os documentos resultantes
+são mesclados em um único DoclingDocument, preservando a ordem das páginas e
+a proveniência (o Docling mantém a numeração original das páginas ao converter
+com page_range).
+"""
+
+import atexit
+import multiprocessing
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.config import PDF_PAGE_RANGE_SIZE, PDF_PARALLEL_WORKERS, PDF_PARALLEL_MIN_PAGES
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Listas de itens do DoclingDocument referenciadas por "#/<lista>/<índice>"
+_ITEM_LISTS = ("groups", "texts", "pictures", "tables", "key_value_items", "form_items")
+_REF_PATTERN = re.compile(r"^#/(" + "|".join(_ITEM_LISTS) + r")/(\d+)$")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def contar_paginas(file_path: str) -> int:
+    """
+    Retorna o número de páginas de um PDF, ou 0 se não for possível lê-lo.
+    """
+    try:
+        from PyPDF2 import PdfReader
+        return len(PdfReader(file_path).pages)
+    except Exception as e:
+        logger.warning(f"Não foi possível contar páginas de {file_path}: {str(e)}")
+        return 0
+
+
+def calcular_intervalos(total_paginas: int, tamanho: int = PDF_PAGE_RANGE_SIZE) -> List[Tuple[int, int]]:
+    """
+    Divide as páginas em intervalos inclusivos, numerados a partir de 1.
+
+    Args:
+        total_paginas (int): Número de páginas do documento
+        tamanho (int): Páginas por intervalo
+
+    Returns:
+        list: Intervalos (inicio, fim) no formato aceito por page_range
+    """
+    tamanho = max(1, tamanho)
+    return [
+        (inicio, min(inicio + tamanho - 1, total_paginas))
+        for inicio in range(1, total_paginas + 1, tamanho)
+    ]
+
+
+def deve_paralelizar(file_path: str) -> int:
+    """
+    Indica se o arquivo deve ser convertido em paralelo.
+
+    Returns:
+        int: Número de páginas se o PDF for longo o suficiente, senão 0
+    """
+    if PDF_PARALLEL_WORKERS < 2 or not file_path.lower().endswith(".pdf"):
+        return 0
+    total = contar_paginas(file_path)
+    return total if total >= PDF_PARALLEL_MIN_PAGES else 0
+
+
+def _obter_executor() -> ProcessPoolExecutor:
+    """Pool de processos compartilhado; os conversores ficam aquecidos em cada processo."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn evita herdar estado do Docling/torch do processo pai
+            _executor = ProcessPoolExecutor(
+                max_workers=PDF_PARALLEL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+        return _executor
+
+
+def _converter_intervalo(file_path: str, intervalo: Tuple[int, int], opcoes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converte um intervalo de páginas em um processo do pool.
+
+    Returns:
+        dict: DoclingDocument serializado (export_to_dict)
+    """
+    from src.tools.document_converter import DocumentConverterTool
+
+    tool = DocumentConverterTool(chunk_size=opcoes["chunk_size"], chunk_overlap=opcoes["chunk_overlap"])
+    doc_converter = tool._obter_conversor(opcoes["ocr_engine"], opcoes["ocr_language"], opcoes["force_ocr"])
+    result = doc_converter.convert(file_path, page_range=intervalo)
+    return result.document.export_to_dict()
+
+
+def _deslocar_refs(valor: Any, deslocamentos: Dict[str, int]) -> Any:
+    """Reescreve recursivamente as referências "#/<lista>/<n>" somando o deslocamento da lista."""
+    if isinstance(valor, dict):
+        novo = {}
+        for chave, item in valor.items():
+            if chave in ("$ref", "self_ref") and isinstance(item, str):
+                match = _REF_PATTERN.match(item)
+                if match:
+                    lista, indice = match.groups()
+                    item = f"#/{lista}/{int(indice) + deslocamentos[lista]}"
+                novo[chave] = item
+            else:
+                novo[chave] = _deslocar_refs(item, deslocamentos)
+        return novo
+    if isinstance(valor, list):
+        return [_deslocar_refs(item, deslocamentos) for item in valor]
+    return valor
+
+
+def mesclar_documentos(partes: List[Dict[str, Any]]):
+    """
+    Mescla documentos Docling serializados, na ordem dada, em um único documento.
+
+    Os itens de cada parte são anexados às listas do documento mesclado com as
+    referências deslocadas, e os filhos de body/furniture são concatenados.
+
+    Args:
+        partes (list): Documentos no formato de export_to_dict, em ordem de página
+
+    Returns:
+        DoclingDocument: Documento mesclado
+    """
+    from docling_core.types.doc import DoclingDocument
+
+    if not partes:
+        raise ValueError("Nenhum documento para mesclar")
+
+    mesclado = dict(partes[0])
+    for lista in _ITEM_LISTS:
+        mesclado[lista] = list(mesclado.get(lista, []))
+    for raiz in ("body", "furniture"):
+        mesclado[raiz] = dict(mesclado[raiz], children=list(mesclado[raiz].get("children", [])))
+    mesclado["pages"] = dict(mesclado.get("pages", {}))
+
+    for parte in partes[1:]:
+        deslocamentos = {lista: len(mesclado[lista]) for lista in _ITEM_LISTS}
+        parte = _deslocar_refs(parte, deslocamentos)
+        for lista in _ITEM_LISTS:
+            mesclado[lista].extend(parte.get(lista, []))
+        for raiz in ("body", "furniture"):
+            mesclado[raiz]["children"].extend(parte[raiz].get("children", []))
+        mesclado["pages"].update(parte.get("pages", {}))
+
+    return DoclingDocument.model_validate(mesclado)
+
+
+def converter_em_paralelo(file_path: str, total_paginas: int, ocr_engine: str = "auto",
+                          ocr_language: Optional[str] = None, force_ocr: bool = False,
+                          chunk_size: Optional[int] = None, chunk_overlap: Optional[int] = None,
+                          ao_concluir_intervalo: Optional[Callable[[Any], None]] = None):
+    """
+    Converte um PDF em intervalos de páginas paralelos e mescla o resultado.
+
+    Args:
+        file_path (str): Caminho do PDF
+        total_paginas (int): Número de páginas do PDF
+        ocr_engine (str): Motor OCR a ser utilizado
+        ocr_language (str): Idioma para OCR
+        force_ocr (bool): Força OCR mesmo em documentos com texto
+        chunk_size (int): Tamanho do chunk para processamento
+        chunk_overlap (int): Sobreposição entre chunks
+        ao_concluir_intervalo (callable): Chamado com o DoclingDocument de cada
+            intervalo, na ordem das páginas, assim que ele estiver disponível
+
+    Returns:
+        DoclingDocument: Documento completo
+    """
+    intervalos = calcular_intervalos(total_paginas)
+    opcoes = {
+        "ocr_engine": ocr_engine,
+        "ocr_language": ocr_language,
+        "force_ocr": force_ocr,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+    }
+    logger.info(
+        f"Convertendo {total_paginas} páginas em {len(intervalos)} intervalos "
+        f"com até {PDF_PARALLEL_WORKERS} processos"
+    )
+
+    executor = _obter_executor()
+    futuros = [executor.submit(_converter_intervalo, file_path, intervalo, opcoes) for intervalo in intervalos]
+    try:
+        # Coletar na ordem dos intervalos para manter a ordem das páginas
+        partes = []
+        for futuro in futuros:
+            parte = futuro.result()
+            partes.append(parte)
+            if ao_concluir_intervalo:
+                from docling_core.types.doc import DoclingDocument
+                ao_concluir_intervalo(DoclingDocument.model_validate(parte))
+    except Exception:
+        for futuro in futuros:
+            futuro.cancel()
+        raise
+
+    return mesclar_documentos(partes)
+
+
+def converter_por_intervalos(doc_converter, file_path: str, total_paginas: int,
+                             ao_concluir_intervalo: Callable[[Any], None]):
+    """
+    Converte um PDF intervalo a intervalo no próprio processo e mescla o resultado.
+
+    Usado no modo streaming para PDFs que não são paralelizados: cada intervalo
+    é entregue a `ao_concluir_intervalo` assim que convertido, em vez de só ao
+    final da conversão do documento inteiro.
+
+    Args:
+        doc_converter: DocumentConverter do Docling já configurado
+        file_path (str): Caminho do PDF
+        total_paginas (int): Número de páginas do PDF
+        ao_concluir_intervalo (callable): Chamado com o DoclingDocument de cada intervalo
+
+    Returns:
+        DoclingDocument: Documento completo
+    """
+    partes = []
+    for intervalo in calcular_intervalos(total_paginas):
+        documento = doc_converter.convert(file_path, page_range=intervalo).document
+        ao_concluir_intervalo(documento)
+        partes.append(documento.export_to_dict())
+
+    if len(partes) == 1:
+        return documento
+    return mesclar_documentos(partes)
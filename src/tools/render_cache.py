@@ -0,0 +1,70 @@
+"""
+Cache das exportações de um documento Docling.
+
+Serializar um DoclingDocument grande (principalmente para markdown) é caro, e
+o mesmo job exporta o documento várias vezes: no conteúdo do LLMs.txt, no
+sumário automático e nos formatos adicionais. O DocumentRenderCache guarda
+cada exportação na primeira chamada e a reutiliza nas seguintes.
+"""
+
+from typing import Any, Dict, Tuple
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+class DocumentRenderCache:
+    """
+    Memoriza as exportações (markdown, texto, dict, html) de um documento.
+
+    Cada combinação de formato e argumentos é exportada uma única vez. Os
+    valores retornados são compartilhados: quem precisar alterar o dict
+    exportado deve copiá-lo antes.
+
+    Exemplo:
+        render = DocumentRenderCache(doc)
+        render.markdown()            # chama doc.export_to_markdown()
+        render.markdown()            # reutiliza o resultado anterior
+        render.dict(mode="json")     # argumentos diferentes, exportação própria
+    """
+
+    def __init__(self, doc):
+        """
+        Args:
+            doc: Documento processado pelo Docling
+        """
+        self.doc = doc
+        self._renders: Dict[Tuple, Any] = {}
+
+    def supports(self, formato: str) -> bool:
+        """Indica se o documento possui o método export_to_<formato>."""
+        return hasattr(self.doc, f"export_to_{formato}")
+
+    def _render(self, formato: str, **kwargs) -> Any:
+        key = (formato, tuple(sorted(kwargs.items())))
+        if key not in self._renders:
+            logger.debug(f"Exportando documento para {formato}")
+            # Exceções não são memorizadas: a próxima chamada tenta de novo
+            self._renders[key] = getattr(self.doc, f"export_to_{formato}")(**kwargs)
+        return self._renders[key]
+
+    def markdown(self, **kwargs) -> str:
+        """Resultado de doc.export_to_markdown(**kwargs)."""
+        return self._render("markdown", **kwargs)
+
+    def text(self, **kwargs) -> str:
+        """Resultado de doc.export_to_text(**kwargs)."""
+        return self._render("text", **kwargs)
+
+    def dict(self, **kwargs) -> dict:
+        """Resultado de doc.export_to_dict(**kwargs)."""
+        return self._render("dict", **kwargs)
+
+    def html(self, **kwargs) -> str:
+        """Resultado de doc.export_to_html(**kwargs)."""
+        return self._render("html", **kwargs)
+
+    def clear(self) -> None:
+        """Descarta as exportações memorizadas (ex: após alterar o documento)."""
+        self._renders.clear()
@@ -0,0 +1,251 @@
+"""
+Índice invertido para busca de texto com posição em documentos Docling.
+
+Cada elemento de texto do documento (parágrafo, título, célula de legenda...)
+recebe um número; o índice guarda, para cada termo, as ocorrências como
+(elemento, posição do termo no elemento, início, fim), com os offsets de
+caracteres no texto do elemento. Página, bbox e referência de cada elemento
+ficam em listas paralelas.
+
+Termos são comparados sem maiúsculas e sem acentos ("Relatório" encontra
+"relatorio"). Consultas aceitam vários termos e frases entre aspas:
+
+    indice = SearchIndex(doc)
+    indice.buscar('receita "lucro líquido"')
+    indice.salvar("relatorio.search.json")
+    buscar_em_diretorio("resultados/", "receita")
+"""
+
+import glob
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Versão do formato serializado (to_dict/from_dict)
+VERSAO_INDICE = 1
+
+# Caracteres de contexto antes e depois de cada ocorrência
+CONTEXTO_CARACTERES = 60
+
+# Arquivos de índice procurados por buscar_em_diretorio
+PADRAO_ARQUIVOS = "*.search*"
+
+_TERMO = re.compile(r"\w+")
+_CONSULTA = re.compile(r'"([^"]*)"|(\S+)')
+
+
+@lru_cache(maxsize=65536)
+def normalizar_termo(termo: str) -> str:
+    """Termo em minúsculas e sem acentos."""
+    decomposto = unicodedata.normalize("NFKD", termo.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+def _clausulas(consulta: str) -> List[List[str]]:
+    """
+    Divide a consulta em cláusulas: cada palavra solta ou frase entre aspas
+    vira uma lista de termos (mais de um termo = frase).
+    """
+    clausulas = []
+    for frase, palavra in _CONSULTA.findall(consulta or ""):
+        termos = [normalizar_termo(t) for t in _TERMO.findall(frase or palavra)]
+        if termos:
+            clausulas.append(termos)
+    return clausulas
+
+
+class SearchIndex:
+    """
+    Índice invertido de um documento, serializável em JSON.
+
+    Attributes:
+        textos (list): Texto de cada elemento
+        paginas (list): Página de cada elemento (ou None)
+        bboxes (list): [l, t, r, b] de cada elemento (ou None)
+        refs (list): Referência Docling de cada elemento (ex: "#/texts/3")
+        termos (dict): termo -> ocorrências achatadas [elemento, posição, início, fim, ...]
+    """
+
+    def __init__(self, doc=None):
+        """
+        Args:
+            doc: Documento processado pelo Docling (None: índice vazio, ver from_dict)
+        """
+        self.textos: List[str] = []
+        self.paginas: List[Optional[int]] = []
+        self.bboxes: List[Optional[List[float]]] = []
+        self.refs: List[Optional[str]] = []
+        self.termos: Dict[str, List[int]] = {}
+        if doc is not None:
+            for node, _ in doc.iterate_items():
+                texto = getattr(node, "text", None)
+                if texto:
+                    self._adicionar(node, texto)
+            logger.debug(f"Índice de busca: {len(self.textos)} elementos, {len(self.termos)} termos")
+
+    def _adicionar(self, node, texto: str) -> None:
+        elemento = len(self.textos)
+        prov = getattr(node, "prov", None)
+        bbox = getattr(prov[0], "bbox", None) if prov else None
+        self.textos.append(texto)
+        self.paginas.append(getattr(prov[0], "page_no", None) if prov else None)
+        self.bboxes.append([bbox.l, bbox.t, bbox.r, bbox.b] if bbox is not None else None)
+        self.refs.append(getattr(node, "self_ref", None))
+
+        for posicao, match in enumerate(_TERMO.finditer(texto)):
+            self.termos.setdefault(normalizar_termo(match.group(0)), []).extend(
+                (elemento, posicao, match.start(), match.end())
+            )
+
+    def __len__(self) -> int:
+        return len(self.textos)
+
+    def ocorrencias(self, termo: str) -> Iterator[Tuple[int, int, int, int]]:
+        """Ocorrências (elemento, posição, início, fim) de um termo já normalizado."""
+        dados = self.termos.get(termo, ())
+        return zip(dados[0::4], dados[1::4], dados[2::4], dados[3::4])
+
+    def _buscar_clausula(self, termos: List[str]) -> List[Tuple[int, int, int]]:
+        """Trechos (elemento, início, fim) de um termo ou de uma frase."""
+        primeiros = self.ocorrencias(termos[0])
+        if len(termos) == 1:
+            return [(elemento, inicio, fim) for elemento, _, inicio, fim in primeiros]
+
+        # Frase: cada termo seguinte na posição imediatamente posterior
+        seguintes = [
+            {(elemento, posicao): fim for elemento, posicao, _, fim in self.ocorrencias(termo)}
+            for termo in termos[1:]
+        ]
+        trechos = []
+        for elemento, posicao, inicio, fim in primeiros:
+            for deslocamento, posicoes in enumerate(seguintes, 1):
+                fim = posicoes.get((elemento, posicao + deslocamento))
+                if fim is None:
+                    break
+            else:
+                trechos.append((elemento, inicio, fim))
+        return trechos
+
+    def buscar(self, consulta: str, exigir_todos: bool = True) -> List[Dict[str, Any]]:
+        """
+        Busca termos e frases ("entre aspas") no documento.
+
+        Args:
+            consulta: Texto da busca
+            exigir_todos: Se True, só elementos que contêm todas as cláusulas;
+                se False, qualquer uma
+
+        Returns:
+            list: Uma ocorrência por item, na ordem do documento:
+                {"elemento", "ref", "pagina", "bbox", "inicio", "fim", "texto", "contexto"}
+        """
+        trechos_por_clausula = [self._buscar_clausula(termos) for termos in _clausulas(consulta)]
+        if not trechos_por_clausula:
+            return []
+
+        if exigir_todos:
+            elementos = set.intersection(*({e for e, _, _ in trechos} for trechos in trechos_por_clausula))
+        else:
+            elementos = None
+        trechos = sorted({
+            trecho
+            for trechos in trechos_por_clausula
+            for trecho in trechos
+            if elementos is None or trecho[0] in elementos
+        })
+        return [self._resultado(*trecho) for trecho in trechos]
+
+    def _resultado(self, elemento: int, inicio: int, fim: int) -> Dict[str, Any]:
+        texto = self.textos[elemento]
+        bbox = self.bboxes[elemento]
+        return {
+            "elemento": elemento,
+            "ref": self.refs[elemento],
+            "pagina": self.paginas[elemento],
+            "bbox": dict(zip("ltrb", bbox)) if bbox is not None else None,
+            "inicio": inicio,
+            "fim": fim,
+            "texto": texto[inicio:fim],
+            "contexto": texto[max(0, inicio - CONTEXTO_CARACTERES):fim + CONTEXTO_CARACTERES]
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Índice serializável em JSON."""
+        return {
+            "versao": VERSAO_INDICE,
+            "textos": self.textos,
+            "paginas": self.paginas,
+            "bboxes": self.bboxes,
+            "refs": self.refs,
+            "termos": self.termos
+        }
+
+    @classmethod
+    def from_dict(cls, dados: Dict[str, Any]) -> "SearchIndex":
+        """
+        Reconstrói um índice serializado com to_dict.
+
+        Raises:
+            ValueError: Se a versão do índice não for suportada
+        """
+        if dados.get("versao") != VERSAO_INDICE:
+            raise ValueError(f"Versão de índice de busca não suportada: {dados.get('versao')}")
+        indice = cls()
+        indice.textos = dados["textos"]
+        indice.paginas = dados["paginas"]
+        indice.bboxes = dados["bboxes"]
+        indice.refs = dados["refs"]
+        indice.termos = dados["termos"]
+        return indice
+
+    def salvar(self, caminho: str) -> str:
+        """Grava o índice em JSON e retorna o caminho."""
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        return caminho
+
+    @classmethod
+    def carregar(cls, caminho: str) -> "SearchIndex":
+        """Lê um índice gravado com salvar."""
+        with open(caminho, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+def buscar_em_diretorio(
+    diretorio: str,
+    consulta: str,
+    exigir_todos: bool = True,
+    padrao: str = PADRAO_ARQUIVOS
+) -> List[Dict[str, Any]]:
+    """
+    Busca em todos os índices gravados em um diretório (ex: saída de processar_em_lote).
+
+    Índices ilegíveis são ignorados com aviso.
+
+    Args:
+        diretorio: Diretório com os arquivos de índice
+        consulta: Texto da busca (ver SearchIndex.buscar)
+        exigir_todos: Se True, todas as cláusulas no mesmo elemento
+        padrao: Padrão dos arquivos de índice
+
+    Returns:
+        list: Resultados de SearchIndex.buscar com o campo "arquivo"
+    """
+    resultados = []
+    for caminho in sorted(glob.glob(os.path.join(diretorio, padrao))):
+        try:
+            indice = SearchIndex.carregar(caminho)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Índice de busca ignorado ({caminho}): {str(e)}")
+            continue
+        for resultado in indice.buscar(consulta, exigir_todos):
+            resultado["arquivo"] = caminho
+            resultados.append(resultado)
+    return resultados
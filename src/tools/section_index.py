@@ -0,0 +1,70 @@
+"""
+Índice das seções de primeiro nível (`# Título`) de um documento LLMs.txt.
+
+O texto é percorrido uma única vez; cada seção é guardada como um intervalo
+(início, fim) sobre o texto original, sem cópias. O conteúdo de uma seção só
+é fatiado quando acessado (ou ao contar seus tokens).
+"""
+
+import re
+from collections.abc import Mapping
+from typing import Dict, Iterator, Tuple
+from src.tools.token_counter import count_tokens_batch
+
+# Títulos de primeiro nível: "# " no início da linha
+_HEADING_PATTERN = re.compile(r"^# .+", re.MULTILINE)
+
+
+class SectionIndex(Mapping):
+    """
+    Mapeamento título -> conteúdo das seções de um documento LLMs.txt.
+
+    Equivale ao `section_map` montado com `re.split(r'(^# .+)', ...)`: o texto
+    antes do primeiro título é ignorado e, com títulos repetidos, prevalece o
+    último.
+
+    Exemplo:
+        index = SectionIndex(texto)
+        index.spans["# Content"]            # (início, fim) no texto original
+        index["# Content"]                  # conteúdo da seção
+        index.count_tokens("gpt-4o")        # {"# Title": 3, "# Content": 1200, ...}
+    """
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text (str): Documento LLMs.txt
+        """
+        self.text = text or ""
+        self.spans: Dict[str, Tuple[int, int]] = {}
+
+        title, start = None, 0
+        for match in _HEADING_PATTERN.finditer(self.text):
+            if title is not None:
+                self.spans[title] = (start, match.start())
+            title, start = match.group(0).strip(), match.end()
+        if title is not None:
+            self.spans[title] = (start, len(self.text))
+
+    def __getitem__(self, title: str) -> str:
+        start, end = self.spans[title]
+        return self.text[start:end]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.spans)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def count_tokens(self, model_name: str = "gpt-3.5-turbo") -> Dict[str, int]:
+        """
+        Conta os tokens de cada seção em um único lote.
+
+        Args:
+            model_name: Nome do modelo para usar encoding correto
+
+        Returns:
+            Dict[str, int]: Tokens por título de seção
+        """
+        counts = count_tokens_batch((self.text[start:end] for start, end in self.spans.values()), model_name)
+        return dict(zip(self.spans, counts))
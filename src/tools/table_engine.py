@@ -0,0 +1,307 @@
+"""
+Motor colunar de tabelas.
+
+Cada tabela do Docling é montada uma única vez em colunas (um vetor de
+valores por coluna), percorrendo suas células em uma só passada. Os demais
+formatos derivam desses vetores:
+
+- pandas / Arrow: colunas entregues diretamente, sem transpor linha a linha
+- Parquet / Feather: todas as tabelas do documento em um único arquivo, no
+  formato longo (tabela, página, linha, coluna, cabeçalho, valor)
+- markdown / HTML / matriz: linhas geradas sob demanda a partir das colunas
+- NDJSON: tabelas e lotes de linhas gerados um de cada vez (iterar_tabelas)
+
+O pyarrow faz parte de requirements.txt; em instalações sem ele, Arrow/Parquet/
+Feather ficam indisponíveis e o pandas é montado a partir das colunas em Python.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from src.utils.logging_config import setup_logger
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+# Formatos aceitos por salvar_tabelas
+FORMATOS_ARQUIVO = ("parquet", "feather")
+
+
+def _exigir_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow não encontrado. Instale com 'pip install pyarrow' para exportar tabelas em Arrow/Parquet/Feather")
+
+
+def _posicao(cell):
+    # Docling 2.x usa offsets de início; versões antigas expunham row/col
+    row = getattr(cell, "start_row_offset_idx", None)
+    col = getattr(cell, "start_col_offset_idx", None)
+    if row is None:
+        row = getattr(cell, "row", 0)
+    if col is None:
+        col = getattr(cell, "col", 0)
+    return row, col
+
+
+class ColumnarTable:
+    """
+    Tabela armazenada por colunas.
+
+    Attributes:
+        indice (int): Posição da tabela no documento
+        pagina (int): Página da tabela (None se desconhecida)
+        cabecalhos (list): Valores da primeira linha, se usada como cabeçalho (ou None)
+        colunas (list): Um vetor de valores (str ou None) por coluna, sem o cabeçalho
+        inicio (int): Linha de dados inicial (diferente de 0 em lotes, ver lotes())
+    """
+
+    def __init__(self, colunas, cabecalhos=None, indice=0, pagina=None, inicio=0):
+        self.colunas: List[List[Optional[str]]] = colunas
+        self.cabecalhos: Optional[List[Optional[str]]] = cabecalhos
+        self.indice = indice
+        self.pagina = pagina
+        self.inicio = inicio
+        self._arrow = None
+
+    @classmethod
+    def from_docling(cls, tabela, indice=0) -> Optional["ColumnarTable"]:
+        """
+        Monta a tabela a partir de um TableItem do Docling.
+
+        Returns:
+            ColumnarTable: Tabela montada, ou None se não houver células
+        """
+        data = getattr(tabela, "data", None)
+        cells = (getattr(data, "table_cells", None) or getattr(data, "cells", None)) if data is not None else None
+        if not cells:
+            return None
+
+        posicoes = [_posicao(cell) for cell in cells]
+        num_linhas = max(row for row, _ in posicoes) + 1
+        num_colunas = max(col for _, col in posicoes) + 1
+        if num_linhas <= 0 or num_colunas <= 0:
+            return None
+
+        # Uma única passada pelas células, gravando direto na coluna
+        colunas = [[None] * num_linhas for _ in range(num_colunas)]
+        for cell, (row, col) in zip(cells, posicoes):
+            if hasattr(cell, "text") and row >= 0 and col >= 0:
+                colunas[col][row] = cell.text
+
+        pagina = tabela.prov[0].page_no if getattr(tabela, "prov", None) else None
+
+        # Primeira linha vira cabeçalho se não estiver vazia e houver dados abaixo
+        primeira_linha = [coluna[0] for coluna in colunas]
+        cabecalhos = None
+        if num_linhas > 1 and not all(v is None or v == "" for v in primeira_linha):
+            cabecalhos = primeira_linha
+            colunas = [coluna[1:] for coluna in colunas]
+
+        return cls(colunas, cabecalhos, indice, pagina)
+
+    @property
+    def num_linhas(self) -> int:
+        """Número de linhas de dados (sem o cabeçalho)."""
+        return len(self.colunas[0]) if self.colunas else 0
+
+    @property
+    def num_colunas(self) -> int:
+        return len(self.colunas)
+
+    def nomes_colunas(self) -> List[str]:
+        """Nomes das colunas (cabeçalho, ou col_<n> quando ausente/vazio)."""
+        cabecalhos = self.cabecalhos or [None] * self.num_colunas
+        return [str(nome) if nome not in (None, "") else f"col_{j}" for j, nome in enumerate(cabecalhos)]
+
+    def iterar_linhas(self, incluir_cabecalho=True) -> Iterator[tuple]:
+        """Itera pelas linhas (tuplas de valores), geradas a partir das colunas."""
+        if incluir_cabecalho and self.cabecalhos is not None:
+            yield tuple(self.cabecalhos)
+        yield from zip(*self.colunas)
+
+    def lotes(self, linhas_por_lote: Optional[int] = None) -> Iterator["ColumnarTable"]:
+        """
+        Divide a tabela em lotes de linhas, gerados um de cada vez.
+
+        Cada lote é uma ColumnarTable com o mesmo cabeçalho e `inicio` igual à
+        sua primeira linha de dados; só as linhas do lote são copiadas.
+
+        Args:
+            linhas_por_lote: Linhas por lote (None ou 0: a tabela inteira)
+        """
+        if not linhas_por_lote or self.num_linhas <= linhas_por_lote:
+            yield self
+            return
+        for inicio in range(0, self.num_linhas, linhas_por_lote):
+            colunas = [coluna[inicio:inicio + linhas_por_lote] for coluna in self.colunas]
+            yield ColumnarTable(colunas, self.cabecalhos, self.indice, self.pagina, self.inicio + inicio)
+
+    def to_record(self) -> Dict[str, Any]:
+        """Registro serializável em JSON (uma linha do NDJSON)."""
+        return {
+            "indice": self.indice,
+            "pagina": self.pagina,
+            "inicio": self.inicio,
+            "cabecalhos": self.cabecalhos,
+            "linhas": [list(linha) for linha in self.iterar_linhas(incluir_cabecalho=False)],
+        }
+
+    def to_matrix(self) -> List[List[Optional[str]]]:
+        """Matriz linha a linha, incluindo a linha de cabeçalho."""
+        return [list(linha) for linha in self.iterar_linhas()]
+
+    def to_arrow(self):
+        """
+        Tabela Arrow com uma coluna string por coluna (memorizada).
+
+        Raises:
+            ImportError: Se o pyarrow não estiver instalado
+        """
+        _exigir_pyarrow()
+        if self._arrow is None:
+            arrays = [pa.array(coluna, type=pa.string()) for coluna in self.colunas]
+            self._arrow = pa.Table.from_arrays(arrays, names=self.nomes_colunas())
+        return self._arrow
+
+    def to_pandas(self):
+        """
+        DataFrame pandas; via Arrow quando o pyarrow está disponível.
+
+        Colunas nomeadas pelo cabeçalho (col_<n> nas células vazias); tabelas
+        sem cabeçalho mantêm os rótulos inteiros 0..n-1.
+        """
+        if pa is not None:
+            df = self.to_arrow().to_pandas()
+        else:
+            import pandas as pd
+            df = pd.DataFrame(dict(enumerate(self.colunas)))
+            if self.cabecalhos is not None:
+                df.columns = self.nomes_colunas()
+        if self.cabecalhos is None:
+            df.columns = range(self.num_colunas)
+        return df
+
+    def to_markdown(self) -> str:
+        """Markdown com a primeira linha como cabeçalho."""
+        linhas = [" | ".join("" if v is None else str(v) for v in linha) for linha in self.iterar_linhas()]
+        if linhas:
+            linhas.insert(1, " | ".join("---" for _ in range(self.num_colunas)))
+        return "\n".join(linhas)
+
+    def to_html(self) -> str:
+        """HTML com a primeira linha em <thead>."""
+        linhas = self.iterar_linhas()
+        html_rows = ["<table>"]
+        primeira = next(linhas, None)
+        if primeira is not None:
+            html_rows.append("  <thead>")
+            html_rows.append("    <tr>")
+            html_rows.extend(f"      <th>{'' if v is None else str(v)}</th>" for v in primeira)
+            html_rows.append("    </tr>")
+            html_rows.append("  </thead>")
+            html_rows.append("  <tbody>")
+            for linha in linhas:
+                html_rows.append("    <tr>")
+                html_rows.extend(f"      <td>{'' if v is None else str(v)}</td>" for v in linha)
+                html_rows.append("    </tr>")
+            html_rows.append("  </tbody>")
+        html_rows.append("</table>")
+        return "\n".join(html_rows)
+
+
+def iterar_tabelas(doc, linhas_por_lote: Optional[int] = None) -> Iterator[ColumnarTable]:
+    """
+    Gera as tabelas do documento no formato colunar, uma de cada vez.
+
+    Cada tabela só é montada quando solicitada, e a anterior pode ser liberada
+    pelo chamador: a memória fica limitada à maior tabela (ou ao lote).
+
+    Tabelas sem células são ignoradas; `indice` mantém a posição original.
+
+    Args:
+        doc: Documento processado pelo Docling
+        linhas_por_lote: Se informado, gera lotes de até N linhas por tabela
+    """
+    for i, tabela in enumerate(getattr(doc, "tables", None) or []):
+        colunar = ColumnarTable.from_docling(tabela, i)
+        if colunar is None:
+            logger.warning(f"Tabela {i+1} não contém células")
+            continue
+        yield from colunar.lotes(linhas_por_lote)
+
+
+def extrair_tabelas_colunares(doc) -> List[ColumnarTable]:
+    """Monta todas as tabelas do documento no formato colunar."""
+    return list(iterar_tabelas(doc))
+
+
+def iterar_ndjson(tabelas: Iterable[ColumnarTable]) -> Iterator[str]:
+    """Serializa tabelas (ou lotes) em NDJSON, uma linha por item."""
+    for tabela in tabelas:
+        yield json.dumps(tabela.to_record(), ensure_ascii=False) + "\n"
+
+
+def tabelas_para_arrow(tabelas: List[ColumnarTable]):
+    """
+    Junta as tabelas em uma única tabela Arrow no formato longo.
+
+    Colunas: tabela, pagina, linha, coluna, cabecalho, valor. A linha 0 é a
+    primeira linha de dados (o cabeçalho fica na coluna `cabecalho`).
+
+    Raises:
+        ImportError: Se o pyarrow não estiver instalado
+    """
+    _exigir_pyarrow()
+    tipos = {
+        "tabela": pa.int32(), "pagina": pa.int32(), "linha": pa.int32(),
+        "coluna": pa.int32(), "cabecalho": pa.string(), "valor": pa.string()
+    }
+    partes: Dict[str, List[Any]] = {nome: [] for nome in tipos}
+    for tabela in tabelas:
+        nomes = tabela.nomes_colunas()
+        linhas = pa.array(range(tabela.num_linhas), type=pa.int32())
+        for j, coluna in enumerate(tabela.colunas):
+            n = len(coluna)
+            # Cada coluna da tabela vira um bloco (chunk): os valores não são copiados para linhas
+            partes["tabela"].append(pa.array([tabela.indice] * n, type=pa.int32()))
+            partes["pagina"].append(pa.array([tabela.pagina] * n, type=pa.int32()))
+            partes["linha"].append(linhas)
+            partes["coluna"].append(pa.array([j] * n, type=pa.int32()))
+            partes["cabecalho"].append(pa.array([nomes[j]] * n, type=pa.string()))
+            partes["valor"].append(tabela.to_arrow().column(j).combine_chunks())
+
+    colunas = [pa.chunked_array(partes[nome], type=tipo) for nome, tipo in tipos.items()]
+    return pa.Table.from_arrays(colunas, names=list(tipos))
+
+
+def salvar_tabelas(tabelas: List[ColumnarTable], caminho: str, formato: str = "parquet") -> str:
+    """
+    Grava todas as tabelas do documento em um único arquivo Parquet ou Feather.
+
+    Args:
+        tabelas: Tabelas colunares (ver extrair_tabelas_colunares)
+        caminho: Arquivo de destino
+        formato: "parquet" ou "feather"
+
+    Returns:
+        str: Caminho do arquivo gravado
+
+    Raises:
+        ValueError: Se o formato não for suportado
+        ImportError: Se o pyarrow não estiver instalado
+    """
+    if formato not in FORMATOS_ARQUIVO:
+        raise ValueError(f"Formato '{formato}' não suportado. Use 'parquet' ou 'feather'.")
+    tabela = tabelas_para_arrow(tabelas)
+    if formato == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(tabela, caminho)
+    else:
+        import pyarrow.feather as feather
+        feather.write_feather(tabela, caminho)
+    logger.info(f"{len(tabelas)} tabelas salvas em {caminho} ({formato})")
+    return caminho
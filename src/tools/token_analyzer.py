@@ -2,7 +2,8 @@
 Módulo para analisar contagem de tokens e sugerir estratégias otimizadas.
 """
 
-from src.tools.token_counter import count_tokens
+from src.tools.token_counter import count_tokens, count_tokens_for_models, encoding_name_for_model, has_exact_encoding
+from src.tools.section_index import SectionIndex
 from src.utils.logging_config import setup_logger
 
 # Configurar logger para este módulo
@@ -60,12 +61,45 @@ class TokenAnalyzer:
             "email_comunicacao": {"chunk_size": 500, "chunk_overlap": 50, "desc": "comunicações curtas e diretas"}
         }
     
-    def analyze_sections(self, sections_dict):
+    def model_fit(self, content, known_counts=None):
+        """
+        Calcula, para cada modelo de model_limits, a contagem de tokens do
+        conteúdo e se ele cabe no limite do modelo.
+
+        A contagem é exata para modelos cujo encoding o tiktoken conhece; para
+        os demais (ex: Anthropic, Llama) é uma aproximação com cl100k_base,
+        indicada por "exact": False.
+
+        O texto é tokenizado uma vez por encoding distinto, não por modelo.
+
+        Args:
+            content: str - O conteúdo do documento
+            known_counts: dict (opcional) - Contagens já conhecidas (modelo -> tokens)
+
+        Returns:
+            dict: modelo -> {"tokens", "limit", "fits", "usage_percent", "encoding", "exact"}
+        """
+        counts = count_tokens_for_models(content, self.model_limits, known_counts=known_counts)
+        return {
+            model: {
+                "tokens": counts[model],
+                "limit": limit,
+                "fits": counts[model] <= limit,
+                "usage_percent": round(counts[model] / limit * 100, 2),
+                "encoding": encoding_name_for_model(model),
+                "exact": has_exact_encoding(model)
+            }
+            for model, limit in self.model_limits.items()
+        }
+
+    def analyze_sections(self, sections_dict, model_fit=None):
         """
         Analisa um dicionário de seções e suas contagens de tokens.
         
         Args:
             sections_dict: Dict[str, int] - Um dicionário de seção -> contagem de tokens
+            model_fit: dict (opcional) - Resultado de model_fit(); quando informado,
+                a recomendação de modelo usa a contagem de cada modelo
             
         Returns:
             dict: Análise e recomendações
@@ -103,7 +137,8 @@ class TokenAnalyzer:
                 # Recomendar um modelo com capacidade suficiente
                 suitable_models = []
                 for model, limit in self.model_limits.items():
-                    if limit >= total_tokens:
+                    fits = model_fit[model]["fits"] if model_fit and model in model_fit else limit >= total_tokens
+                    if fits:
                         suitable_models.append((model, limit))
                 
                 if suitable_models:
@@ -137,7 +172,7 @@ class TokenAnalyzer:
             
             logger.debug(f"Análise concluída: {len(recommendations)} recomendações geradas")
             
-            return {
+            analysis = {
                 "total_tokens": total_tokens,
                 "model_limit": model_limit,
                 "exceeds_limit": exceeds_limit,
@@ -145,6 +180,9 @@ class TokenAnalyzer:
                 "expensive_sections": expensive_sections,
                 "recommendations": recommendations
             }
+            if model_fit:
+                analysis["model_fit"] = model_fit
+            return analysis
         except Exception as e:
             logger.error(f"Erro durante a análise de seções: {str(e)}")
             raise
@@ -159,24 +197,14 @@ class TokenAnalyzer:
         Returns:
             dict: Análise e recomendações
         """
-        import re
-        
         # Total de tokens
         total_tokens = count_tokens(content, self.model_name)
         
-        # Extrair seções
-        sections = re.split(r'(^# .+)', content, flags=re.MULTILINE)
-        section_map = {}
-        current = None
-        for part in sections:
-            if part.strip().startswith('# '):
-                current = part.strip()
-                section_map[current] = ''
-            elif current:
-                section_map[current] += part
+        # Indexar seções (intervalos sobre o texto, sem cópias)
+        section_map = SectionIndex(content)
         
         # Contar tokens por seção
-        sections_tokens = {sec: count_tokens(txt, self.model_name) for sec, txt in section_map.items()}
+        sections_tokens = section_map.count_tokens(self.model_name)
         
         # Para documentos muito grandes, extrair amostra representativa para análise
         content_sample = self._extract_content_sample(content, section_map, max_size=50000)
@@ -184,8 +212,9 @@ class TokenAnalyzer:
         # Identificar tipo de conteúdo baseado em palavras-chave e estrutura
         content_type = self._detect_content_type(content_sample, section_map)
         
-        # Análise
-        analysis = self.analyze_sections(sections_tokens)
+        # Análise, com a contagem exata para cada modelo conhecido
+        model_fit = self.model_fit(content, known_counts={self.model_name: total_tokens})
+        analysis = self.analyze_sections(sections_tokens, model_fit=model_fit)
         
         # Adicionar recomendações de chunking específicas
         if content_type:
@@ -1,59 +1,306 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import tiktoken
+from src.config import TOKEN_COUNT_CACHE_SIZE, TOKEN_ESTIMATE_SAMPLES, TOKEN_ESTIMATE_SAMPLE_CHARS
 from src.utils.logging_config import setup_logger
 
 # Configurar logger para este módulo
 logger = setup_logger(__name__)
 
-def count_tokens(text, model_name: str = "gpt-3.5-turbo") -> int:
+# Threads usadas pelo tiktoken na contagem em lote
+BATCH_NUM_THREADS = 8
+
+# Encoding usado para modelos que o tiktoken não conhece (Claude, Gemini, etc.)
+FALLBACK_ENCODING = "cl100k_base"
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = "gpt-3.5-turbo") -> tiktoken.Encoding:
     """
-    Retorna o número de tokens para o texto dado usando tiktoken.
+    Retorna o encoding do tiktoken para o modelo, memorizado por processo.
+
+    Modelos não reconhecidos usam cl100k_base; o aviso é registrado uma única
+    vez por modelo.
 
     Args:
-        text: Texto a ser analisado
-        model_name: Nome do modelo para usar encoding correto
+        model_name: Nome do modelo
 
     Returns:
-        int: Número de tokens
+        tiktoken.Encoding: Encoding do modelo
 
     Raises:
         ValueError: Se o modelo não for reconhecido e nenhum fallback funcionar
     """
     try:
-        logger.debug(f"Contando tokens para modelo: {model_name}")
-        encoding = tiktoken.encoding_for_model(model_name)
+        return tiktoken.encoding_for_model(model_name)
     except KeyError:
         # Modelo não reconhecido, tentar fallbacks
-        logger.warning(f"Modelo {model_name} não reconhecido, usando fallback cl100k_base")
+        logger.warning(f"Modelo {model_name} não reconhecido, usando fallback {FALLBACK_ENCODING}")
         try:
-            encoding = tiktoken.get_encoding("cl100k_base")
+            return tiktoken.get_encoding(FALLBACK_ENCODING)
         except Exception as e:
             logger.error(f"Falha ao obter encoding: {str(e)}")
             raise ValueError(f"Não foi possível obter encoding para {model_name}")
 
-    if not text:
-        logger.debug("Texto vazio, retornando 0 tokens")
-        return 0
 
+def _normalizar_texto(text) -> str:
+    if not text:
+        return ""
     # Converter para string se não for string
     if not isinstance(text, str):
         try:
-            text = str(text)
-            logger.debug(f"Convertido entrada não-string para string: {text}")
+            return str(text)
         except Exception as e:
             logger.error(f"Erro ao converter para string: {str(e)}")
-            return 0
+            return ""
+    return text
+
+
+def count_tokens(text, model_name: str = "gpt-3.5-turbo") -> int:
+    """
+    Retorna o número de tokens para o texto dado usando tiktoken.
+
+    Args:
+        text: Texto a ser analisado
+        model_name: Nome do modelo para usar encoding correto
+
+    Returns:
+        int: Número de tokens
+
+    Raises:
+        ValueError: Se o modelo não for reconhecido e nenhum fallback funcionar
+    """
+    encoding = get_encoding(model_name)
+
+    text = _normalizar_texto(text)
+    if not text:
+        logger.debug("Texto vazio, retornando 0 tokens")
+        return 0
 
     try:
-        tokens = encoding.encode(text)
-        token_count = len(tokens)
-        logger.debug(f"Contagem concluída: {token_count} tokens")
-        return token_count
+        # Tokens especiais no texto são contados como texto comum
+        return len(encoding.encode_ordinary(text))
     except Exception as e:
         logger.error(f"Erro ao codificar texto: {str(e)}")
-        # Em caso de erro, tentar fazer contagem aproximada
+        # Em caso de erro, fazer contagem aproximada
         logger.warning("Usando estimativa aproximada de tokens (4 caracteres = 1 token)")
-        try:
-            return len(text) // 4  # Aproximação grosseira
-        except Exception:
-            logger.error("Falha na estimativa aproximada de tokens")
-            return 1  # Retornar valor mínimo
\ No newline at end of file
+        return len(text) // 4  # Aproximação grosseira
+
+
+def count_tokens_batch(texts: Iterable, model_name: str = "gpt-3.5-turbo") -> List[int]:
+    """
+    Conta tokens de vários textos de uma vez, usando as threads nativas do tiktoken.
+
+    Preferível a chamar count_tokens em laço (ex: uma chamada por seção). As
+    listas de tokens de cada texto são descartadas assim que contadas.
+
+    Args:
+        texts: Textos a serem analisados
+        model_name: Nome do modelo para usar encoding correto
+
+    Returns:
+        List[int]: Número de tokens de cada texto, na mesma ordem
+
+    Raises:
+        ValueError: Se o modelo não for reconhecido e nenhum fallback funcionar
+    """
+    encoding = get_encoding(model_name)
+    texts = [_normalizar_texto(text) for text in texts]
+
+    try:
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts, num_threads=BATCH_NUM_THREADS)]
+    except Exception as e:
+        logger.error(f"Erro ao codificar lote de textos: {str(e)}")
+        return [count_tokens(text, model_name) for text in texts]
+
+
+@lru_cache(maxsize=None)
+def encoding_name_for_model(model_name: str) -> str:
+    """
+    Retorna o nome do encoding usado na contagem de tokens do modelo.
+
+    Segue a mesma regra de get_encoding: modelos desconhecidos usam FALLBACK_ENCODING.
+    """
+    try:
+        return tiktoken.encoding_name_for_model(model_name)
+    except KeyError:
+        logger.debug(f"Modelo {model_name} não reconhecido, usando {FALLBACK_ENCODING}")
+        return FALLBACK_ENCODING
+
+
+def has_exact_encoding(model_name: str) -> bool:
+    """
+    Indica se o tiktoken conhece o encoding do modelo, ou seja, se a contagem
+    é exata e não uma aproximação com FALLBACK_ENCODING.
+    """
+    try:
+        tiktoken.encoding_name_for_model(model_name)
+        return True
+    except KeyError:
+        return False
+
+
+class _TokenCountCache:
+    """Cache LRU de contagens por (SHA-256 do texto, encoding), seguro entre threads."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, count: int) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = count
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+_count_cache = _TokenCountCache(TOKEN_COUNT_CACHE_SIZE)
+
+
+def count_tokens_for_models(
+    text,
+    model_names: Iterable[str],
+    known_counts: Optional[Dict[str, int]] = None
+) -> Dict[str, int]:
+    """
+    Conta os tokens de um texto para vários modelos, tokenizando-o uma única
+    vez por encoding distinto (a maioria dos modelos compartilha cl100k_base
+    ou o200k_base).
+
+    As contagens são exatas (as mesmas de count_tokens para cada modelo) e
+    ficam em cache por hash do texto e encoding.
+
+    Args:
+        text: Texto a ser analisado
+        model_names: Modelos para os quais contar
+        known_counts: Contagens já conhecidas do texto (modelo -> tokens), ex:
+            produzidas durante a formatação; o encoding desses modelos não é
+            tokenizado de novo
+
+    Returns:
+        Dict[str, int]: Número de tokens por modelo
+    """
+    text = _normalizar_texto(text)
+    model_names = list(model_names)
+    if not text:
+        return {model: 0 for model in model_names}
+
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    counts_by_encoding: Dict[str, int] = {}
+    for model, count in (known_counts or {}).items():
+        encoding_name = encoding_name_for_model(model)
+        counts_by_encoding[encoding_name] = count
+        _count_cache.put((text_hash, encoding_name), count)
+    result = {}
+    for model in model_names:
+        encoding_name = encoding_name_for_model(model)
+        if encoding_name not in counts_by_encoding:
+            key = (text_hash, encoding_name)
+            count = _count_cache.get(key)
+            if count is None:
+                logger.debug(f"Contando tokens com encoding {encoding_name}")
+                count = len(tiktoken.get_encoding(encoding_name).encode_ordinary(text))
+                _count_cache.put(key, count)
+            counts_by_encoding[encoding_name] = count
+        result[model] = counts_by_encoding[encoding_name]
+    return result
+
+
+# Erro relativo mínimo reportado pela estimativa: a variação entre as amostras
+# não enxerga o trecho não amostrado de cada estrato e pode ser quase nula em
+# textos repetitivos
+MIN_ESTIMATE_ERROR = 0.02
+
+
+def _amostras_estratificadas(text: str, num_samples: int, sample_chars: int) -> List[Tuple[str, str]]:
+    """
+    Divide o texto em `num_samples` estratos contíguos e retorna, para cada um,
+    (estrato, amostra do seu centro). As bordas da amostra são alinhadas a
+    espaços para não cortar palavras ao meio.
+    """
+    stratum_size = math.ceil(len(text) / num_samples)
+    strata = []
+    for start in range(0, len(text), stratum_size):
+        stratum = text[start:start + stratum_size]
+        offset = max(0, (len(stratum) - sample_chars) // 2)
+        sample = stratum[offset:offset + sample_chars]
+        if offset:
+            space = sample.find(" ")
+            sample = sample[space + 1:] if 0 <= space < len(sample) // 4 else sample
+        if offset + sample_chars < len(stratum):
+            space = sample.rfind(" ")
+            sample = sample[:space] if space > len(sample) * 3 // 4 else sample
+        strata.append((stratum, sample))
+    return strata
+
+
+def estimate_tokens(
+    text,
+    model_name: str = "gpt-3.5-turbo",
+    num_samples: int = TOKEN_ESTIMATE_SAMPLES,
+    sample_chars: int = TOKEN_ESTIMATE_SAMPLE_CHARS
+) -> Dict[str, Any]:
+    """
+    Estima o número de tokens sem codificar o texto inteiro.
+
+    O texto é dividido em estratos; uma amostra do centro de cada estrato é
+    codificada e sua densidade (tokens por byte UTF-8) é aplicada ao tamanho
+    em bytes do estrato. O erro reportado vem da variação da densidade entre
+    as amostras, com piso de MIN_ESTIMATE_ERROR. Textos pequenos (até duas
+    vezes o total amostrado) são contados exatamente.
+
+    Args:
+        text: Texto a ser analisado
+        model_name: Nome do modelo para usar encoding correto
+        num_samples: Número de estratos/amostras
+        sample_chars: Caracteres por amostra
+
+    Returns:
+        dict: {"tokens": estimativa, "error_bound": erro absoluto (~95%), "exact": bool}
+    """
+    text = _normalizar_texto(text)
+    if len(text) <= 2 * num_samples * sample_chars:
+        return {"tokens": count_tokens(text, model_name), "error_bound": 0, "exact": True}
+
+    encoding = get_encoding(model_name)
+    strata = _amostras_estratificadas(text, num_samples, sample_chars)
+    samples = [sample for _, sample in strata]
+    sample_tokens = [len(tokens) for tokens in encoding.encode_ordinary_batch(samples, num_threads=BATCH_NUM_THREADS)]
+
+    estimate = 0.0
+    densities = []
+    for (stratum, sample), tokens in zip(strata, sample_tokens):
+        # Amostras nunca são vazias: todo estrato tem ao menos um token
+        density = tokens / max(1, len(sample.encode("utf-8")))
+        densities.append(density)
+        estimate += len(stratum.encode("utf-8")) * density
+
+    # Erro do estimador estratificado a partir da variação entre amostras (z ~ 2)
+    mean = sum(densities) / len(densities)
+    variance = sum((d - mean) ** 2 for d in densities) / max(1, len(densities) - 1)
+    relative_error = max(MIN_ESTIMATE_ERROR, 2 * math.sqrt(variance / len(densities)) / mean)
+
+    return {
+        "tokens": int(round(estimate)),
+        "error_bound": int(math.ceil(estimate * relative_error)),
+        "exact": False
+    }
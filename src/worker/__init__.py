@@ -0,0 +1 @@
+# Worker de conversão de documentos
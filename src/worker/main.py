@@ -0,0 +1,192 @@
+"""
+Worker de conversão de documentos.
+
+Consome jobs da fila Redis e executa as conversões em um pool limitado de
+processos, isolando o trabalho CPU-bound (Docling/OCR) do processo da API.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from src.api.models import ConversionRequest
+from src.api.services.conversion_service import redis_client, process_document
+from src.worker.queue import heartbeat_key, processing_key
+from src.config import JOB_QUEUE_KEY, WORKER_CONCURRENCY, WORKER_POLL_TIMEOUT, WORKER_ID, WORKER_HEARTBEAT_TTL
+from src.utils.logging_config import setup_logger
+
+# Configurar logger
+logger = setup_logger(__name__)
+
+
+class ConversionWorker:
+    """
+    Consome a fila de jobs e processa no máximo `concurrency` conversões por vez.
+    """
+
+    def __init__(self, redis=redis_client, concurrency=WORKER_CONCURRENCY, worker_id=WORKER_ID,
+                 heartbeat_ttl=WORKER_HEARTBEAT_TTL):
+        """
+        Inicializa o worker.
+
+        Args:
+            redis: Cliente Redis assíncrono
+            concurrency (int): Número de processos de conversão
+            worker_id (str): Identificador do worker
+            heartbeat_ttl (int): Validade (segundos) do heartbeat do worker
+        """
+        self.redis = redis
+        self.concurrency = max(1, int(concurrency))
+        self.worker_id = worker_id
+        self.processing_key = processing_key(worker_id)
+        self.heartbeat_key = heartbeat_key(worker_id)
+        self.heartbeat_ttl = max(1, int(heartbeat_ttl))
+        self.executor = None
+        self._slots = None
+        self._tasks = set()
+        self._stopping = False
+
+    def stop(self):
+        """Solicita parada: não consome novos jobs e aguarda os em andamento."""
+        if not self._stopping:
+            logger.info("Parada solicitada, aguardando jobs em andamento")
+        self._stopping = True
+
+    async def _requeue(self, key):
+        # LMOVE é atômico: com dois workers recuperando a mesma lista, cada job volta uma vez
+        count = 0
+        while True:
+            payload = await self.redis.lmove(key, JOB_QUEUE_KEY, "RIGHT", "RIGHT")
+            if payload is None:
+                break
+            count += 1
+        return count
+
+    async def requeue_orphans(self):
+        """
+        Devolve à fila os jobs que este worker deixou em andamento ao ser interrompido.
+        """
+        count = await self._requeue(self.processing_key)
+        if count:
+            logger.warning(f"{count} job(s) interrompido(s) devolvido(s) à fila")
+
+    async def heartbeat(self):
+        """Renova o heartbeat deste worker."""
+        await self.redis.set(self.heartbeat_key, "1", ex=self.heartbeat_ttl)
+
+    async def requeue_dead_workers(self):
+        """
+        Devolve à fila os jobs em andamento de workers cujo heartbeat expirou.
+
+        Cobre workers que não voltam com o mesmo ID (ex: pod substituído no
+        Kubernetes, com outro hostname), cujas listas não seriam recuperadas
+        por requeue_orphans.
+        """
+        prefix = processing_key("")
+        async for key in self.redis.scan_iter(match=f"{prefix}*"):
+            worker_id = key[len(prefix):]
+            if worker_id == self.worker_id or await self.redis.exists(heartbeat_key(worker_id)):
+                continue
+            count = await self._requeue(key)
+            if count:
+                logger.warning(f"{count} job(s) do worker inativo {worker_id} devolvido(s) à fila")
+
+    async def _heartbeat_loop(self):
+        """Renova o heartbeat e recupera jobs de workers inativos periodicamente."""
+        while True:
+            await asyncio.sleep(self.heartbeat_ttl / 3)
+            try:
+                await self.heartbeat()
+                await self.requeue_dead_workers()
+            except Exception as e:
+                logger.warning(f"Falha no heartbeat do worker: {str(e)}")
+
+    async def run(self):
+        """Loop principal: consome jobs enquanto houver capacidade disponível."""
+        # spawn evita herdar o event loop e conexões Redis nos processos filhos
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.concurrency,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._slots = asyncio.Semaphore(self.concurrency)
+        logger.info(f"Worker {self.worker_id} iniciado com {self.concurrency} processo(s)")
+
+        heartbeat_task = None
+        try:
+            await self.heartbeat()
+            await self.requeue_orphans()
+            await self.requeue_dead_workers()
+            heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+            while not self._stopping:
+                await self._slots.acquire()
+                try:
+                    # Mover atomicamente para a lista de jobs em andamento deste worker
+                    payload = await self.redis.blmove(
+                        JOB_QUEUE_KEY, self.processing_key, WORKER_POLL_TIMEOUT, "RIGHT", "LEFT"
+                    )
+                except Exception as e:
+                    self._slots.release()
+                    logger.error(f"Erro ao consumir fila de jobs: {str(e)}")
+                    await asyncio.sleep(1)
+                    continue
+
+                if payload is None:
+                    self._slots.release()
+                    continue
+
+                task = asyncio.create_task(self._handle(payload))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            if heartbeat_task:
+                heartbeat_task.cancel()
+            self.executor.shutdown(wait=True)
+            try:
+                await self.redis.delete(self.heartbeat_key)
+            except Exception as e:
+                logger.warning(f"Falha ao remover heartbeat do worker: {str(e)}")
+            logger.info(f"Worker {self.worker_id} finalizado")
+
+    async def _handle(self, payload):
+        """Processa um job consumido da fila."""
+        try:
+            job = json.loads(payload)
+            params = ConversionRequest(**job["params"])
+            logger.info(f"Processando job {job['job_id']}")
+            await process_document(
+                job["job_id"], job["file_path"], params,
+                executor=self.executor, cache_key=job.get("cache_key")
+            )
+        except Exception as e:
+            logger.error(f"Erro ao processar payload da fila: {str(e)}")
+        finally:
+            try:
+                await self.redis.lrem(self.processing_key, 1, payload)
+            except Exception as e:
+                logger.warning(f"Falha ao remover job da lista em andamento: {str(e)}")
+            self._slots.release()
+
+
+async def _run_worker():
+    worker = ConversionWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await redis_client.close()
+
+
+def main():
+    """Ponto de entrada do worker."""
+    asyncio.run(_run_worker())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Fila Redis de jobs de conversão compartilhada entre API e workers.
+"""
+
+import json
+from typing import Optional
+from src.config import JOB_QUEUE_KEY
+
+
+def processing_key(worker_id: str) -> str:
+    """Retorna a lista Redis com os jobs em andamento de um worker."""
+    return f"{JOB_QUEUE_KEY}:processing:{worker_id}"
+
+
+def heartbeat_key(worker_id: str) -> str:
+    """Retorna a chave Redis (com TTL) que indica que o worker está vivo."""
+    return f"{JOB_QUEUE_KEY}:heartbeat:{worker_id}"
+
+
+async def enqueue_job(redis, job_id: str, file_path: str, params, cache_key: Optional[str] = None) -> None:
+    """
+    Enfileira um job de conversão para os workers.
+
+    Args:
+        redis: Cliente Redis assíncrono
+        job_id: ID do job
+        file_path: Caminho do arquivo salvo (em volume compartilhado com os workers)
+        params: Parâmetros de conversão (ConversionRequest)
+        cache_key: Chave do cache de resultados a registrar ao concluir
+    """
+    payload = json.dumps({
+        "job_id": job_id,
+        "file_path": file_path,
+        "params": params.model_dump(mode="json"),
+        "cache_key": cache_key
+    })
+    # LPUSH + BLMOVE RIGHT garante ordem FIFO
+    await redis.lpush(JOB_QUEUE_KEY, payload)
@@ -18,8 +18,11 @@ def mock_redis():
         "progress": "1.0",
         "result": '{"formats": {"llms": "test content"}}'
     }
+    mock.hmget.return_value = ["completed", "1.0", None]
     mock.hset.return_value = True
     mock.expire.return_value = True
+    # pipeline() é síncrono; apenas execute() é aguardado
+    mock.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[])))
     return mock
 
 
@@ -109,7 +109,8 @@ class LLMsAPIUser(HttpUser):
         """
         Task moderada: Verificar status de job (peso 2).
 
-        Verifica status de jobs criados anteriormente.
+        Faz polling leve em /status (sem resultado) e baixa o resultado
+        uma única vez, quando o job conclui.
         """
         if not self.job_ids:
             return  # Sem jobs para verificar
@@ -118,8 +119,9 @@ class LLMsAPIUser(HttpUser):
         job_id = random.choice(self.job_ids)
 
         with self.client.get(
-            f"/v1/convert/{job_id}",
+            f"/v1/convert/{job_id}/status",
             headers=self.headers,
+            name="/v1/convert/[job_id]/status",
             catch_response=True
         ) as response:
             if response.status_code == 200:
@@ -127,9 +129,11 @@ class LLMsAPIUser(HttpUser):
                 if "status" in data:
                     response.success()
 
-                    # Se job completou, remover da lista
+                    # Se job terminou, remover da lista
                     if data["status"] in ["completed", "failed"]:
                         self.job_ids.remove(job_id)
+                        if data["status"] == "completed":
+                            self.fetch_result(job_id)
                 else:
                     response.failure("Resposta de status inválida")
             elif response.status_code == 404:
@@ -139,6 +143,14 @@ class LLMsAPIUser(HttpUser):
             else:
                 response.failure(f"Status check falhou: {response.status_code}")
 
+    def fetch_result(self, job_id):
+        """Baixa o resultado completo de um job concluído."""
+        self.client.get(
+            f"/v1/convert/{job_id}/result",
+            headers=self.headers,
+            name="/v1/convert/[job_id]/result"
+        )
+
 
 class AdminUser(HttpUser):
     """
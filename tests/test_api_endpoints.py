@@ -25,6 +25,20 @@ async def test_detect_content_type_endpoint():
         assert "content_type" in resp
         assert "chunking_recommendation" in resp
 
+@pytest.mark.asyncio
+async def test_analyzer_fast_mode_accepts_large_content():
+    content = "# Content\n" + "Texto de exemplo para estimativa de tokens. " * 40000
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/v1/analyzer/tokens", json={"content": content, "count_mode": "fast"})
+        assert response.status_code == 200
+        json_data = response.json()
+        assert json_data["estimated"] is True
+        assert json_data["error_bound"] > 0
+        assert json_data["model_fit"] is None
+
+        response = await ac.post("/v1/analyzer/tokens", json={"content": content, "count_mode": "exact"})
+        assert response.status_code == 400
+
 @pytest.mark.asyncio
 async def test_convert_invalid_file_extension():
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
@@ -3,6 +3,7 @@ Testes de integração para API REST.
 
 Estes testes usam mocks para não depender de Redis real.
 """
+import os
 import pytest
 from io import BytesIO
 from unittest.mock import patch, AsyncMock
@@ -102,8 +103,62 @@ class TestConversionEndpoint:
             data={"params": "{}"}
         )
 
-        assert response.status_code == 400
+        assert response.status_code == 413
+        assert "excedido" in response.json()["detail"]
+
+    def test_convert_interrompe_upload_ao_exceder_limite(self, test_client, api_headers, tmp_path):
+        """Testa que o limite também é aplicado durante a gravação em disco."""
+        with patch('src.api.services.conversion_service.MAX_FILE_SIZE', 1024), \
+             patch('src.api.services.conversion_service.UPLOAD_DIR', str(tmp_path)):
+            response = test_client.post(
+                "/v1/convert/",
+                headers=api_headers,
+                files={"file": ("test.pdf", BytesIO(b"x" * 4096), "application/pdf")},
+                data={"params": "{}"}
+            )
+
+        assert response.status_code == 413
         assert "excedido" in response.json()["detail"]
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_upload_multipart_lido_do_stream(self, tmp_path):
+        """Testa que o multipart é gravado direto do stream e interrompido no limite."""
+        from src.api.services.conversion_service import receive_multipart_upload, UploadTooLargeError
+
+        def corpo(conteudo):
+            return (
+                b'--limite\r\nContent-Disposition: form-data; name="params"\r\n\r\n{}\r\n'
+                b'--limite\r\nContent-Disposition: form-data; name="file"; filename="../doc.pdf"\r\n'
+                b'Content-Type: application/pdf\r\n\r\n' + conteudo + b'\r\n--limite--\r\n'
+            )
+
+        lidos = []
+
+        async def stream(dados, tamanho=7):
+            for i in range(0, len(dados), tamanho):
+                lidos.append(i)
+                yield dados[i:i + tamanho]
+
+        with patch('src.api.services.conversion_service.UPLOAD_DIR', str(tmp_path)):
+            fields, upload = await receive_multipart_upload(
+                "multipart/form-data; boundary=limite", stream(corpo(b"%PDF-1.4 conteudo"))
+            )
+            assert fields == {"params": "{}"}
+            filename, file_path, _ = upload
+            assert filename == "doc.pdf"
+            assert open(file_path, "rb").read() == b"%PDF-1.4 conteudo"
+            os.remove(file_path)
+
+            lidos.clear()
+            dados = corpo(b"x" * 4096)
+            with patch('src.api.services.conversion_service.MAX_FILE_SIZE', 1024):
+                with pytest.raises(UploadTooLargeError):
+                    await receive_multipart_upload(
+                        "multipart/form-data; boundary=limite", stream(dados, 256)
+                    )
+            # O restante do corpo não foi lido e nada ficou em disco
+            assert len(lidos) < len(dados) // 256
+            assert list(tmp_path.iterdir()) == []
 
     @patch('src.api.routers.converter.create_conversion_job')
     async def test_convert_file_success(self, mock_create_job, test_client, api_headers, sample_pdf_content):
@@ -182,6 +237,39 @@ class TestJobStatusEndpoint:
         assert "job_id" in data
         assert "status" in data
 
+    def test_get_job_progress_single_round_trip(self, test_client, api_headers, mock_redis):
+        """Testa que /status lê apenas status/progresso/erro, sem o resultado."""
+        mock_redis.hmget.return_value = ["processing", "0.2", None]
+
+        response = test_client.get("/v1/convert/test-job-123/status", headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.json() == {"job_id": "test-job-123", "status": "processing", "progress": 0.2, "error": None}
+        mock_redis.hmget.assert_awaited_once_with("job:test-job-123", "status", "progress", "error")
+        mock_redis.hgetall.assert_not_called()
+
+    def test_get_job_progress_not_found(self, test_client, api_headers, mock_redis):
+        """Testa /status para job inexistente."""
+        mock_redis.hmget.return_value = [None, None, None]
+
+        response = test_client.get("/v1/convert/nonexistent-job/status", headers=api_headers)
+
+        assert response.status_code == 404
+
+    def test_get_job_result(self, test_client, api_headers, mock_redis):
+        """Testa /result para job concluído e em processamento."""
+        mock_redis.hgetall.return_value = {
+            "status": "completed",
+            "result": '{"formats": {"llms": "test content"}, "processing_time": 1.0}'
+        }
+        response = test_client.get("/v1/convert/test-job-123/result", headers=api_headers)
+        assert response.status_code == 200
+        assert response.json()["formats"] == {"llms": "test content"}
+
+        mock_redis.hgetall.return_value = {"status": "processing", "progress": "0.5"}
+        response = test_client.get("/v1/convert/test-job-123/result", headers=api_headers)
+        assert response.status_code == 404
+
 
 class TestValidationModels:
     """Testes para validação de modelos Pydantic."""
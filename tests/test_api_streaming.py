@@ -0,0 +1,233 @@
+"""
+Testes do streaming de páginas de jobs de conversão.
+"""
+import asyncio
+import json
+from unittest.mock import patch, MagicMock, AsyncMock
+from src.api.services import conversion_service
+
+
+def _hget_job(params, statuses, result_ref=None):
+    """Simula HGET do job: params fixos e sequência de status."""
+    statuses = iter(statuses)
+
+    async def hget(key, field):
+        if field == "params":
+            return json.dumps(params)
+        if field == "result_ref":
+            return result_ref
+        return next(statuses)
+    return hget
+
+
+class TestStreamEndpoint:
+    """Testes para GET /v1/convert/{job_id}/stream."""
+
+    def test_stream_envia_paginas_e_fim(self, test_client, mock_redis, api_headers):
+        mock_redis.hget.side_effect = _hget_job({"stream": True}, ["processing", "completed"])
+        mock_redis.lrange.side_effect = [
+            [json.dumps({"page": 1, "content": "Página 1"})],
+            [json.dumps({"page": 2, "content": "Página 2"})],
+        ]
+
+        with patch.object(conversion_service, "STREAM_POLL_INTERVAL", 0):
+            response = test_client.get("/v1/convert/job-1/stream", headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = response.text
+        assert 'id: 0\nevent: page\ndata: {"page": 1, "content": "P\\u00e1gina 1"}' in body
+        assert "id: 1\nevent: page" in body
+        assert body.endswith('event: end\ndata: {"status": "completed"}\n\n')
+
+    def test_stream_retoma_de_last_event_id(self, test_client, mock_redis, api_headers):
+        mock_redis.hget.side_effect = _hget_job({"stream": True}, ["completed"])
+        mock_redis.lrange.return_value = []
+
+        headers = dict(api_headers, **{"Last-Event-ID": "4"})
+        response = test_client.get("/v1/convert/job-1/stream", headers=headers)
+
+        assert response.status_code == 200
+        mock_redis.lrange.assert_awaited_with("job:job-1:pages", 5, -1)
+
+    def test_stream_de_job_do_cache_le_paginas_da_origem(self, test_client, mock_redis, api_headers):
+        mock_redis.hget.side_effect = _hget_job({"stream": True}, ["completed"], result_ref="job-origem")
+        mock_redis.lrange.return_value = [json.dumps({"page": 1, "content": "Página 1"})]
+
+        response = test_client.get("/v1/convert/job-1/stream", headers=api_headers)
+
+        assert "id: 0\nevent: page" in response.text
+        mock_redis.lrange.assert_awaited_with("job:job-origem:pages", 0, -1)
+
+    def test_stream_nao_habilitado(self, test_client, mock_redis, api_headers):
+        mock_redis.hget.side_effect = _hget_job({"stream": False}, [])
+
+        response = test_client.get("/v1/convert/job-1/stream", headers=api_headers)
+
+        assert response.status_code == 400
+
+    def test_stream_job_inexistente(self, test_client, mock_redis, api_headers):
+        mock_redis.hget.side_effect = None
+        mock_redis.hget.return_value = None
+
+        response = test_client.get("/v1/convert/job-x/stream", headers=api_headers)
+
+        assert response.status_code == 404
+
+
+def _pubsub(messages):
+    """Simula o pub/sub do Redis entregando as mensagens informadas."""
+    pubsub = MagicMock()
+    pubsub.subscribe = AsyncMock()
+    pubsub.unsubscribe = AsyncMock()
+    pubsub.reset = AsyncMock()
+    pubsub.get_message = AsyncMock(side_effect=messages)
+    return pubsub
+
+
+class TestEventsEndpoint:
+    """Testes para GET /v1/convert/{job_id}/events e /ws."""
+
+    def test_events_envia_snapshot_e_atualizacoes(self, test_client, mock_redis, api_headers):
+        mock_redis.hmget.side_effect = [
+            ["processing", "0.2", None],
+            ["processing", "0.2", "Convertendo documento", None],
+        ]
+        pubsub = _pubsub([
+            None,
+            {"data": json.dumps({"status": "completed", "progress": "1.0"})},
+        ])
+        mock_redis.pubsub = MagicMock(return_value=pubsub)
+
+        response = test_client.get("/v1/convert/job-1/events", headers=api_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = response.text.split("\n\n")
+        assert json.loads(events[0].split("data: ")[1]) == {
+            "status": "processing", "progress": 0.2, "status_message": "Convertendo documento"
+        }
+        assert json.loads(events[1].split("data: ")[1]) == {"status": "completed", "progress": 1.0}
+        assert events[2] == 'event: end\ndata: {"status": "completed"}'
+        pubsub.subscribe.assert_awaited_once_with("job:job-1:events")
+        pubsub.reset.assert_awaited_once()
+
+    def test_events_job_inexistente(self, test_client, mock_redis, api_headers):
+        mock_redis.hmget.return_value = [None, None, None]
+
+        response = test_client.get("/v1/convert/job-x/events", headers=api_headers)
+
+        assert response.status_code == 404
+
+    def test_websocket_envia_snapshot_de_job_concluido(self, test_client, mock_redis, api_headers):
+        mock_redis.hmget.side_effect = [
+            ["completed", "1.0", None],
+            ["completed", "1.0", "Processamento concluído", None],
+        ]
+        mock_redis.pubsub = MagicMock(return_value=_pubsub([]))
+
+        with test_client.websocket_connect("/v1/convert/job-1/ws", headers=api_headers) as ws:
+            assert ws.receive_json() == {
+                "status": "completed", "progress": 1.0, "status_message": "Processamento concluído"
+            }
+
+
+def test_eventos_intermediarios_chegam_antes_da_conclusao(test_client, mock_redis, api_headers, tmp_path):
+    """Progresso das etapas da conversão é publicado e entregue ao assinante antes de completed."""
+    from src.api.models import ConversionRequest
+    from src.api.services.job_progress import JobProgressWriter
+
+    publicados = []
+    mock_redis.pipeline.return_value.publish.side_effect = lambda canal, dados: publicados.append(dados)
+    redis_sync = MagicMock()
+    redis_sync.pipeline.return_value.publish.side_effect = lambda canal, dados: publicados.append(dados)
+
+    class FakeConverter:
+        def __init__(self, **kwargs):
+            pass
+
+        def run(self, callback_progresso=None, **kwargs):
+            callback_progresso(0.5)
+            return {"formats": {"llms": "# Content\n\nTexto"}, "doc": None}
+
+    arquivo = tmp_path / "doc.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    with patch.object(conversion_service, "DocumentConverterTool", FakeConverter), \
+         patch.object(conversion_service, "JobProgressWriter",
+                      lambda job_id: JobProgressWriter(job_id, redis=redis_sync, flush_interval=0)), \
+         patch.object(conversion_service, "get_result_store") as store:
+        store.return_value.save_formats.return_value = "job-1"
+        asyncio.run(conversion_service.process_document(
+            "job-1", str(arquivo), ConversionRequest(profile="llms-min")
+        ))
+
+    eventos = [json.loads(dados) for dados in publicados]
+    assert eventos[0]["progress"] == "0.2"
+    assert eventos[-1]["status"] == "completed"
+    progressos = [float(evento["progress"]) for evento in eventos[1:-1] if "progress" in evento]
+    assert progressos and all(0.2 < p < 1.0 for p in progressos)
+
+    # O assinante do SSE recebe os eventos intermediários antes do final
+    mock_redis.hmget.side_effect = [
+        ["processing", "0.2", None],
+        ["processing", "0.2", "Convertendo documento", None],
+    ]
+    mock_redis.pubsub = MagicMock(return_value=_pubsub([{"data": dados} for dados in publicados[1:]]))
+
+    response = test_client.get("/v1/convert/job-1/events", headers=api_headers)
+
+    recebidos = [json.loads(bloco.split("data: ")[1]) for bloco in response.text.split("\n\n")
+                 if bloco.startswith("event: progress")]
+    assert recebidos[1] == {"progress": 0.45, "status_message": "Convertendo documento (50% das páginas)"}
+    assert recebidos[2]["progress"] == 0.7
+    assert recebidos[-1]["status"] == "completed"
+
+
+def test_pipeline_publica_paginas_no_modo_stream():
+    """Testa que a conversão publica cada página no stream do job."""
+    class FakeConverter:
+        def __init__(self, **kwargs):
+            pass
+
+        def run(self, callback_paginas=None, **kwargs):
+            callback_paginas(1, "Página 1")
+            callback_paginas(2, "Página 2")
+            return {"formats": {"llms": "# Content"}, "doc": None}
+
+    writer = MagicMock()
+    with patch.object(conversion_service, "DocumentConverterTool", FakeConverter), \
+         patch.object(conversion_service, "JobProgressWriter"), \
+         patch.object(conversion_service, "PageStreamWriter", return_value=writer) as writer_cls:
+        conversion_service.run_conversion_pipeline(
+            "doc.pdf", {"stream": True, "profile": "llms-min"}, job_id="job-1"
+        )
+
+    writer_cls.assert_called_once_with("job-1")
+    assert [c.args for c in writer.call_args_list] == [(1, "Página 1"), (2, "Página 2")]
+    writer.close.assert_called_once()
+
+
+def test_pipeline_reutiliza_contagem_do_formatador():
+    """Testa que o pipeline usa as contagens por seção feitas na formatação."""
+    llms_text = "# Title: Doc\n\n# Content\n\nTexto"
+    token_stats = {"model": "gpt-4o", "total": 9, "sections": {"# Title: Doc": 4, "# Content": 5}}
+
+    class FakeConverter:
+        def __init__(self, **kwargs):
+            pass
+
+        def run(self, modelo_llm=None, **kwargs):
+            assert modelo_llm == "gpt-4o"
+            return {"formats": {"llms": llms_text}, "doc": None, "token_stats": token_stats}
+
+    with patch.object(conversion_service, "DocumentConverterTool", FakeConverter), \
+         patch.object(conversion_service, "count_tokens") as count_mock, \
+         patch.object(conversion_service, "SectionIndex") as index_mock:
+        result = conversion_service.run_conversion_pipeline(
+            "doc.pdf", {"profile": "llms-full", "model_name": "gpt-4o"}
+        )
+
+    count_mock.assert_not_called()
+    index_mock.assert_not_called()
+    assert result["token_count"] == 9
+    assert result["analysis"]["model_fit"]["gpt-4o"]["tokens"] == 9
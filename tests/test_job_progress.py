@@ -0,0 +1,71 @@
+"""
+Testes da gravação agrupada de progresso de jobs.
+"""
+from unittest.mock import AsyncMock, MagicMock
+from src.api.services.job_progress import JobProgressRecorder, JobProgressWriter
+
+
+def _redis_with_pipeline():
+    redis = AsyncMock()
+    redis.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[])))
+    return redis
+
+
+async def test_flush_grava_campos_e_ttl_em_uma_transacao():
+    redis = _redis_with_pipeline()
+    progress = JobProgressRecorder(redis, "job-1")
+
+    await progress.flush({"status": "completed", "progress": "1.0"}, ttl=100, extra_keys=["job:job-1:pages"])
+
+    redis.pipeline.assert_called_once_with(transaction=True)
+    pipe = redis.pipeline.return_value
+    pipe.hset.assert_called_once_with("job:job-1", mapping={"status": "completed", "progress": "1.0"})
+    pipe.expire.assert_any_call("job:job-1", 100)
+    pipe.expire.assert_any_call("job:job-1:pages", 100)
+    pipe.publish.assert_called_once_with("job:job-1:events", '{"status": "completed", "progress": "1.0"}')
+    pipe.execute.assert_awaited_once()
+    redis.hset.assert_not_called()
+
+    # Sem campos nem TTL, flush não gera round trip
+    await progress.flush()
+    redis.pipeline.assert_called_once()
+
+
+def test_writer_agrupa_atualizacoes_ate_o_flush():
+    redis = MagicMock()
+    progress = JobProgressWriter("job-1", redis=redis, flush_interval=60)
+
+    progress.update({"status": "processing", "progress": "0.7"})
+    progress.update({"progress": "0.8"})
+    redis.pipeline.assert_not_called()
+
+    progress.close()
+
+    redis.pipeline.assert_called_once_with(transaction=True)
+    pipe = redis.pipeline.return_value
+    pipe.hset.assert_called_once_with("job:job-1", mapping={"status": "processing", "progress": "0.8"})
+    pipe.publish.assert_called_once_with("job:job-1:events", '{"status": "processing", "progress": "0.8"}')
+    pipe.execute.assert_called_once()
+    redis.close.assert_called_once()
+
+
+def test_writer_grava_apos_intervalo_de_debounce():
+    redis = MagicMock()
+    progress = JobProgressWriter("job-1", redis=redis, flush_interval=0)
+
+    progress.update({"progress": "0.5"})
+
+    redis.pipeline.return_value.hset.assert_called_once_with("job:job-1", mapping={"progress": "0.5"})
+
+    # Sem pendências, flush não gera round trip
+    progress.flush()
+    redis.pipeline.assert_called_once()
+
+
+def test_writer_nao_interrompe_conversao_em_falha_do_redis():
+    redis = MagicMock()
+    redis.pipeline.return_value.execute.side_effect = ConnectionError("redis indisponível")
+    progress = JobProgressWriter("job-1", redis=redis, flush_interval=0)
+
+    progress.update({"progress": "0.5"})
+    progress.close()
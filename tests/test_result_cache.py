@@ -0,0 +1,93 @@
+"""
+Testes do cache de resultados de conversão.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.api.models import ConversionRequest
+from src.api.services import conversion_service, result_cache
+
+
+@pytest.fixture
+def redis_mock():
+    mock = AsyncMock()
+    mock.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[])))
+    return mock
+
+
+def test_cache_key_normaliza_parametros():
+    content_hash = result_cache.hash_content(b"documento")
+    base = ConversionRequest(output_formats=["llms", "md"])
+
+    assert result_cache.build_cache_key(content_hash, base) == result_cache.build_cache_key(
+        content_hash, ConversionRequest(output_formats=["md", "llms", "md"], to_langchain=True)
+    )
+    assert result_cache.build_cache_key(content_hash, base) != result_cache.build_cache_key(
+        content_hash, ConversionRequest(output_formats=["llms", "md"], profile="llms-min")
+    )
+    assert result_cache.build_cache_key(content_hash, base) != result_cache.build_cache_key(
+        result_cache.hash_content(b"outro documento"), base
+    )
+
+
+async def test_hit_conclui_job_apontando_para_origem(redis_mock, tmp_path):
+    redis_mock.get.return_value = "job-origem"
+    redis_mock.hget.return_value = "completed"
+
+    with patch.object(conversion_service, "redis_client", redis_mock), \
+         patch.object(conversion_service, "UPLOAD_DIR", str(tmp_path)), \
+         patch.object(conversion_service, "RESULT_CACHE_ENABLED", True):
+        file_path = tmp_path / "upload.part"
+        file_path.write_bytes(b"conteudo")
+        job_id = await conversion_service.create_conversion_job(
+            str(file_path), "doc.txt", ConversionRequest(), "hash-conteudo"
+        )
+
+    pipe = redis_mock.pipeline.return_value
+    mapping = pipe.hset.call_args.kwargs["mapping"]
+    assert mapping["status"] == "completed"
+    assert mapping["result_ref"] == "job-origem"
+    pipe.expire.assert_called_with(f"job:{job_id}", conversion_service.JOB_TTL_COMPLETED)
+    redis_mock.expire.assert_any_await("job:job-origem", conversion_service.JOB_TTL_COMPLETED)
+    redis_mock.lpush.assert_not_called()
+    assert list(tmp_path.iterdir()) == []
+    assert job_id
+
+
+async def test_hit_de_job_stream_exige_paginas_da_origem(redis_mock, tmp_path):
+    redis_mock.get.return_value = "job-origem"
+    redis_mock.hget.return_value = "completed"
+    redis_mock.exists.return_value = 0
+
+    with patch.object(conversion_service, "redis_client", redis_mock), \
+         patch.object(conversion_service, "UPLOAD_DIR", str(tmp_path)), \
+         patch.object(conversion_service, "RESULT_CACHE_ENABLED", True), \
+         patch.object(conversion_service, "JOB_EXECUTION_MODE", "queue"):
+        file_path = tmp_path / "upload.part"
+        file_path.write_bytes(b"conteudo")
+        await conversion_service.create_conversion_job(
+            str(file_path), "doc.txt", ConversionRequest(stream=True), "hash-conteudo"
+        )
+
+    # Origem sem páginas publicadas: converter de novo em vez de reaproveitar
+    redis_mock.exists.assert_awaited_once_with("job:job-origem:pages")
+    redis_mock.lpush.assert_awaited_once()
+
+
+async def test_miss_com_origem_expirada_remove_entrada(redis_mock):
+    redis_mock.get.return_value = "job-expirado"
+    redis_mock.hget.return_value = None
+
+    assert await result_cache.lookup(redis_mock, "cache:conversion:abc") is None
+    redis_mock.delete.assert_awaited_once_with("cache:conversion:abc")
+
+
+async def test_store_respeita_limite_de_entradas(redis_mock):
+    redis_mock.zcard.return_value = 7
+    redis_mock.zpopmin.return_value = [("cache:conversion:a", 1.0), ("cache:conversion:b", 2.0)]
+
+    with patch.object(result_cache, "RESULT_CACHE_MAX_ENTRIES", 5):
+        await result_cache.store(redis_mock, "cache:conversion:c", "job-1")
+
+    redis_mock.set.assert_awaited_once()
+    redis_mock.zpopmin.assert_awaited_once_with(result_cache.CACHE_INDEX_KEY, 2)
+    redis_mock.delete.assert_awaited_once_with("cache:conversion:a", "cache:conversion:b")
@@ -0,0 +1,192 @@
+"""
+Testes do armazenamento de resultados fora do Redis.
+"""
+import json
+import os
+import time
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+from docling_core.types.doc import DocItemLabel, DoclingDocument, TableCell, TableData
+from src.api.models import ConversionRequest
+from src.api.services import conversion_service
+from src.api.services.result_store import LocalResultStore, S3ResultStore, expired_keys
+
+
+def test_local_store_grava_e_le_formatos(tmp_path):
+    store = LocalResultStore(str(tmp_path))
+
+    key = store.save_formats("job-1", {"llms": "# Título", "json": {"pages": 2}})
+
+    assert key == "job-1"
+    assert store.load_format("job-1", "llms") == "# Título"
+    assert store.load_format("job-1", "json") == '{"pages": 2}'
+    assert store.load_format("job-1", "html") is None
+
+    store.delete("job-1")
+    assert store.load_format("job-1", "llms") is None
+
+
+def test_local_store_rejeita_nomes_invalidos(tmp_path):
+    store = LocalResultStore(str(tmp_path))
+
+    with pytest.raises(ValueError):
+        store.save_formats("../fora", {"llms": "x"})
+    with pytest.raises(ValueError):
+        store.load_format("job-1", "../../etc/passwd")
+
+
+def test_expired_keys_considera_idade(tmp_path):
+    store = LocalResultStore(str(tmp_path))
+    store.save_formats("antigo", {"llms": "a"})
+    store.save_formats("recente", {"llms": "b"})
+    old = time.time() - 7200
+    os.utime(tmp_path / "antigo", (old, old))
+
+    assert list(expired_keys(store, 3600)) == ["antigo"]
+
+
+def test_s3_store_usa_prefixo_do_bucket():
+    client = MagicMock()
+    client.get_object.return_value = {"Body": MagicMock(read=MagicMock(return_value=b"conteudo"))}
+    client.get_paginator.return_value.paginate.return_value = [{
+        "Contents": [
+            {"Key": "results/job-1/llms", "LastModified": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+            {"Key": "results/job-1/md", "LastModified": datetime(2024, 1, 2, tzinfo=timezone.utc)},
+        ]
+    }]
+    store = S3ResultStore(bucket="bucket", prefix="results/", client=client)
+
+    store.save_formats("job-1", {"llms": "conteudo"})
+    client.put_object.assert_called_once_with(Bucket="bucket", Key="results/job-1/llms", Body=b"conteudo")
+    assert store.load_format("job-1", "llms") == "conteudo"
+    assert list(store.list_keys()) == [("job-1", datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp())]
+
+
+async def test_process_document_grava_formatos_fora_do_redis(tmp_path):
+    redis_mock = AsyncMock()
+    redis_mock.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[])))
+    store = LocalResultStore(str(tmp_path / "results"))
+    file_path = tmp_path / "doc.txt"
+    file_path.write_text("conteudo")
+    pipeline_result = {
+        "formats": {"llms": "# Doc", "md": "# Doc"},
+        "token_count": 3,
+        "analysis": None,
+        "processing_time": 0.5,
+    }
+
+    with patch.object(conversion_service, "redis_client", redis_mock), \
+         patch.object(conversion_service, "get_result_store", return_value=store), \
+         patch.object(conversion_service, "run_conversion_pipeline", return_value=pipeline_result):
+        await conversion_service.process_document("job-1", str(file_path), ConversionRequest())
+
+    mapping = redis_mock.pipeline.return_value.hset.call_args_list[-1].kwargs["mapping"]
+    assert mapping["status"] == "completed"
+    assert mapping["result_key"] == "job-1"
+    assert "result" not in mapping
+    assert store.load_format("job-1", "md") == "# Doc"
+
+    # Leitura completa e por formato a partir dos metadados
+    redis_mock.hgetall.return_value = {"status": "completed", **mapping}
+    with patch.object(conversion_service, "redis_client", redis_mock), \
+         patch.object(conversion_service, "get_result_store", return_value=store):
+        status, _, result, _ = await conversion_service.get_job_status("job-1")
+        _, content = await conversion_service.get_job_format("job-1", "llms")
+
+    assert status == "completed"
+    assert result.formats == {"llms": "# Doc", "md": "# Doc"}
+    assert result.token_count == 3
+    assert content == "# Doc"
+
+
+async def test_cleanup_remove_apenas_resultados_orfaos(tmp_path):
+    store = LocalResultStore(str(tmp_path))
+    store.save_formats("job-expirado", {"llms": "a"})
+    store.save_formats("job-ativo", {"llms": "b"})
+    old = time.time() - 2 * conversion_service.JOB_TTL_PROCESSING
+    for name in ("job-expirado", "job-ativo"):
+        os.utime(tmp_path / name, (old, old))
+
+    redis_mock = AsyncMock()
+    redis_mock.exists.side_effect = lambda key: int(key == "job:job-ativo")
+
+    with patch.object(conversion_service, "redis_client", redis_mock), \
+         patch.object(conversion_service, "get_result_store", return_value=store):
+        removed = await conversion_service.cleanup_old_jobs()
+
+    assert removed == 1
+    assert store.load_format("job-expirado", "llms") is None
+    assert store.load_format("job-ativo", "llms") == "b"
+
+
+def test_rota_retorna_formato_individual(test_client, mock_redis, api_headers):
+    with patch("src.api.routers.converter.get_job_format", new=AsyncMock(return_value=("completed", "# Doc"))):
+        response = test_client.get("/v1/convert/job-1/result/llms", headers=api_headers)
+    assert response.status_code == 200
+    assert response.text == "# Doc"
+
+    with patch("src.api.routers.converter.get_job_format", new=AsyncMock(return_value=("completed", None))):
+        response = test_client.get("/v1/convert/job-1/result/html", headers=api_headers)
+    assert response.status_code == 404
+
+
+def test_rota_tabelas_ndjson(test_client, mock_redis, api_headers):
+    doc = DoclingDocument(name="relatorio")
+    celulas = [
+        TableCell(text=texto, start_row_offset_idx=i, end_row_offset_idx=i + 1,
+                  start_col_offset_idx=j, end_col_offset_idx=j + 1)
+        for i, linha in enumerate([["Produto", "Preço"], ["Café", "10"], ["Chá", "8"]])
+        for j, texto in enumerate(linha)
+    ]
+    doc.add_table(data=TableData(num_rows=3, num_cols=2, table_cells=celulas))
+    conteudo = json.dumps(doc.export_to_dict())
+
+    with patch("src.api.routers.converter.get_job_format", new=AsyncMock(return_value=("completed", conteudo))):
+        response = test_client.get("/v1/convert/job-1/tables?batch_rows=1", headers=api_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    registros = [json.loads(linha) for linha in response.text.splitlines()]
+    assert [r["linhas"] for r in registros] == [[["Café", "10"]], [["Chá", "8"]]]
+
+    with patch("src.api.routers.converter.get_job_format", new=AsyncMock(return_value=("completed", None))):
+        response = test_client.get("/v1/convert/job-1/tables", headers=api_headers)
+    assert response.status_code == 404
+
+
+def test_rota_estrutura_plana(test_client, mock_redis, api_headers):
+    doc = DoclingDocument(name="arvore")
+    grupo = doc.add_group(name="secao")
+    doc.add_text(label=DocItemLabel.TEXT, text="A", parent=grupo)
+    conteudo = json.dumps(doc.export_to_dict())
+
+    with patch("src.api.routers.converter.get_job_format", new=AsyncMock(return_value=("completed", conteudo))):
+        response = test_client.get("/v1/convert/job-1/structure?flat=true", headers=api_headers)
+    assert response.status_code == 200
+    assert response.json()["pais"] == [-1, 0, 1]
+    assert response.json()["textos"] == ["", "", "A"]
+
+
+def test_rota_busca_monta_indice_do_json(test_client, mock_redis, api_headers):
+    doc = DoclingDocument(name="relatorio")
+    doc.add_text(label=DocItemLabel.TEXT, text="Receita líquida do trimestre")
+    formatos = {"search": None, "json": json.dumps(doc.export_to_dict())}
+
+    async def ler_formato(job_id, fmt):
+        return "completed", formatos[fmt]
+
+    with patch("src.api.services.conversion_service.get_job_format", new=ler_formato):
+        response = test_client.get('/v1/convert/job-busca/search?q="receita liquida"', headers=api_headers)
+    assert response.status_code == 200
+    assert response.json()["total"] == 1
+    assert response.json()["results"][0]["texto"] == "Receita líquida"
+
+
+def test_rota_busca_sem_indice_indica_formato_necessario(test_client, mock_redis, api_headers):
+    async def ler_formato(job_id, fmt):
+        return "completed", None
+
+    with patch("src.api.services.conversion_service.get_job_format", new=ler_formato):
+        response = test_client.get("/v1/convert/job-sem-indice/search?q=receita", headers=api_headers)
+    assert response.status_code == 404
+    assert "output_formats" in response.json()["detail"]
@@ -0,0 +1,92 @@
+"""
+Testes unitários para o pool de conversores Docling.
+"""
+
+import threading
+from src.tools.converter_pool import ConverterPool
+
+
+def test_reuses_converter_for_same_key():
+    """Mesma chave deve retornar o mesmo conversor sem chamar a fábrica novamente"""
+    pool = ConverterPool(max_size=2)
+    chamadas = []
+
+    def fabrica():
+        chamadas.append(1)
+        return object()
+
+    primeiro = pool.obter_ou_criar(("auto", None, False, None, None), fabrica)
+    segundo = pool.obter_ou_criar(("auto", None, False, None, None), fabrica)
+
+    assert primeiro is segundo
+    assert len(chamadas) == 1
+    assert pool.hits == 1
+    assert pool.misses == 1
+
+
+def test_different_keys_create_different_converters():
+    """Opções diferentes devem gerar conversores distintos"""
+    pool = ConverterPool(max_size=4)
+
+    a = pool.obter_ou_criar(("auto", None, False, None, None), object)
+    b = pool.obter_ou_criar(("tesseract", "eng", True, None, None), object)
+
+    assert a is not b
+    assert len(pool) == 2
+
+
+def test_lru_eviction():
+    """O conversor usado há mais tempo deve ser removido ao exceder o limite"""
+    pool = ConverterPool(max_size=2)
+
+    pool.obter_ou_criar("a", object)
+    pool.obter_ou_criar("b", object)
+    # Acessar "a" para torná-lo o mais recente
+    pool.obter_ou_criar("a", object)
+    pool.obter_ou_criar("c", object)
+
+    assert "a" in pool
+    assert "c" in pool
+    assert "b" not in pool
+    assert len(pool) == 2
+
+
+def test_limpar():
+    """limpar deve esvaziar o pool e zerar contadores"""
+    pool = ConverterPool(max_size=2)
+    pool.obter_ou_criar("a", object)
+    pool.obter_ou_criar("a", object)
+
+    pool.limpar()
+
+    assert len(pool) == 0
+    assert pool.hits == 0
+    assert pool.misses == 0
+
+
+def test_criacao_nao_bloqueia_outras_chaves():
+    """A fábrica de uma chave não deve bloquear outras chaves; a mesma chave é criada uma vez"""
+    pool = ConverterPool(max_size=4)
+    liberar = threading.Event()
+    chamadas = []
+
+    def fabrica_lenta():
+        chamadas.append("a")
+        liberar.wait(5)
+        return object()
+
+    threads = [threading.Thread(target=pool.obter_ou_criar, args=("a", fabrica_lenta)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+
+    # Enquanto "a" é criado, outra chave é atendida normalmente
+    assert pool.obter_ou_criar("b", object) is not None
+    assert "a" not in pool
+
+    liberar.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert chamadas == ["a"]
+    assert pool.misses == 2
+    assert pool.hits == 1
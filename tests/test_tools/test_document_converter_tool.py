@@ -1,6 +1,16 @@
 import os
 import pytest
 from src.tools.document_converter import DocumentConverterTool
+from src.tools.token_counter import count_tokens
+from src.tools.converter_pool import converter_pool
+
+
+@pytest.fixture(autouse=True)
+def limpar_pool_conversores():
+    """Garante que conversores mockados não vazem entre testes."""
+    converter_pool.limpar()
+    yield
+    converter_pool.limpar()
 
 class DummyConv:
     class Result:
@@ -140,6 +150,35 @@ def test_run_and_save(tmp_path, monkeypatch, profile):
     else:
         assert '# Content' in content
 
+def test_run_streaming_to_file(tmp_path, monkeypatch):
+    """Com return_text=False o LLMs.txt é escrito direto no arquivo informado"""
+    tool = DocumentConverterTool()
+
+    from docling.document_converter import DocumentConverter
+    original_init = DocumentConverter.__init__
+
+    def mock_document_converter_init(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        self.convert = DummyConv().convert
+
+    monkeypatch.setattr(DocumentConverter, '__init__', mock_document_converter_init)
+
+    src = tmp_path / 'dummy.pdf'
+    src.write_text('dummy')
+    monkeypatch.chdir(tmp_path)
+    destino = tmp_path / 'saida' / 'dummy_llms.txt'
+
+    output = tool.run(str(src), save_output=True, output_path=str(destino), return_text=False,
+                      export_formats=['json'])
+
+    assert 'llms' not in output['formats']
+    assert output['output_files']['llms'] == str(destino)
+    content = destino.read_text(encoding='utf-8')
+    assert 'Para1' in content
+    assert output['token_stats']['total'] == count_tokens(content)
+    assert (tmp_path / 'saida' / 'dummy.llms-full.json').exists()
+    assert not (tmp_path / 'output').exists()
+
 def test_file_not_found(tmp_path):
     """Test handling of non-existent files"""
     tool = DocumentConverterTool()
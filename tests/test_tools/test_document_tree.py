@@ -0,0 +1,83 @@
+"""
+Testes do percurso iterativo da árvore do documento.
+"""
+import sys
+from unittest.mock import patch
+from docling_core.types.doc import (
+    BoundingBox, DocItemLabel, DoclingDocument, ProvenanceItem, RefItem, Size
+)
+from src.tools.document_converter import DocumentConverterTool
+from src.tools.document_tree import estrutura_plana, percorrer_arvore
+
+
+def _documento():
+    doc = DoclingDocument(name="arvore")
+    doc.add_page(page_no=1, size=Size(width=100, height=100))
+    prov = ProvenanceItem(page_no=1, bbox=BoundingBox(l=0, t=0, r=1, b=1), charspan=(0, 0))
+    secao = doc.add_group(name="secao")
+    doc.add_text(label=DocItemLabel.TEXT, text="A", parent=secao, prov=prov)
+    doc.add_text(label=DocItemLabel.TEXT, text="B", parent=secao)
+    doc.add_text(label=DocItemLabel.TEXT, text="C")
+    return doc
+
+
+def test_estrutura_aninhada_e_plana():
+    tool = DocumentConverterTool()
+    doc = _documento()
+
+    aninhada = tool.extrair_estrutura_hierarquica(doc)
+    assert aninhada["tipo"] == "unspecified"
+    secao, texto_c = aninhada["filhos"]
+    assert [f["texto"] for f in secao["filhos"]] == ["A", "B"]
+    assert secao["filhos"][0]["pagina"] == 1
+    assert "pagina" not in secao["filhos"][1]
+    assert texto_c["texto"] == "C"
+
+    plana = tool.extrair_estrutura_hierarquica(doc, plana=True)
+    assert plana["pais"] == [-1, 0, 1, 1, 0]
+    assert plana["textos"] == ["", "", "A", "B", "C"]
+    assert plana["paginas"] == [None, None, 1, None, None]
+    assert [plana["categorias"][t] for t in plana["tipos"]] == ["unspecified", "unspecified", "text", "text", "text"]
+
+
+def test_arvore_profunda_sem_recursao():
+    doc = DoclingDocument(name="profunda")
+    pai = None
+    profundidade = sys.getrecursionlimit() + 500
+    for i in range(profundidade):
+        pai = doc.add_group(name=f"g{i}", parent=pai)
+
+    plana = estrutura_plana(doc)
+
+    assert len(plana["pais"]) == profundidade + 1
+    assert plana["pais"][-1] == profundidade - 1
+
+
+def test_referencias_compartilhadas_resolvidas_uma_vez():
+    doc = _documento()
+    texto_c = doc.texts[2]
+    # O mesmo filho referenciado também pelo grupo
+    doc.groups[0].children.append(texto_c.get_ref())
+
+    original = RefItem.resolve
+    chamadas = []
+
+    def resolver(ref, documento):
+        chamadas.append(ref.cref)
+        return original(ref, documento)
+
+    with patch.object(RefItem, "resolve", autospec=True, side_effect=resolver):
+        nos = [node for _, _, node in percorrer_arvore(doc)]
+
+    assert [getattr(n, "text", None) for n in nos].count("C") == 2
+    assert chamadas.count(texto_c.self_ref) == 1
+
+
+def test_referencia_ciclica_ignorada():
+    doc = _documento()
+    grupo = doc.groups[0]
+    grupo.children.append(doc.body.get_ref())
+
+    plana = estrutura_plana(doc)
+
+    assert plana["pais"] == [-1, 0, 1, 1, 0]
@@ -0,0 +1,56 @@
+"""
+Testes do índice espacial de layout.
+"""
+from docling_core.types.doc import (
+    BoundingBox, DocItemLabel, DoclingDocument, ProvenanceItem, Size
+)
+from src.tools.document_converter import DocumentConverterTool
+from src.tools.layout_index import LayoutIndex
+
+
+def _documento():
+    """Duas páginas 100x100: título e dois parágrafos na 1, um parágrafo na 2."""
+    doc = DoclingDocument(name="layout")
+    for pagina in (1, 2):
+        doc.add_page(page_no=pagina, size=Size(width=100, height=100))
+
+    def prov(pagina, l, t, r, b):
+        return ProvenanceItem(page_no=pagina, bbox=BoundingBox(l=l, t=t, r=r, b=b), charspan=(0, 0))
+
+    doc.add_title(text="Título", prov=prov(1, 10, 5, 90, 15))
+    doc.add_text(label=DocItemLabel.TEXT, text="Esquerda", prov=prov(1, 5, 20, 45, 60))
+    doc.add_text(label=DocItemLabel.TEXT, text="Direita", prov=prov(1, 55, 20, 95, 60))
+    doc.add_text(label=DocItemLabel.TEXT, text="Página dois", prov=prov(2, 5, 5, 95, 95))
+    doc.add_text(label=DocItemLabel.TEXT, text="Sem posição")
+    return doc
+
+
+def test_consultas_por_regiao_e_ordem_de_leitura():
+    index = LayoutIndex(_documento(), tamanho_grade=4)
+
+    assert len(index) == 4
+    assert index.ordem_leitura(1).tolist() == [0, 1, 2]
+    assert index.ordem_leitura(2).tolist() == [3]
+    assert index.ordem_leitura(9).tolist() == []
+
+    # Metade esquerda da página 1: só "Esquerda" está inteiramente dentro
+    assert index.na_regiao(1, 0, 0, 50, 100).tolist() == [1]
+    assert index.na_regiao(1, 0, 0, 50, 100, contido=False).tolist() == [0, 1]
+    # Lados invertidos (t > b) descrevem o mesmo retângulo
+    assert index.na_regiao(1, 0, 100, 50, 0).tolist() == [1]
+    assert [index.rotulo(i) for i in index.na_regiao(1, 0, 0, 100, 100)] == ["title", "text", "text"]
+
+
+def test_to_dict_no_formato_de_extrair_layout():
+    doc = _documento()
+    layout = DocumentConverterTool().extrair_layout(doc)
+
+    assert layout["paginas"] == 2
+    assert layout["elementos"][1] == {
+        "tipo": "text",
+        "nivel": 1,
+        "pagina": 1,
+        "posicao": {"left": 5.0, "top": 20.0, "right": 45.0, "bottom": 60.0, "coordenadas_origem": "CoordOrigin.TOPLEFT"},
+        "texto": "Esquerda"
+    }
+    assert [e["texto"] for e in layout["elementos"]] == ["Título", "Esquerda", "Direita", "Página dois"]
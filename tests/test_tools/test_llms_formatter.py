@@ -1,6 +1,9 @@
+import time
 import pytest
 from unittest.mock import patch, MagicMock
-from src.tools.llms_formatter import LLMSFormatter
+from src.tools.llms_formatter import (
+    LLMSFormatter, PROFILES, SECOES, Secao, carregar_perfis_customizados, registrar_secao, remover_imagens_embutidas
+)
 
 
 class DummyTable:
@@ -318,3 +321,188 @@ def test_token_analysis_section():
     assert '# Token Analysis' in output
     assert 'Total tokens' in output
     assert 'gpt-3.5-turbo' in output
+
+
+@pytest.mark.parametrize("profile", ["llms-full", "llms-min", "llms-raw"])
+@pytest.mark.parametrize("modelo", ["gpt-3.5-turbo", "gpt-4o"])
+def test_formatar_com_tokens_soma_igual_ao_texto(profile, modelo):
+    """A soma das seções deve ser igual à contagem do documento completo."""
+    from src.tools.token_counter import count_tokens
+
+    formatter = LLMSFormatter()
+    output, stats = formatter.formatar_com_tokens(
+        DummyDocWithSummary(), title="Tokens", source="doc.pdf", profile=profile, modelo_llm=modelo
+    )
+
+    assert output == formatter.format(
+        DummyDocWithSummary(), title="Tokens", source="doc.pdf", profile=profile, modelo_llm=modelo
+    )
+    assert stats["model"] == modelo
+    assert stats["total"] == sum(stats["sections"].values()) == count_tokens(output, modelo)
+    assert "# Content" in stats["sections"]
+    assert ("# Token Analysis" in stats["sections"]) == (profile == "llms-full")
+    if profile == "llms-full":
+        assert f"Total tokens ({modelo}): {stats['total'] - stats['sections']['# Token Analysis']}" in output
+
+
+def test_format_to_escreve_no_stream():
+    """format_to produz o mesmo texto que format, escrito parte a parte."""
+    import io
+
+    formatter = LLMSFormatter()
+    stream = io.StringIO()
+    stats = formatter.format_to(stream, DummyDoc(), title="Stream", profile="llms-full", contar_tokens=True)
+
+    _, esperado = formatter.formatar_com_tokens(DummyDoc(), title="Stream", profile="llms-full")
+    assert stream.getvalue() == formatter.format(DummyDoc(), title="Stream", profile="llms-full")
+    assert stats == esperado
+
+
+def test_formatar_com_tokens_em_erro():
+    formatter = LLMSFormatter()
+    with patch.object(formatter, "_formatar", side_effect=Exception("falha")):
+        output, stats = formatter.formatar_com_tokens(DummyDoc(), title="Erro", profile="llms-min")
+
+    assert output.startswith("# Error")
+    assert stats is None
+
+
+def test_limpar_markdown_em_uma_passada():
+    """Testa as regras de limpeza aplicadas pelo padrão combinado."""
+    formatter = LLMSFormatter()
+    link = "https://example.com/" + "a" * 70
+    content = f"a ![x](img.png) b [link]({link}) c [curto](https://a.com)\n\n\n\nd"
+
+    assert formatter._limpar_markdown(content) == "a [IMAGEM] b link c [curto](https://a.com)\n\nd"
+
+    # URLs longas com parênteses também são encurtadas
+    wiki = "https://en.wikipedia.org/wiki/Python_(programming_language)#History_and_development"
+    assert formatter._limpar_markdown(f"ver [Python]({wiki}) hoje") == "ver Python hoje"
+
+
+def test_remover_imagens_embutidas():
+    """Somente imagens data URI são substituídas, uma a uma."""
+    blob = "A" * 100000
+    content = f"![fig](figura.png) ![img](data:image/png;base64,{blob}) fim"
+
+    assert remover_imagens_embutidas(content) == "![fig](figura.png) [IMAGEM] fim"
+    # Blob truncado (sem parêntese de fechamento) permanece intacto
+    truncado = f"![img](data:image/png;base64,{blob}"
+    assert remover_imagens_embutidas(truncado) == truncado
+
+
+@pytest.mark.parametrize("entrada", [
+    "[" * 200000,
+    "![" * 100000,
+    "[x](https://aaaa" * 20000,
+    "![x](data:image/" * 20000,
+])
+def test_limpeza_linear_com_colchetes_sem_fechamento(entrada):
+    """Colchetes/links sem fechamento não podem tornar a limpeza quadrática."""
+    inicio = time.perf_counter()
+    assert LLMSFormatter()._limpar_markdown(entrada) == entrada
+    assert remover_imagens_embutidas(entrada) == entrada
+    # Linear: ~0.05s; a versão quadrática levava minutos com essas entradas
+    assert time.perf_counter() - inicio < 2
+
+
+def test_perfil_produz_apenas_suas_secoes():
+    """Seções fora do perfil não acessam o documento."""
+    doc = MagicMock(spec=["export_to_markdown", "summary", "tables", "images", "raw_text"])
+    doc.summary = None
+    doc.export_to_markdown.return_value = "Texto"
+    type(doc).tables = property(lambda self: pytest.fail("tabelas acessadas no llms-min"))
+    type(doc).raw_text = property(lambda self: pytest.fail("raw acessado no llms-min"))
+
+    output = LLMSFormatter().format(doc, title="Min", profile="llms-min")
+
+    assert "# Content\n\nTexto" in output
+
+
+def test_perfil_customizado(monkeypatch):
+    """Perfis definidos em LLMS_CUSTOM_PROFILES usam as seções registradas."""
+    perfis = carregar_perfis_customizados('{"llms-tabelas": ["metadata", "tables"]}')
+    assert perfis == {"llms-tabelas": ("metadata", "tables")}
+    monkeypatch.setitem(PROFILES, "llms-tabelas", perfis["llms-tabelas"])
+
+    doc = DummyDoc()
+    doc.export_to_markdown = MagicMock(side_effect=AssertionError("markdown não deveria ser exportado"))
+    output = LLMSFormatter().format(doc, title="Custom", profile="llms-tabelas")
+
+    assert "# Title: Custom" in output
+    assert "# Tables" in output
+    assert "# Content" not in output
+
+    with pytest.raises(ValueError):
+        carregar_perfis_customizados('{"x": ["inexistente"]}')
+    with pytest.raises(ValueError):
+        carregar_perfis_customizados('[1, 2]')
+
+
+def test_secao_acessa_apenas_dados_declarados(monkeypatch):
+    """Dados em requer são calculados uma vez; dados não declarados são recusados."""
+    exportacoes = []
+    doc = DummyDoc()
+    doc.export_to_markdown = lambda: exportacoes.append(1) or "Texto"
+    acessos = {}
+
+    def produtor(contexto, saida):
+        acessos["markdown"] = [contexto.obter("markdown"), contexto.obter("markdown")]
+        with pytest.raises(RuntimeError):
+            contexto.obter("tables")
+
+    monkeypatch.setitem(SECOES, "teste", Secao("teste", produtor, requer=("markdown",)))
+    monkeypatch.setitem(PROFILES, "llms-teste", ("teste", "content"))
+    output = LLMSFormatter().format(doc, profile="llms-teste")
+
+    assert acessos["markdown"] == ["Texto", "Texto"]
+    assert exportacoes == [1]
+    assert "# Content\n\nTexto" in output
+
+    with pytest.raises(ValueError):
+        registrar_secao("invalida", requer=("inexistente",))
+
+
+@pytest.mark.parametrize("max_tokens", [60, 300, 2000])
+def test_orcamento_de_tokens(max_tokens):
+    """Com max_tokens o documento cabe no orçamento e informa os cortes."""
+    from src.tools.token_counter import count_tokens
+
+    doc = DummyDocLarge()
+    doc.raw_text = "raw " * 500
+    output, stats = LLMSFormatter().formatar_com_tokens(doc, title="Budget", profile="llms-full",
+                                                        max_tokens=max_tokens)
+
+    assert stats["total"] == count_tokens(output) <= max_tokens
+    assert "# Title: Budget" in output
+    assert "# Token Budget" in output
+    assert "# Token Analysis" not in output
+    assert "raw" in stats["budget"]["removed"]
+    if "content" in stats["budget"]["truncated"]:
+        # Truncado em limite de parágrafo
+        content = output.split("# Content\n\n", 1)[1].split("\n\n\n#", 1)[0]
+        assert content.split("\n\n")[-1].startswith("Paragraph ")
+
+
+def test_orcamento_folgado_mantem_documento():
+    formatter = LLMSFormatter()
+    output, stats = formatter.formatar_com_tokens(DummyDoc(), title="Folga", profile="llms-min", max_tokens=10000)
+
+    assert stats["budget"] == {"max_tokens": 10000, "removed": [], "truncated": []}
+    assert output.startswith(formatter.format(DummyDoc(), title="Folga", profile="llms-min"))
+
+
+def test_formatar_paginas_em_ordem():
+    """Testa a formatação página a página usada no modo streaming."""
+    class PagedDoc:
+        pages = {2: None, 1: None}
+
+        def export_to_markdown(self, page_no=None):
+            return f'Conteúdo da página {page_no} ![fig](data:image/png;base64,AAA)'
+
+    formatter = LLMSFormatter()
+    paginas = list(formatter.formatar_paginas(PagedDoc()))
+
+    assert [page_no for page_no, _ in paginas] == [1, 2]
+    assert paginas[0][1] == 'Conteúdo da página 1 [IMAGEM]'
+    assert list(formatter.formatar_paginas(DummyDoc())) == []
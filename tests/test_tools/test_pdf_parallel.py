@@ -0,0 +1,104 @@
+"""
+Testes da conversão paralela de PDFs por intervalos de páginas.
+"""
+from unittest.mock import MagicMock, patch
+from docling_core.types.doc import (
+    BoundingBox, DocItemLabel, DoclingDocument, ProvenanceItem, Size, TableData
+)
+from src.tools import pdf_parallel
+from src.tools.document_converter import DocumentConverterTool
+
+
+def _documento_parcial(pagina, texto):
+    """Cria um documento com um grupo, um texto e uma tabela com legenda em uma página."""
+    doc = DoclingDocument(name="manual")
+    doc.add_page(page_no=pagina, size=Size(width=100, height=100))
+    prov = ProvenanceItem(page_no=pagina, bbox=BoundingBox(l=0, t=0, r=1, b=1), charspan=(0, len(texto)))
+    grupo = doc.add_group(name="secao")
+    doc.add_text(label=DocItemLabel.TEXT, text=texto, parent=grupo, prov=prov)
+    tabela = doc.add_table(data=TableData(num_rows=0, num_cols=0), prov=prov)
+    legenda = doc.add_text(label=DocItemLabel.CAPTION, text=f"Legenda {pagina}", parent=tabela)
+    tabela.captions.append(legenda.get_ref())
+    return doc.export_to_dict()
+
+
+def test_calcular_intervalos():
+    assert pdf_parallel.calcular_intervalos(60, 25) == [(1, 25), (26, 50), (51, 60)]
+    assert pdf_parallel.calcular_intervalos(25, 25) == [(1, 25)]
+    assert pdf_parallel.calcular_intervalos(0, 25) == []
+
+
+def test_mesclar_documentos_preserva_ordem_e_referencias():
+    doc = pdf_parallel.mesclar_documentos([
+        _documento_parcial(1, "Primeira página"),
+        _documento_parcial(2, "Segunda página"),
+    ])
+
+    assert sorted(doc.pages) == [1, 2]
+    assert [t.text for t in doc.texts] == ["Primeira página", "Legenda 1", "Segunda página", "Legenda 2"]
+    assert [t.prov[0].page_no for t in doc.texts if t.prov] == [1, 2]
+
+    # Referências da segunda parte apontam para os itens deslocados
+    assert doc.groups[1].self_ref == "#/groups/1"
+    assert doc.groups[1].children[0].cref == "#/texts/2"
+    assert doc.texts[2].parent.cref == "#/groups/1"
+    assert doc.tables[1].captions[0].cref == "#/texts/3"
+    assert [c.cref for c in doc.body.children] == ["#/groups/0", "#/tables/0", "#/groups/1", "#/tables/1"]
+
+    markdown = doc.export_to_markdown()
+    assert markdown.index("Primeira página") < markdown.index("Segunda página")
+
+
+def test_pdf_curto_nao_e_paralelizado(tmp_path):
+    arquivo = tmp_path / "curto.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+
+    with patch.object(pdf_parallel, "contar_paginas", return_value=3):
+        assert pdf_parallel.deve_paralelizar(str(arquivo)) == 0
+    with patch.object(pdf_parallel, "contar_paginas", return_value=400), \
+         patch.object(pdf_parallel, "PDF_PARALLEL_WORKERS", 8):
+        assert pdf_parallel.deve_paralelizar(str(arquivo)) == 400
+    assert pdf_parallel.deve_paralelizar(str(tmp_path / "documento.docx")) == 0
+
+
+def test_run_usa_conversao_paralela_para_pdf_longo(tmp_path):
+    arquivo = tmp_path / "manual.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    mesclado = pdf_parallel.mesclar_documentos([_documento_parcial(1, "Conteúdo do manual")])
+
+    with patch("src.tools.document_converter.deve_paralelizar", return_value=400), \
+         patch("src.tools.document_converter.converter_em_paralelo", return_value=mesclado) as paralelo, \
+         patch.object(DocumentConverterTool, "_obter_conversor") as obter_conversor:
+        resultado = DocumentConverterTool().run(str(arquivo), save_output=False, profile="llms-min")
+
+    assert paralelo.call_args.args == (str(arquivo), 400)
+    obter_conversor.assert_not_called()
+    assert resultado["doc"] is mesclado
+    assert "Conteúdo do manual" in resultado["formats"]["llms"]
+
+
+def test_streaming_de_pdf_sem_paralelismo_publica_por_intervalo(tmp_path):
+    arquivo = tmp_path / "manual.pdf"
+    arquivo.write_bytes(b"%PDF-1.4")
+    tamanho = pdf_parallel.PDF_PAGE_RANGE_SIZE
+    partes = {
+        (1, tamanho): _documento_parcial(1, "Primeira parte"),
+        (tamanho + 1, tamanho + 1): _documento_parcial(tamanho + 1, "Segunda parte")
+    }
+    conversor = MagicMock()
+    conversor.convert.side_effect = lambda caminho, page_range: MagicMock(
+        document=DoclingDocument.model_validate(partes[page_range])
+    )
+    publicadas = []
+
+    with patch("src.tools.document_converter.deve_paralelizar", return_value=0), \
+         patch("src.tools.document_converter.contar_paginas", return_value=tamanho + 1), \
+         patch.object(DocumentConverterTool, "_obter_conversor", return_value=conversor):
+        resultado = DocumentConverterTool().run(
+            str(arquivo), save_output=False, profile="llms-min",
+            callback_paginas=lambda pagina, conteudo: publicadas.append(pagina)
+        )
+
+    assert [c.kwargs["page_range"] for c in conversor.convert.call_args_list] == list(partes)
+    assert publicadas == [1, tamanho + 1]
+    assert "Segunda parte" in resultado["formats"]["llms"]
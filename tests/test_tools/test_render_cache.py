@@ -0,0 +1,48 @@
+"""
+Testes do cache de exportações de documentos.
+"""
+import pytest
+from unittest.mock import MagicMock
+from src.tools.llms_formatter import LLMSFormatter
+from src.tools.render_cache import DocumentRenderCache
+
+
+def test_render_cache_exporta_uma_vez_por_argumentos():
+    doc = MagicMock()
+    doc.export_to_markdown.return_value = "# Doc"
+    doc.export_to_dict.side_effect = lambda **kwargs: dict(kwargs)
+    render = DocumentRenderCache(doc)
+
+    assert render.markdown() == render.markdown() == "# Doc"
+    assert render.dict(mode="json") == {"mode": "json"}
+    assert render.dict() == {}
+    render.dict(mode="json")
+
+    doc.export_to_markdown.assert_called_once_with()
+    assert doc.export_to_dict.call_count == 2
+
+
+def test_render_cache_nao_memoriza_erros():
+    doc = MagicMock()
+    doc.export_to_html.side_effect = [RuntimeError("falha"), "<html></html>"]
+    render = DocumentRenderCache(doc)
+
+    with pytest.raises(RuntimeError):
+        render.html()
+    assert render.html() == "<html></html>"
+    assert render.supports("html")
+    assert not DocumentRenderCache(object()).supports("html")
+
+
+def test_formatter_exporta_markdown_uma_vez():
+    doc = MagicMock(spec=["export_to_markdown", "tables", "pictures"])
+    doc.export_to_markdown.return_value = "# Título\n\n" + "Parágrafo com texto suficiente para o sumário. " * 3
+    doc.tables = []
+    doc.pictures = []
+    render = DocumentRenderCache(doc)
+
+    output = LLMSFormatter().format(doc, title="Doc", profile="llms-full", render_cache=render)
+
+    assert "# Summary" in output
+    assert render.markdown() in output
+    doc.export_to_markdown.assert_called_once_with()
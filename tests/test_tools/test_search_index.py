@@ -0,0 +1,78 @@
+"""
+Testes do índice invertido de busca com posição.
+"""
+import json
+import pytest
+from docling_core.types.doc import (
+    BoundingBox, DocItemLabel, DoclingDocument, ProvenanceItem, Size
+)
+from src.tools.document_converter import DocumentConverterTool
+from src.tools.search_index import SearchIndex, buscar_em_diretorio
+
+
+def _documento():
+    doc = DoclingDocument(name="relatorio")
+    doc.add_page(page_no=1, size=Size(width=100, height=100))
+    doc.add_page(page_no=2, size=Size(width=100, height=100))
+
+    def prov(pagina, t):
+        return ProvenanceItem(page_no=pagina, bbox=BoundingBox(l=0, t=t, r=90, b=t + 10), charspan=(0, 0))
+
+    doc.add_title(text="Relatório Anual", prov=prov(1, 0))
+    doc.add_text(label=DocItemLabel.TEXT, text="O lucro líquido cresceu; a receita também.", prov=prov(1, 20))
+    doc.add_text(label=DocItemLabel.TEXT, text="Receita por região e lucro operacional.", prov=prov(2, 0))
+    return doc
+
+
+def test_busca_termo_sem_acentos_com_posicao():
+    resultados = SearchIndex(_documento()).buscar("relatorio")
+
+    assert len(resultados) == 1
+    resultado = resultados[0]
+    assert resultado["texto"] == "Relatório"
+    assert (resultado["inicio"], resultado["fim"]) == (0, 9)
+    assert resultado["pagina"] == 1
+    assert resultado["bbox"] == {"l": 0.0, "t": 0.0, "r": 90.0, "b": 10.0}
+    assert resultado["ref"] == "#/texts/0"
+
+
+def test_busca_frase_e_varios_termos():
+    indice = SearchIndex(_documento())
+
+    frase = indice.buscar('"lucro liquido"')
+    assert [(r["pagina"], r["texto"]) for r in frase] == [(1, "lucro líquido")]
+
+    # Todos os termos no mesmo elemento
+    todos = indice.buscar("receita lucro")
+    assert [(r["elemento"], r["texto"]) for r in todos] == [(1, "lucro"), (1, "receita"), (2, "Receita"), (2, "lucro")]
+    assert {r["elemento"] for r in indice.buscar('receita "lucro liquido"')} == {1}
+
+    # Qualquer termo
+    assert {r["elemento"] for r in indice.buscar("anual operacional", exigir_todos=False)} == {0, 2}
+    assert indice.buscar("anual operacional") == []
+    assert indice.buscar("   ") == []
+
+
+def test_indice_serializado_e_busca_em_diretorio(tmp_path):
+    tool = DocumentConverterTool()
+    doc = _documento()
+    indice = tool.indexar_texto(doc)
+
+    restaurado = SearchIndex.from_dict(json.loads(json.dumps(indice.to_dict())))
+    assert restaurado.buscar("receita") == tool.buscar_texto_com_posicao(doc, "receita")
+
+    indice.salvar(str(tmp_path / "a.search.json"))
+    indice.salvar(str(tmp_path / "b.search.json"))
+    (tmp_path / "quebrado.search.json").write_text("{}", encoding="utf-8")
+
+    resultados = buscar_em_diretorio(str(tmp_path), '"lucro operacional"')
+    assert [r["arquivo"].rsplit("/", 1)[-1] for r in resultados] == ["a.search.json", "b.search.json"]
+
+    with pytest.raises(ValueError):
+        SearchIndex.from_dict({"versao": 99})
+
+
+def test_indice_vazio_informado_nao_e_reconstruido():
+    vazio = SearchIndex(DoclingDocument(name="vazio"))
+    assert len(vazio) == 0
+    assert DocumentConverterTool().buscar_texto_com_posicao(_documento(), "receita", indice=vazio) == []
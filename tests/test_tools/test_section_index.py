@@ -0,0 +1,67 @@
+"""
+Testes unitários para o índice de seções LLMs.txt.
+"""
+
+import re
+from src.tools.section_index import SectionIndex
+from src.tools.token_counter import count_tokens
+
+
+def _split_sections(content):
+    """Implementação anterior (re.split + concatenação), usada como referência."""
+    sections = re.split(r'(^# .+)', content, flags=re.MULTILINE)
+    section_map = {}
+    current = None
+    for part in sections:
+        if part.strip().startswith('# '):
+            current = part.strip()
+            section_map[current] = ''
+        elif current:
+            section_map[current] += part
+    return section_map
+
+
+DOCUMENT = """Preâmbulo ignorado
+# Title
+Documento de Teste
+
+# Summary
+Resumo curto.
+## Subtítulo não é seção
+# Content
+Primeiro parágrafo.
+
+# Content
+Seção repetida: prevalece a última.
+# Tables
+| A | B |"""
+
+
+def test_section_index_matches_split_loop():
+    """O índice produz o mesmo mapa que o laço re.split anterior"""
+    index = SectionIndex(DOCUMENT)
+
+    assert dict(index) == _split_sections(DOCUMENT)
+    assert list(index) == ["# Title", "# Summary", "# Content", "# Tables"]
+
+
+def test_section_index_spans_point_into_text():
+    """Os intervalos referenciam o texto original"""
+    index = SectionIndex(DOCUMENT)
+
+    start, end = index.spans["# Tables"]
+    assert DOCUMENT[start:end] == "\n| A | B |"
+    assert end == len(DOCUMENT)
+
+
+def test_section_index_count_tokens():
+    """Contagem por seção equivale a contar cada seção individualmente"""
+    index = SectionIndex(DOCUMENT)
+
+    assert index.count_tokens("gpt-4") == {title: count_tokens(text, "gpt-4") for title, text in index.items()}
+
+
+def test_section_index_without_sections():
+    """Texto sem títulos de primeiro nível resulta em índice vazio"""
+    assert len(SectionIndex("texto sem seções\n## só subtítulo")) == 0
+    assert len(SectionIndex("")) == 0
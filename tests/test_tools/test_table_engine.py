@@ -0,0 +1,134 @@
+"""
+Testes do motor colunar de tabelas.
+"""
+import json
+import pytest
+from docling_core.types.doc import (
+    BoundingBox, DoclingDocument, ProvenanceItem, Size, TableCell, TableData
+)
+from src.tools import table_engine
+from src.tools.document_converter import DocumentConverterTool
+from src.tools.table_engine import ColumnarTable, extrair_tabelas_colunares
+
+
+def _celula(linha, coluna, texto):
+    return TableCell(
+        text=texto,
+        start_row_offset_idx=linha, end_row_offset_idx=linha + 1,
+        start_col_offset_idx=coluna, end_col_offset_idx=coluna + 1,
+    )
+
+
+def _documento(linhas, pagina=3):
+    doc = DoclingDocument(name="relatorio")
+    doc.add_page(page_no=pagina, size=Size(width=100, height=100))
+    prov = ProvenanceItem(page_no=pagina, bbox=BoundingBox(l=0, t=0, r=1, b=1), charspan=(0, 0))
+    celulas = [_celula(i, j, texto) for i, linha in enumerate(linhas) for j, texto in enumerate(linha)]
+    data = TableData(num_rows=len(linhas), num_cols=len(linhas[0]), table_cells=celulas)
+    doc.add_table(data=data, prov=prov)
+    doc.add_table(data=TableData(num_rows=0, num_cols=0), prov=prov)
+    return doc
+
+
+LINHAS = [["Produto", "Preço"], ["Café", "10"], ["Chá", "8"]]
+
+
+def test_tabela_montada_por_colunas():
+    tabela = extrair_tabelas_colunares(_documento(LINHAS))
+
+    assert len(tabela) == 1
+    assert tabela[0].indice == 0
+    assert tabela[0].pagina == 3
+    assert tabela[0].cabecalhos == ["Produto", "Preço"]
+    assert tabela[0].colunas == [["Café", "Chá"], ["10", "8"]]
+    assert tabela[0].to_matrix() == LINHAS
+
+
+def test_primeira_linha_vazia_nao_vira_cabecalho():
+    tabela = ColumnarTable.from_docling(_documento([["", ""], ["a", "b"]]).tables[0])
+
+    assert tabela.cabecalhos is None
+    assert tabela.nomes_colunas() == ["col_0", "col_1"]
+    assert tabela.to_markdown() == " | \n--- | ---\na | b"
+
+
+def test_to_pandas_usa_os_mesmos_nomes_com_e_sem_pyarrow(monkeypatch):
+    tabela = extrair_tabelas_colunares(_documento([["Produto", ""], ["Café", "10"]]))[0]
+    assert tabela.nomes_colunas() == ["Produto", "col_1"]
+
+    if table_engine.pa is not None:
+        assert list(tabela.to_pandas().columns) == tabela.nomes_colunas()
+    monkeypatch.setattr(table_engine, "pa", None)
+    df = tabela.to_pandas()
+    assert list(df.columns) == tabela.nomes_colunas()
+    assert df["Produto"].tolist() == ["Café"]
+
+
+def test_to_pandas_sem_cabecalho_mantem_rotulos_inteiros(monkeypatch):
+    tabela = ColumnarTable.from_docling(_documento([["", ""], ["a", "b"]]).tables[0])
+
+    if table_engine.pa is not None:
+        assert list(tabela.to_pandas().columns) == [0, 1]
+    monkeypatch.setattr(table_engine, "pa", None)
+    df = tabela.to_pandas()
+    assert list(df.columns) == [0, 1]
+    assert df[1].tolist() == ["", "b"]
+
+
+def test_extrair_tabelas_formatos():
+    doc = _documento(LINHAS)
+    tool = DocumentConverterTool()
+
+    markdown = tool.extrair_tabelas(doc, "markdown")
+    assert markdown == [{"indice": 0, "pagina": 3, "tabela": "Produto | Preço\n--- | ---\nCafé | 10\nChá | 8"}]
+
+    html = tool.extrair_tabelas(doc, "html")[0]["tabela"]
+    assert "<th>Preço</th>" in html and "<td>Chá</td>" in html
+
+    df = tool.extrair_tabelas(doc, "pandas")[0]["tabela"]
+    assert list(df.columns) == ["Produto", "Preço"]
+    assert df["Preço"].tolist() == ["10", "8"]
+
+    assert tool.extrair_tabelas(doc, "dict")[0]["tabela"] == LINHAS
+    assert tool.extrair_tabelas(doc, "xml") == []
+
+
+def test_salvar_tabelas_formato_invalido():
+    with pytest.raises(ValueError):
+        table_engine.salvar_tabelas([], "tabelas.csv", formato="csv")
+
+
+def test_salvar_tabelas_parquet(tmp_path):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    caminho = DocumentConverterTool().salvar_tabelas(_documento(LINHAS), str(tmp_path / "tabelas.parquet"))
+    tabela = pq.read_table(caminho).to_pydict()
+
+    assert tabela["tabela"] == [0, 0, 0, 0]
+    assert tabela["pagina"] == [3, 3, 3, 3]
+    assert tabela["cabecalho"] == ["Produto", "Produto", "Preço", "Preço"]
+    assert tabela["valor"] == ["Café", "Chá", "10", "8"]
+
+
+def test_iterar_tabelas_em_lotes():
+    linhas = [["n", "quadrado"]] + [[str(i), str(i * i)] for i in range(5)]
+    tool = DocumentConverterTool()
+
+    lotes = list(tool.iterar_tabelas(_documento(linhas), "dict", linhas_por_lote=2))
+
+    assert [lote["inicio"] for lote in lotes] == [0, 2, 4]
+    assert lotes[1]["tabela"] == [["n", "quadrado"], ["2", "4"], ["3", "9"]]
+    assert lotes[2]["tabela"] == [["n", "quadrado"], ["4", "16"]]
+    with pytest.raises(ValueError):
+        next(tool.iterar_tabelas(_documento(linhas), "xml"))
+
+
+def test_iterar_ndjson():
+    linhas = [["n"]] + [[str(i)] for i in range(3)]
+    registros = [json.loads(linha) for linha in table_engine.iterar_ndjson(table_engine.iterar_tabelas(_documento(linhas), 2))]
+
+    assert registros == [
+        {"indice": 0, "pagina": 3, "inicio": 0, "cabecalhos": ["n"], "linhas": [["0"], ["1"]]},
+        {"indice": 0, "pagina": 3, "inicio": 2, "cabecalhos": ["n"], "linhas": [["2"]]},
+    ]
@@ -5,7 +5,7 @@ Testes unitários para o módulo TokenAnalyzer.
 import pytest
 from unittest.mock import patch, MagicMock
 from src.tools.token_analyzer import TokenAnalyzer
-from src.tools.token_counter import count_tokens
+from src.tools.token_counter import count_tokens, count_tokens_batch, count_tokens_for_models, estimate_tokens, get_encoding
 
 def test_token_analyzer_init():
     """Teste de inicialização do TokenAnalyzer"""
@@ -402,12 +402,95 @@ def test_count_tokens_malformed_input():
     assert count_tokens(None, "gpt-3.5-turbo") == 0
 
     # Non-string should be converted to string
-    with patch('tiktoken.encoding_for_model') as mock_encoding:
+    with patch('src.tools.token_counter.get_encoding') as mock_encoding:
         mock_encoder = MagicMock()
         mock_encoding.return_value = mock_encoder
-        mock_encoder.encode.return_value = [1, 2, 3]  # 3 tokens
+        mock_encoder.encode_ordinary.return_value = [1, 2, 3]  # 3 tokens
 
         result = count_tokens(123, "gpt-3.5-turbo")
         assert result == 3
         # Verify str conversion happened
-        mock_encoder.encode.assert_called_once()
\ No newline at end of file
+        mock_encoder.encode_ordinary.assert_called_once_with("123")
+
+def test_count_tokens_special_tokens_as_text():
+    """Special tokens in the text are counted as ordinary text"""
+    assert count_tokens("<|endoftext|>", "gpt-3.5-turbo") > 1
+
+def test_get_encoding_cached_per_model():
+    """Encoders are memoized and the unknown-model warning is logged once"""
+    get_encoding.cache_clear()
+    with patch('src.tools.token_counter.logger') as mock_logger:
+        assert get_encoding("unknown-model") is get_encoding("unknown-model")
+        assert mock_logger.warning.call_count == 1
+
+def test_count_tokens_batch_matches_single_counts():
+    """Batch counting returns the same counts, in order"""
+    texts = ["First section text.", "", None, "Second, longer section with more words in it."]
+
+    assert count_tokens_batch(texts, "gpt-4") == [count_tokens(t, "gpt-4") for t in texts]
+    assert count_tokens_batch([], "gpt-4") == []
+def test_count_tokens_for_models_one_pass_per_encoding():
+    """Each distinct encoding tokenizes the text once, with exact per-model counts"""
+    from src.tools import token_counter
+    text = "Multi-model token counting test. " * 20
+    models = ["gpt-4", "gpt-3.5-turbo", "gpt-4o", "gpt-4o-mini", "claude-3-haiku"]
+    token_counter._count_cache.clear()
+
+    with patch('src.tools.token_counter.tiktoken.get_encoding', wraps=token_counter.tiktoken.get_encoding) as spy:
+        counts = count_tokens_for_models(text, models)
+        assert sorted(c.args[0] for c in spy.call_args_list) == ["cl100k_base", "o200k_base"]
+
+        # Second call is served from the cache
+        spy.reset_mock()
+        assert count_tokens_for_models(text, models) == counts
+        spy.assert_not_called()
+
+    assert counts == {model: count_tokens(text, model) for model in models}
+
+def test_model_fit_reports_every_known_model():
+    """model_fit covers every model in model_limits and drives recommendations"""
+    analyzer = TokenAnalyzer(model_name="gpt-4")
+    fit = analyzer.model_fit("word " * 9000)
+
+    assert set(fit) == set(analyzer.model_limits)
+    assert fit["gpt-4"]["fits"] is False
+    assert fit["gpt-4o"]["fits"] is True
+    assert fit["gpt-4"]["usage_percent"] > 100
+    assert fit["gpt-4o"]["exact"] is True
+    assert fit["gpt-4o"]["encoding"] == "o200k_base"
+    # Modelos sem tokenizador no tiktoken são aproximados com cl100k_base
+    assert fit["claude-3-opus"]["exact"] is False
+    assert fit["claude-3-opus"]["encoding"] == "cl100k_base"
+
+    analysis = analyzer.analyze_sections({"# Content": fit["gpt-4"]["tokens"]}, model_fit=fit)
+    assert analysis["model_fit"] is fit
+    assert any("gpt-3.5-turbo" in r for r in analysis["recommendations"])
+
+def test_analyze_document_reuses_total_count_for_model_fit():
+    """analyze_document não tokeniza de novo o encoding do próprio modelo"""
+    analyzer = TokenAnalyzer(model_name="gpt-4o")
+    content = "# Title\n\n## Content\n\n" + "word " * 500
+
+    with patch.object(analyzer, "model_fit", wraps=analyzer.model_fit) as spy:
+        analysis = analyzer.analyze_document(content)
+
+    spy.assert_called_once_with(content, known_counts={"gpt-4o": count_tokens(content, "gpt-4o")})
+    assert analysis["model_fit"]["gpt-4o"]["tokens"] == count_tokens(content, "gpt-4o")
+
+def test_estimate_tokens_small_text_is_exact():
+    """Short texts are counted exactly, with no error bound"""
+    text = "A short paragraph that does not need sampling."
+    assert estimate_tokens(text, "gpt-4") == {"tokens": count_tokens(text, "gpt-4"), "error_bound": 0, "exact": True}
+
+@pytest.mark.parametrize("text", [
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3000,
+    "Документ на русском языке для оценки количества токенов. " * 3000,
+    "这是一个用于估计令牌数量的中文测试文本。" * 4000 + "Mixed English tail section. " * 2000,
+])
+def test_estimate_tokens_within_error_bound(text):
+    """Stratified estimate stays within the reported error bound"""
+    exact = count_tokens(text, "gpt-4o")
+    estimate = estimate_tokens(text, "gpt-4o", num_samples=8, sample_chars=1000)
+
+    assert estimate["exact"] is False
+    assert abs(estimate["tokens"] - exact) <= estimate["error_bound"]
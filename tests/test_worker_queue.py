@@ -0,0 +1,92 @@
+"""
+Testes da fila de jobs e do worker de conversão.
+"""
+import asyncio
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.api.models import ConversionRequest
+from src.api.services import conversion_service
+from src.worker.queue import enqueue_job, heartbeat_key, processing_key
+from src.worker.main import ConversionWorker
+from src.config import JOB_QUEUE_KEY
+
+
+@pytest.fixture
+def redis_mock():
+    mock = AsyncMock()
+    mock.lmove.return_value = None
+    mock.pipeline = MagicMock(return_value=MagicMock(execute=AsyncMock(return_value=[])))
+    return mock
+
+
+async def test_enqueue_job_payload(redis_mock):
+    params = ConversionRequest(profile="llms-min")
+    await enqueue_job(redis_mock, "job-1", "/tmp/doc.pdf", params)
+
+    key, payload = redis_mock.lpush.call_args.args
+    data = json.loads(payload)
+    assert key == JOB_QUEUE_KEY
+    assert data["job_id"] == "job-1"
+    assert data["file_path"] == "/tmp/doc.pdf"
+    assert ConversionRequest(**data["params"]) == params
+
+
+@pytest.mark.parametrize("mode, enfileira", [("queue", True), ("inline", False)])
+async def test_create_job_respeita_modo_execucao(redis_mock, tmp_path, mode, enfileira):
+    with patch.object(conversion_service, "redis_client", redis_mock), \
+         patch.object(conversion_service, "UPLOAD_DIR", str(tmp_path)), \
+         patch.object(conversion_service, "JOB_EXECUTION_MODE", mode), \
+         patch.object(conversion_service, "process_document", new=AsyncMock()) as process_mock:
+        file_path = tmp_path / "upload.part"
+        file_path.write_bytes(b"conteudo")
+        job_id = await conversion_service.create_conversion_job(
+            str(file_path), "doc.txt", ConversionRequest(), "hash-conteudo"
+        )
+
+    assert job_id
+    assert redis_mock.lpush.called is enfileira
+    assert process_mock.called is not enfileira
+
+
+async def test_worker_remove_job_da_lista_em_andamento(redis_mock):
+    worker = ConversionWorker(redis=redis_mock, concurrency=1, worker_id="w1")
+    worker._slots = asyncio.Semaphore(0)
+    payload = json.dumps({
+        "job_id": "job-1",
+        "file_path": "/tmp/doc.pdf",
+        "params": ConversionRequest().model_dump(mode="json")
+    })
+
+    with patch("src.worker.main.process_document", new=AsyncMock()) as process_mock:
+        await worker._handle(payload)
+
+    assert process_mock.call_args.args[0] == "job-1"
+    redis_mock.lrem.assert_awaited_once_with(processing_key("w1"), 1, payload)
+    assert worker._slots.locked() is False
+
+
+async def test_worker_recupera_jobs_de_workers_sem_heartbeat(redis_mock):
+    worker = ConversionWorker(redis=redis_mock, concurrency=1, worker_id="pod-novo")
+    listas = {
+        processing_key("pod-novo"): [],
+        processing_key("pod-vivo"): ["job-vivo"],
+        processing_key("pod-morto"): ["job-a", "job-b"],
+    }
+
+    async def scan_iter(match):
+        for key in listas:
+            yield key
+
+    async def lmove(origem, destino, *args):
+        return listas[origem].pop() if listas[origem] else None
+
+    redis_mock.scan_iter = scan_iter
+    redis_mock.lmove.side_effect = lmove
+    redis_mock.exists.side_effect = lambda key: int(key == heartbeat_key("pod-vivo"))
+
+    await worker.requeue_dead_workers()
+
+    assert listas[processing_key("pod-morto")] == []
+    assert listas[processing_key("pod-vivo")] == ["job-vivo"]
+    assert redis_mock.lmove.await_count == 3